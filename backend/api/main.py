@@ -11,6 +11,7 @@ from core.database import init_db
 from api.routes import auth, query, public, scraper
 from core.metrics import metrics_middleware, get_metrics
 from core.logging_config import setup_logging, logging_middleware
+from rag.relation_graph import relation_index
 from prometheus_client import CONTENT_TYPE_LATEST
 
 
@@ -59,6 +60,10 @@ async def startup_event():
     
     # Initialize database
     init_db()
+    
+    # Build document relation index (refreshed incrementally afterwards)
+    relation_index.refresh()
+    relation_index.start_auto_refresh(settings.RAG_GRAPH_REFRESH_SECONDS)
     print(f"✓ {settings.APP_NAME} v{settings.APP_VERSION} started")
     print(f"✓ Environment: {settings.ENVIRONMENT}")
     print(f"✓ Debug mode: {settings.DEBUG}")
@@ -67,6 +72,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
+    relation_index.stop_auto_refresh()
     print(f"✓ {settings.APP_NAME} shutdown")
 
 
@@ -4,11 +4,12 @@ Query processing API routes.
 import time
 from uuid import uuid4
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from core.database import get_db
 from core.security import get_current_user
-from core.cache import cache_get, cache_set
+from core.cache import cache_get, cache_set_for_documents
 from models import User, Conversation, Message
 from api.schemas import QueryRequest, QueryResponse, SourceInfo
 from rag.pipeline import rag_pipeline
@@ -116,8 +117,13 @@ def process_query(
         "processing_time": processing_time
     }
     
-    # Cache response
-    cache_set(cache_key, response_data, ttl=3600)  # 1 hour
+    # Cache response, indexed by source documents so re-ingestion can invalidate it
+    cache_set_for_documents(
+        cache_key,
+        jsonable_encoder(response_data),
+        [src["document_id"] for src in result.get("sources", []) if src.get("document_id")],
+        ttl=3600,  # 1 hour
+    )
     
     return response_data
 
@@ -1,19 +1,19 @@
 """
 Scraper API routes.
 """
-import asyncio
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, Dict
 
-from scraper.infohub_scraper import InfoHubScraper
+from scraper.jobs import job_store
+from scraper.tasks import celery_app, scrape_url_job
 
 
 router = APIRouter(prefix="/scraper", tags=["Scraper"])
 
-
-# In-memory task storage (in production, use Redis or database)
-scraping_tasks = {}
+# job_store calls Redis synchronously: routes are plain def, so FastAPI runs
+# them in its threadpool instead of blocking the loop serving event streams
 
 
 class ScrapeRequest(BaseModel):
@@ -36,46 +36,32 @@ class TaskStatusResponse(BaseModel):
     status: str
     documents_scraped: Optional[int] = None
     pages_visited: Optional[int] = None
+    pages_not_modified: Optional[int] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
     result: Optional[Dict] = None
     error: Optional[str] = None
 
 
-async def run_scraper_task(task_id: str, url: str, max_depth: int, max_pages: int):
-    """Run scraper task in background."""
-    scraping_tasks[task_id] = {
-        'status': 'running',
-        'documents_scraped': 0,
-        'pages_visited': 0,
-    }
-    
-    try:
-        scraper = InfoHubScraper()
-        result = await scraper.scrape(
-            start_url=str(url),
-            max_depth=max_depth,
-            max_pages=max_pages,
+def get_job(task_id: str) -> Dict:
+    """Job state, or 404."""
+    job = job_store.get(task_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Task {task_id} not found"
         )
-        
-        scraping_tasks[task_id] = {
-            'status': 'completed',
-            'result': result,
-            'documents_scraped': result['documents_scraped'],
-            'pages_visited': result['pages_visited'],
-        }
-    
-    except Exception as e:
-        scraping_tasks[task_id] = {
-            'status': 'failed',
-            'error': str(e),
-        }
+    return job
 
 
 @router.post("/start", response_model=ScrapeResponse)
-async def start_scraping(request: ScrapeRequest, background_tasks: BackgroundTasks):
+def start_scraping(request: ScrapeRequest):
     """
     Start a scraping task.
     
-    The task will run in the background and can be monitored via `/scraper/status/{task_id}`.
+    The task runs on a Celery worker and can be monitored via
+    `/scraper/status/{task_id}` or streamed from `/scraper/status/{task_id}/events`.
     
     - **url**: Starting URL (must be from infohub.ge)
     - **max_depth**: Maximum depth to follow links (1-5)
@@ -88,87 +74,106 @@ async def start_scraping(request: ScrapeRequest, background_tasks: BackgroundTas
             detail="URL must be from infohub.ge domain"
         )
     
-    # Generate task ID
-    import uuid
-    task_id = str(uuid.uuid4())
-    
-    # Start background task
-    background_tasks.add_task(
-        run_scraper_task,
-        task_id,
-        str(request.url),
-        request.max_depth,
-        request.max_pages
-    )
+    task_id = job_store.create({
+        'url': str(request.url),
+        'max_depth': request.max_depth,
+        'max_pages': request.max_pages,
+    })
+    
+    # The Celery task ID is the job ID, so the job can be revoked by it
+    try:
+        scrape_url_job.apply_async(
+            args=(task_id, str(request.url), request.max_depth, request.max_pages),
+            task_id=task_id,
+        )
+    except Exception as e:
+        job_store.update(task_id, 'failed', error=f"Could not queue task: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Task queue unavailable"
+        )
     
     return ScrapeResponse(
         task_id=task_id,
-        status="started",
-        message=f"Scraping task started. Use task_id to check status."
+        status="queued",
+        message=f"Scraping task queued. Use task_id to check status."
     )
 
 
 @router.get("/status/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
+def get_task_status(task_id: str):
     """
     Get the status of a scraping task.
     
     - **task_id**: Task ID returned from `/scraper/start`
     
-    Returns current status and results if completed.
+    Returns current status, progress counters and results if completed.
     """
-    if task_id not in scraping_tasks:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Task {task_id} not found"
-        )
+    return TaskStatusResponse(**get_job(task_id))
+
+
+@router.get("/status/{task_id}/events")
+def stream_task_status(task_id: str):
+    """
+    Stream the status of a scraping task as Server-Sent Events.
     
-    task_data = scraping_tasks[task_id]
+    - **task_id**: Task ID returned from `/scraper/start`
     
-    return TaskStatusResponse(
-        task_id=task_id,
-        status=task_data['status'],
-        documents_scraped=task_data.get('documents_scraped'),
-        pages_visited=task_data.get('pages_visited'),
-        result=task_data.get('result'),
-        error=task_data.get('error'),
+    Sends the task state (as in `/scraper/status/{task_id}`) on every
+    progress update and closes once the task has completed or failed.
+    """
+    get_job(task_id)
+    
+    async def events():
+        async for job in job_store.watch(task_id):
+            data = TaskStatusResponse(**job).model_dump_json()
+            yield f"event: {job['status']}\ndata: {data}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
     )
 
 
 @router.get("/tasks")
-async def list_tasks():
+def list_tasks():
     """
     List all scraping tasks.
     
-    Returns a list of all tasks with their current status.
+    Returns a list of the most recent tasks with their current status.
     """
+    jobs = job_store.list()
     return {
-        'total_tasks': len(scraping_tasks),
+        'total_tasks': len(jobs),
         'tasks': [
             {
-                'task_id': task_id,
-                'status': data['status'],
-                'documents_scraped': data.get('documents_scraped', 0),
+                'task_id': job['task_id'],
+                'status': job['status'],
+                'documents_scraped': job['documents_scraped'],
+                'pages_visited': job['pages_visited'],
+                'created_at': job.get('created_at'),
             }
-            for task_id, data in scraping_tasks.items()
+            for job in jobs
         ]
     }
 
 
 @router.delete("/tasks/{task_id}")
-async def delete_task(task_id: str):
+def delete_task(task_id: str):
     """
     Delete a task from the task list.
     
+    A task that has not finished is revoked first.
+    
     - **task_id**: Task ID to delete
     """
-    if task_id not in scraping_tasks:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Task {task_id} not found"
-        )
+    job = get_job(task_id)
+    
+    if job['status'] in ('queued', 'running'):
+        celery_app.control.revoke(task_id, terminate=job['status'] == 'running')
     
-    del scraping_tasks[task_id]
+    job_store.delete(task_id)
     
     return {
         'message': f'Task {task_id} deleted successfully'
@@ -3,7 +3,14 @@ Core module for configuration, database, and cache management.
 """
 from core.config import settings
 from core.database import SessionLocal, engine
-from core.cache import get_redis, cache_get, cache_set, cache_delete
+from core.cache import (
+    get_redis,
+    cache_get,
+    cache_set,
+    cache_delete,
+    cache_set_for_documents,
+    cache_invalidate_documents,
+)
 
 __all__ = [
     "settings",
@@ -15,4 +22,6 @@ __all__ = [
     "cache_get",
     "cache_set",
     "cache_delete",
+    "cache_set_for_documents",
+    "cache_invalidate_documents",
 ]
@@ -2,7 +2,7 @@
 Redis cache connection and utilities.
 """
 import json
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 import redis
 from redis import Redis
 
@@ -122,6 +122,86 @@ def cache_clear_pattern(pattern: str) -> int:
         return 0
 
 
+def _document_index_key(document_id: str) -> str:
+    """Key of the set of cache keys whose values were built from a document."""
+    return f"cache:doc:{document_id}"
+
+
+def cache_set_for_documents(
+    key: str,
+    value: Any,
+    document_ids: Iterable[str],
+    ttl: Optional[int] = None,
+) -> bool:
+    """
+    Set value in cache and index it under the documents it was built from.
+
+    The entry can then be dropped with cache_invalidate_documents when any
+    of those documents is re-indexed.
+    
+    Args:
+        key: Cache key
+        value: Value to cache
+        document_ids: Source document IDs
+        ttl: Time to live in seconds (optional)
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if not settings.CACHE_ENABLED:
+        return False
+        
+    try:
+        pipe = get_redis().pipeline()
+        serialized = json.dumps(value)
+        if ttl:
+            pipe.setex(key, ttl, serialized)
+        else:
+            pipe.set(key, serialized)
+        for document_id in set(map(str, document_ids)):
+            index_key = _document_index_key(document_id)
+            pipe.sadd(index_key, key)
+            if ttl:
+                # The index only needs to outlive the entries it points to
+                pipe.expire(index_key, ttl)
+        pipe.execute()
+        return True
+    except Exception as e:
+        print(f"Cache set error: {e}")
+        return False
+
+
+def cache_invalidate_documents(document_ids: Iterable[str]) -> int:
+    """
+    Delete all cache entries built from any of the given documents.
+    
+    Args:
+        document_ids: Document IDs whose content changed
+        
+    Returns:
+        Number of cache entries deleted
+    """
+    if not settings.CACHE_ENABLED:
+        return 0
+        
+    try:
+        client = get_redis()
+        index_keys = [_document_index_key(document_id) for document_id in set(map(str, document_ids))]
+        if not index_keys:
+            return 0
+        
+        keys = client.sunion(index_keys)
+        pipe = client.pipeline()
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(*index_keys)
+        results = pipe.execute()
+        return results[0] if keys else 0
+    except Exception as e:
+        print(f"Cache invalidate error: {e}")
+        return 0
+
+
 class Cache:
     """Cache wrapper with async methods for health checks."""
     
@@ -64,6 +64,8 @@ class Settings(BaseSettings):
         env="EMBEDDING_MODEL"
     )
     EMBEDDING_DIMENSION: int = Field(default=768, env="EMBEDDING_DIMENSION")
+    EMBEDDING_RECALL_TOLERANCE: float = Field(default=0.0, env="EMBEDDING_RECALL_TOLERANCE")  # Max recall@k drop allowed when switching versions
+    EMBEDDING_VERSION_CACHE_TTL: int = Field(default=30, env="EMBEDDING_VERSION_CACHE_TTL")  # Seconds before re-reading the active version
     
     # RAG Configuration
     RAG_TOP_K: int = Field(default=10, env="RAG_TOP_K")
@@ -71,6 +73,26 @@ class Settings(BaseSettings):
     RAG_CHUNK_SIZE: int = Field(default=1024, env="RAG_CHUNK_SIZE")
     RAG_CHUNK_OVERLAP: int = Field(default=128, env="RAG_CHUNK_OVERLAP")
     RAG_MIN_SIMILARITY: float = Field(default=0.5, env="RAG_MIN_SIMILARITY")
+    RAG_RETRIEVAL_MODE: str = Field(default="chunk", env="RAG_RETRIEVAL_MODE")
+    RAG_SENTENCE_WINDOW: int = Field(default=3, env="RAG_SENTENCE_WINDOW")
+    RAG_HYBRID_ENABLED: bool = Field(default=True, env="RAG_HYBRID_ENABLED")
+    RAG_HYBRID_WORKERS: int = Field(default=4, env="RAG_HYBRID_WORKERS")
+    RAG_RRF_K: int = Field(default=60, env="RAG_RRF_K")
+    RAG_RERANK_ENABLED: bool = Field(default=True, env="RAG_RERANK_ENABLED")
+    RAG_RERANK_CANDIDATES: int = Field(default=50, env="RAG_RERANK_CANDIDATES")
+    RAG_RERANK_BATCH_SIZE: int = Field(default=16, env="RAG_RERANK_BATCH_SIZE")
+    RAG_RERANK_BUDGET_MS: int = Field(default=400, env="RAG_RERANK_BUDGET_MS")
+    RAG_RERANK_CACHE_SIZE: int = Field(default=10000, env="RAG_RERANK_CACHE_SIZE")
+    RAG_CONTEXT_MAX_TOKENS: int = Field(default=3000, env="RAG_CONTEXT_MAX_TOKENS")
+    RAG_DEDUP_THRESHOLD: float = Field(default=0.8, env="RAG_DEDUP_THRESHOLD")
+    RAG_GRAPH_EXPANSION_ENABLED: bool = Field(default=False, env="RAG_GRAPH_EXPANSION_ENABLED")
+    RAG_GRAPH_SEED_HITS: int = Field(default=5, env="RAG_GRAPH_SEED_HITS")
+    RAG_GRAPH_MAX_NEIGHBORS: int = Field(default=5, env="RAG_GRAPH_MAX_NEIGHBORS")
+    RAG_GRAPH_REFRESH_SECONDS: int = Field(default=300, env="RAG_GRAPH_REFRESH_SECONDS")
+    RERANKER_MODEL: str = Field(
+        default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
+        env="RERANKER_MODEL"
+    )
     
     # Web Scraper
     SCRAPER_USER_AGENT: str = Field(
@@ -80,6 +102,39 @@ class Settings(BaseSettings):
     SCRAPER_DELAY: float = Field(default=2.0, env="SCRAPER_DELAY")
     SCRAPER_CONCURRENT_REQUESTS: int = Field(default=5, env="SCRAPER_CONCURRENT_REQUESTS")
     SCRAPER_RESPECT_ROBOTS_TXT: bool = Field(default=True, env="SCRAPER_RESPECT_ROBOTS_TXT")
+    SCRAPER_ROBOTS_TTL: int = Field(default=3600, env="SCRAPER_ROBOTS_TTL")  # Seconds a fetched robots.txt is cached
+    SCRAPER_AUTOTHROTTLE_ENABLED: bool = Field(default=True, env="SCRAPER_AUTOTHROTTLE_ENABLED")
+    SCRAPER_MAX_REQUESTS_PER_SECOND: float = Field(default=4.0, env="SCRAPER_MAX_REQUESTS_PER_SECOND")  # Per host, when autothrottle ramps up
+    SCRAPER_HTTP_CACHE_ENABLED: bool = Field(default=True, env="SCRAPER_HTTP_CACHE_ENABLED")
+    SCRAPER_HTTP_CACHE_DIR: str = Field(default="./data/http_cache", env="SCRAPER_HTTP_CACHE_DIR")
+    SCRAPER_STATE_PATH: str = Field(default="./data/scraper_state.sqlite", env="SCRAPER_STATE_PATH")  # URLs fetched by incremental crawls
+    SCRAPER_STATE_REVALIDATE_AFTER: int = Field(default=7 * 24 * 3600, env="SCRAPER_STATE_REVALIDATE_AFTER")  # Seconds before a known document page is revalidated
+    SCRAPER_MAX_BACKOFF: float = Field(default=300.0, env="SCRAPER_MAX_BACKOFF")  # Longest pause after a 429/503, in seconds
+    SCRAPER_MAX_CONNECTIONS: int = Field(default=100, env="SCRAPER_MAX_CONNECTIONS")  # Pooled connections across all hosts
+    SCRAPER_DNS_CACHE_TTL: int = Field(default=300, env="SCRAPER_DNS_CACHE_TTL")
+    SCRAPER_CONNECT_TIMEOUT: float = Field(default=10.0, env="SCRAPER_CONNECT_TIMEOUT")
+    SCRAPER_READ_TIMEOUT: float = Field(default=30.0, env="SCRAPER_READ_TIMEOUT")  # Longest wait between two body chunks
+    SCRAPER_MAX_RESPONSE_BYTES: int = Field(default=20 * 1024 * 1024, env="SCRAPER_MAX_RESPONSE_BYTES")
+    SCRAPER_BROWSER_POOL_SIZE: int = Field(default=4, env="SCRAPER_BROWSER_POOL_SIZE")  # Concurrent Playwright pages
+    INFOHUB_API_URL: str = Field(default="https://infohubapi.rs.ge/api", env="INFOHUB_API_URL")  # JSON API behind the InfoHub SPA
+    SCRAPER_JOB_TTL: int = Field(default=7 * 24 * 3600, env="SCRAPER_JOB_TTL")  # Seconds a scraper job's status is kept in Redis
+    SCRAPER_PROGRESS_FLUSH_INTERVAL: float = Field(default=1.0, env="SCRAPER_PROGRESS_FLUSH_INTERVAL")
+    SCRAPER_PIPELINE_BATCH_SIZE: int = Field(default=100, env="SCRAPER_PIPELINE_BATCH_SIZE")  # Scrapy items per database write
+    SCRAPER_PIPELINE_FLUSH_INTERVAL: float = Field(default=5.0, env="SCRAPER_PIPELINE_FLUSH_INTERVAL")
+    
+    # Firecrawl
+    FIRECRAWL_API_URL: str = Field(default="https://api.firecrawl.dev/v2", env="FIRECRAWL_API_URL")
+    FIRECRAWL_CONCURRENCY: int = Field(default=5, env="FIRECRAWL_CONCURRENCY")  # API calls in flight
+    FIRECRAWL_MAX_RETRIES: int = Field(default=3, env="FIRECRAWL_MAX_RETRIES")
+    FIRECRAWL_POLL_INTERVAL: float = Field(default=2.0, env="FIRECRAWL_POLL_INTERVAL")  # Seconds between batch/crawl job polls
+    FIRECRAWL_JOB_TIMEOUT: float = Field(default=900.0, env="FIRECRAWL_JOB_TIMEOUT")
+    
+    # Ingestion Pipeline
+    INGEST_PARSE_WORKERS: Optional[int] = Field(default=None, env="INGEST_PARSE_WORKERS")  # None = CPU count
+    INGEST_QUEUE_SIZE: int = Field(default=64, env="INGEST_QUEUE_SIZE")
+    INGEST_EMBED_BATCH_SIZE: int = Field(default=128, env="INGEST_EMBED_BATCH_SIZE")
+    INGEST_WRITE_BATCH_SIZE: int = Field(default=50, env="INGEST_WRITE_BATCH_SIZE")
+    INGEST_SHARD_SIZE: int = Field(default=200, env="INGEST_SHARD_SIZE")  # Documents per Celery subtask
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
@@ -104,6 +159,14 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
     
+    @validator("RAG_RETRIEVAL_MODE")
+    def validate_retrieval_mode(cls, v):
+        """Validate retrieval mode."""
+        allowed = ["chunk", "small_to_big"]
+        if v not in allowed:
+            raise ValueError(f"RAG_RETRIEVAL_MODE must be one of {allowed}")
+        return v
+    
     @validator("LLM_PROVIDER")
     def validate_llm_provider(cls, v):
         """Validate LLM provider."""
@@ -1,7 +1,13 @@
 """
 SQLAlchemy models.
 """
-from models.document import Document, DocumentChunk, DocumentRelation
+from models.document import (
+    Document,
+    DocumentChunk,
+    DocumentRelation,
+    EmbeddingVersion,
+    ChunkEmbedding,
+)
 from models.user import User
 from models.conversation import Conversation, Message
 
@@ -9,6 +15,8 @@ __all__ = [
     "Document",
     "DocumentChunk",
     "DocumentRelation",
+    "EmbeddingVersion",
+    "ChunkEmbedding",
     "User",
     "Conversation",
     "Message",
@@ -16,6 +16,7 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     Boolean,
+    Float,
     Index,
 )
 from sqlalchemy.dialects.postgresql import UUID
@@ -56,6 +57,8 @@ Index("idx_documents_category", Document.category)
 Index("idx_documents_date", Document.date_published)
 Index("idx_documents_language", Document.language)
 Index("idx_documents_status", Document.status)
+# Upserts by URL (INSERT ... ON CONFLICT (source_url)) rely on it
+Index("idx_documents_source_url", Document.source_url, unique=True)
 
 
 class DocumentChunk(Base):
@@ -79,6 +82,45 @@ class DocumentChunk(Base):
 Index("idx_chunks_document", DocumentChunk.document_id)
 
 
+class EmbeddingVersion(Base):
+    __tablename__ = "embedding_versions"
+
+    model_version = Column(String(100), primary_key=True)
+    model_name = Column(String, nullable=False)
+    dimension = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="building")  # building | active | retired
+    recall = Column(Float, nullable=True)  # recall@k of the last comparison run
+    baseline_recall = Column(Float, nullable=True)  # recall@k of the serving version in that run
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    activated_at = Column(DateTime, nullable=True)
+
+
+# At most one version serves queries
+Index(
+    "idx_embedding_versions_active",
+    EmbeddingVersion.status,
+    unique=True,
+    postgresql_where=EmbeddingVersion.status == "active",
+)
+
+
+class ChunkEmbedding(Base):
+    __tablename__ = "chunk_embeddings"
+
+    chunk_id = Column(UUID(as_uuid=True), ForeignKey("document_chunks.id", ondelete="CASCADE"), primary_key=True)
+    model_version = Column(
+        String(100),
+        ForeignKey("embedding_versions.model_version", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    embedding = Column(Vector(), nullable=False)  # dimension is set per version
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+Index("idx_chunk_embeddings_version", ChunkEmbedding.model_version)
+
+
 class DocumentRelation(Base):
     __tablename__ = "document_relations"
 
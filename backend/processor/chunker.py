@@ -1,10 +1,19 @@
 """
 Text chunking utilities for document processing.
 """
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 import re
 
 from core.config import settings
+from processor.tokenizer import token_counter as default_token_counter
+
+
+# Sentence: text up to terminal punctuation or a line break
+_SENTENCE_PATTERN = re.compile(r'[^\s].*?(?:[.!?]+(?=\s|$)|(?=\n)|$)', re.DOTALL)
+
+# Sentences sent to the tokenizer per call
+_COUNT_BATCH_SIZE = 256
 
 
 class TextChunker:
@@ -14,6 +23,7 @@ class TextChunker:
         self,
         chunk_size: int = None,
         chunk_overlap: int = None,
+        token_counter=None,
     ):
         """
         Initialize text chunker.
@@ -21,9 +31,12 @@ class TextChunker:
         Args:
             chunk_size: Size of each chunk in tokens (default from settings)
             chunk_overlap: Overlap between chunks in tokens (default from settings)
+            token_counter: Object with count_batch(texts) -> List[int]
+                (default: embedding model tokenizer)
         """
         self.chunk_size = chunk_size or settings.RAG_CHUNK_SIZE
-        self.chunk_overlap = chunk_overlap or settings.RAG_CHUNK_OVERLAP
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.RAG_CHUNK_OVERLAP
+        self.token_counter = token_counter or default_token_counter
 
     def chunk_text(self, text: str, metadata: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
@@ -36,98 +49,217 @@ class TextChunker:
         Returns:
             List of chunk dictionaries
         """
+        return list(self.iter_chunks(text, metadata))
+
+    def iter_chunks(self, text: str, metadata: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily chunk text in a single pass over sentence offsets.
+
+        Chunks are cut at sentence boundaries and sliced once from the
+        source text; consecutive chunks share trailing sentences worth up to
+        chunk_overlap tokens. Only the current window and one tokenizer batch
+        are held in memory, so very large documents stream in bounded memory.
+
+        Args:
+            text: Text to chunk
+            metadata: Optional metadata to attach to each chunk
+
+        Yields:
+            Chunk dictionaries with start_position/end_position into text
+        """
         if not text or not text.strip():
-            return []
+            return
 
-        # Split by paragraphs first
-        paragraphs = self._split_paragraphs(text)
+        yield from self._pack_units(text, self._counted_units(text), metadata)
 
-        chunks = []
-        current_chunk = ""
-        current_tokens = 0
-
-        for para in paragraphs:
-            para_tokens = self._estimate_tokens(para)
-
-            # If paragraph itself is too large, split it
-            if para_tokens > self.chunk_size:
-                # Save current chunk if not empty
-                if current_chunk:
-                    chunks.append(self._create_chunk(current_chunk, len(chunks), metadata))
-                    current_chunk = ""
-                    current_tokens = 0
-
-                # Split large paragraph into sentences
-                sentences = self._split_sentences(para)
-                for sent in sentences:
-                    sent_tokens = self._estimate_tokens(sent)
-                    
-                    if current_tokens + sent_tokens > self.chunk_size and current_chunk:
-                        chunks.append(self._create_chunk(current_chunk, len(chunks), metadata))
-                        # Keep overlap
-                        current_chunk = current_chunk[-self.chunk_overlap:] + " " + sent
-                        current_tokens = self._estimate_tokens(current_chunk)
-                    else:
-                        current_chunk += " " + sent if current_chunk else sent
-                        current_tokens += sent_tokens
-            else:
-                # Add paragraph to current chunk
-                if current_tokens + para_tokens > self.chunk_size and current_chunk:
-                    chunks.append(self._create_chunk(current_chunk, len(chunks), metadata))
-                    # Keep overlap
-                    current_chunk = current_chunk[-self.chunk_overlap:] + " " + para
-                    current_tokens = self._estimate_tokens(current_chunk)
-                else:
-                    current_chunk += "\n\n" + para if current_chunk else para
-                    current_tokens += para_tokens
-
-        # Add remaining chunk
-        if current_chunk.strip():
-            chunks.append(self._create_chunk(current_chunk, len(chunks), metadata))
+    def _pack_units(
+        self,
+        text: str,
+        units: Iterable[Tuple[int, int, int]],
+        metadata: Dict[str, Any] = None,
+        start_index: int = 0,
+        overlap: int = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Pack consecutive (start, end, tokens) units into chunks.
 
-        return chunks
+        Args:
+            text: Source text the unit offsets point into
+            units: Units in text order, each no larger than chunk_size
+            metadata: Optional metadata to attach to each chunk
+            start_index: chunk_index of the first chunk
+            overlap: Overlap in tokens (default: chunk_overlap)
 
-    def _split_paragraphs(self, text: str) -> List[str]:
-        """Split text into paragraphs."""
-        # Split by double newlines or multiple newlines
-        paragraphs = re.split(r'\n\s*\n', text)
-        return [p.strip() for p in paragraphs if p.strip()]
+        Yields:
+            Chunk dictionaries
+        """
+        overlap = self.chunk_overlap if overlap is None else overlap
+        window: deque = deque()
+        window_tokens = 0
+        index = start_index
 
-    def _split_sentences(self, text: str) -> List[str]:
-        """Split text into sentences."""
-        # Simple sentence splitter (can be improved)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        for start, end, tokens in units:
+            if window and window_tokens + tokens > self.chunk_size:
+                yield self._create_chunk(text, window[0][0], window[-1][1], index, window_tokens, metadata)
+                index += 1
 
-    def _estimate_tokens(self, text: str) -> int:
+                # Keep trailing units worth up to `overlap` tokens
+                while window and (
+                    window_tokens > overlap
+                    or window_tokens + tokens > self.chunk_size
+                ):
+                    window_tokens -= window.popleft()[2]
+
+            window.append((start, end, tokens))
+            window_tokens += tokens
+
+        if window:
+            yield self._create_chunk(text, window[0][0], window[-1][1], index, window_tokens, metadata)
+
+    def chunk_sentence_windows(
+        self,
+        text: str,
+        metadata: Dict[str, Any] = None,
+        window_size: int = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Estimate token count (rough approximation).
+        Chunk text into small sentence windows for small-to-big retrieval.
+
+        Sentences are grouped into parent sections of up to chunk_size
+        tokens; each parent is cut into windows of window_size sentences.
+        Every window records its own offsets and its parent's offsets in
+        the source text, so the parent section can be returned at context
+        time without another lookup.
 
         Args:
-            text: Text to estimate
+            text: Text to chunk
+            metadata: Optional metadata to attach to each chunk
+            window_size: Sentences per window (default from settings)
 
         Returns:
-            Estimated token count
+            List of window chunk dictionaries
         """
-        # Rough estimation: 1 token ≈ 4 characters for multilingual text
-        return len(text) // 4
+        if not text or not text.strip():
+            return []
+
+        window_size = window_size or settings.RAG_SENTENCE_WINDOW
+        chunks = []
+
+        for parent_index, sentences in enumerate(self._parent_sections(text)):
+            parent_start, parent_end = sentences[0][0], sentences[-1][1]
+
+            for i in range(0, len(sentences), window_size):
+                window = sentences[i:i + window_size]
+                chunks.append(self._create_chunk(
+                    text,
+                    window[0][0],
+                    window[-1][1],
+                    len(chunks),
+                    sum(tokens for _, _, tokens in window),
+                    {
+                        **(metadata or {}),
+                        "level": "sentence_window",
+                        "parent_index": parent_index,
+                        "parent_start": parent_start,
+                        "parent_end": parent_end,
+                    },
+                ))
 
-    def _create_chunk(self, content: str, index: int, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        return chunks
+
+    def _parent_sections(self, text: str) -> Iterator[List[Tuple[int, int, int]]]:
+        """Group sentence units into sections of up to chunk_size tokens."""
+        section: List[Tuple[int, int, int]] = []
+        section_tokens = 0
+
+        for start, end, tokens in self._counted_units(text):
+            if section and section_tokens + tokens > self.chunk_size:
+                yield section
+                section, section_tokens = [], 0
+            section.append((start, end, tokens))
+            section_tokens += tokens
+
+        if section:
+            yield section
+
+    def _counted_units(self, text: str, start: int = 0, end: int = None) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, tokens) for each sentence, counting in batches.
+
+        Sentences longer than chunk_size tokens are cut into equal
+        character pieces that each fit.
+
+        Args:
+            text: Source text
+            start: Offset where the scanned region begins
+            end: Offset where the scanned region ends (default: end of text)
+        """
+        batch: List[Tuple[int, int]] = []
+
+        for span in self._sentence_spans(text, start, end):
+            batch.append(span)
+            if len(batch) >= _COUNT_BATCH_SIZE:
+                yield from self._count_batch(text, batch)
+                batch = []
+
+        if batch:
+            yield from self._count_batch(text, batch)
+
+    def _count_batch(self, text: str, spans: List[Tuple[int, int]]) -> Iterator[Tuple[int, int, int]]:
+        """Count tokens for a batch of spans and split oversized ones."""
+        counts = self.token_counter.count_batch([text[start:end] for start, end in spans])
+
+        for (start, end), tokens in zip(spans, counts):
+            if tokens <= self.chunk_size:
+                yield start, end, tokens
+                continue
+
+            pieces = -(-tokens // self.chunk_size)
+            piece_chars = -(-(end - start) // pieces)
+            for piece_start in range(start, end, piece_chars):
+                piece_end = min(piece_start + piece_chars, end)
+                yield piece_start, piece_end, -(-tokens * (piece_end - piece_start) // (end - start))
+
+    def _sentence_spans(self, text: str, start: int = 0, end: int = None) -> Iterator[Tuple[int, int]]:
+        """Yield (start, end) offsets of sentences in text[start:end]."""
+        end = len(text) if end is None else end
+        for match in _SENTENCE_PATTERN.finditer(text, start, end):
+            sentence_start, sentence_end = match.span()
+            # Trim trailing whitespace so offsets cover the sentence only
+            while sentence_end > sentence_start and text[sentence_end - 1].isspace():
+                sentence_end -= 1
+            if sentence_end > sentence_start:
+                yield sentence_start, sentence_end
+
+    def _create_chunk(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        index: int,
+        tokens_count: int,
+        metadata: Dict[str, Any] = None,
+    ) -> Dict[str, Any]:
         """
         Create chunk dictionary.
 
         Args:
-            content: Chunk content
+            text: Source text
+            start: Chunk start offset in text
+            end: Chunk end offset in text
             index: Chunk index
+            tokens_count: Token count of the chunk
             metadata: Optional metadata
 
         Returns:
             Chunk dictionary
         """
         return {
-            "content": content.strip(),
+            "content": text[start:end],
             "chunk_index": index,
-            "tokens_count": self._estimate_tokens(content),
+            "tokens_count": tokens_count,
+            "start_position": start,
+            "end_position": end,
             "metadata": metadata or {},
         }
 
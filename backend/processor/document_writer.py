@@ -0,0 +1,270 @@
+"""
+Bulk persistence of documents, chunks and their embeddings.
+"""
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Callable
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from core.cache import cache_invalidate_documents
+from models.document import Document, DocumentChunk
+from processor.legal_chunker import legal_chunker
+
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(content: str) -> str:
+    """Content hash used to match chunks across re-ingestions."""
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+class DocumentWriter:
+    """
+    Write documents together with all their chunks in one transaction.
+
+    Chunk ids are generated client-side, so no per-chunk flush is needed to
+    learn them; all chunk rows, embeddings included, go to the database as
+    one executemany INSERT, which SQLAlchemy sends as multi-row
+    INSERT ... VALUES batches. The active embedding version's vectors of
+    new chunks are written in the same transaction.
+    """
+
+    def chunk_rows(
+        self,
+        document_id: UUID,
+        chunks: List[Dict[str, Any]],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        total_chunks: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Build DocumentChunk rows for a document.
+
+        Args:
+            document_id: Owning document ID
+            chunks: Chunk dictionaries from the chunker
+            embeddings: One vector per chunk, or None to use each chunk's
+                'embedding' key (if any)
+            total_chunks: Chunk count of the whole document (default: len(chunks))
+
+        Returns:
+            Row dictionaries keyed by DocumentChunk attribute names
+        """
+        total = total_chunks if total_chunks is not None else len(chunks)
+        rows = []
+
+        for i, chunk in enumerate(chunks):
+            rows.append({
+                'id': chunk.get('id') or uuid4(),
+                'document_id': document_id,
+                **self._position_fields(chunk, chunk.get('chunk_index', i), total),
+                'content': chunk['content'],
+                'embedding': embeddings[i] if embeddings is not None else chunk.get('embedding'),
+            })
+
+        return rows
+
+    @staticmethod
+    def _position_fields(chunk: Dict[str, Any], index: int, total: int) -> Dict[str, Any]:
+        """Columns that change when a chunk moves within its document."""
+        return {
+            'chunk_index': index,
+            'tokens_count': chunk.get('tokens_count'),
+            'start_position': chunk.get('start_position'),
+            'end_position': chunk.get('end_position'),
+            'metadata_json': {
+                'position': index,
+                'total_chunks': total,
+                'content_hash': chunk_hash(chunk['content']),
+                **chunk.get('metadata', {}),
+            },
+        }
+
+    @staticmethod
+    def _write_active_version(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Write the active embedding version's vectors of new chunk rows."""
+        # Imported here: the rag package imports processor modules
+        from rag.embedding_versions import embedding_versions
+
+        embedding_versions.write_active(db, rows)
+
+    def write(
+        self,
+        db: Session,
+        document: Document,
+        chunks: List[Dict[str, Any]],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+    ) -> Document:
+        """
+        Insert one document with its chunks and commit.
+
+        Args:
+            db: Database session
+            document: New Document (not yet added to the session)
+            chunks: Chunk dictionaries from the chunker
+            embeddings: One vector per chunk (optional)
+
+        Returns:
+            The stored document
+        """
+        self.write_many(db, [(document, chunks, embeddings)])
+        return document
+
+    def write_many(
+        self,
+        db: Session,
+        items: List[Tuple[Document, List[Dict[str, Any]], Optional[Sequence[Sequence[float]]]]],
+        commit: bool = True,
+    ) -> List[Document]:
+        """
+        Insert several documents with their chunks in a single transaction.
+
+        Args:
+            db: Database session
+            items: (document, chunks, embeddings) tuples
+            commit: Commit the transaction; when False the rows are only
+                sent, and the caller commits (or rolls back) its transaction
+
+        Returns:
+            The stored documents
+        """
+        if not items:
+            return []
+
+        try:
+            rows = []
+            for document, chunks, embeddings in items:
+                if document.id is None:
+                    document.id = uuid4()
+                db.add(document)
+                rows.extend(self.chunk_rows(document.id, chunks, embeddings))
+
+            # Documents first (one INSERT each), then every chunk in one executemany
+            db.flush()
+            if rows:
+                db.execute(insert(DocumentChunk), rows)
+                self._write_active_version(db, rows)
+            if commit:
+                db.commit()
+
+            logger.info(f"Stored {len(items)} documents with {len(rows)} chunks")
+            return [document for document, _, _ in items]
+
+        except Exception:
+            db.rollback()
+            raise
+
+    def update(
+        self,
+        db: Session,
+        document: Document,
+        chunks: List[Dict[str, Any]],
+        encode: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        commit: bool = True,
+    ) -> Dict[str, int]:
+        """
+        Re-index a changed document by diffing chunk content hashes.
+
+        Stored chunks whose content still appears are kept with their
+        embeddings (only their position is updated); chunks that no longer
+        appear are deleted, and only genuinely new chunks are inserted and
+        embedded. Document fields set by the caller (full_text, file_hash)
+        are committed in the same transaction, after which cached answers
+        citing the document are invalidated.
+
+        Args:
+            db: Database session
+            document: Stored document, already updated with the new text
+            chunks: Chunk dictionaries for the new text
+            encode: Function embedding a list of texts; chunks without an
+                'embedding' key are stored unembedded when None
+            commit: Commit and invalidate cached answers; when False the
+                changes are only sent, and the caller commits and then calls
+                cache_invalidate_documents
+
+        Returns:
+            Counts of 'kept', 'inserted' and 'deleted' chunks
+        """
+        try:
+            stored: Dict[str, List[UUID]] = {}
+            for chunk_id, content, metadata in db.query(
+                DocumentChunk.id,
+                DocumentChunk.content,
+                DocumentChunk.metadata_json,
+            ).filter(DocumentChunk.document_id == document.id):
+                content_hash = (metadata or {}).get('content_hash') or chunk_hash(content)
+                stored.setdefault(content_hash, []).append(chunk_id)
+
+            total = len(chunks)
+            kept_rows, new_chunks = [], []
+            for i, chunk in enumerate(chunks):
+                matches = stored.get(chunk_hash(chunk['content']))
+                if matches:
+                    kept_rows.append({'id': matches.pop(0), **self._position_fields(chunk, i, total)})
+                else:
+                    new_chunks.append({**chunk, 'chunk_index': i})
+
+            deleted_ids = [chunk_id for ids in stored.values() for chunk_id in ids]
+
+            embeddings = None
+            if encode and new_chunks and not all('embedding' in chunk for chunk in new_chunks):
+                embeddings = encode([chunk['content'] for chunk in new_chunks])
+
+            if deleted_ids:
+                db.query(DocumentChunk).filter(
+                    DocumentChunk.id.in_(deleted_ids)
+                ).delete(synchronize_session=False)
+            if kept_rows:
+                db.execute(update(DocumentChunk), kept_rows)
+            if new_chunks:
+                rows = self.chunk_rows(document.id, new_chunks, embeddings, total)
+                db.execute(insert(DocumentChunk), rows)
+                self._write_active_version(db, rows)
+            if commit:
+                db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+
+        if commit:
+            cache_invalidate_documents([str(document.id)])
+
+        result = {'kept': len(kept_rows), 'inserted': len(new_chunks), 'deleted': len(deleted_ids)}
+        logger.info(
+            f"Re-indexed {document.source_url}: {result['kept']} chunks kept, "
+            f"{result['inserted']} inserted, {result['deleted']} deleted"
+        )
+        return result
+
+    def reindex(
+        self,
+        db: Session,
+        document: Document,
+        full_text: str,
+        file_hash: str,
+        encode: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    ) -> Dict[str, int]:
+        """
+        Store new text for a document and incrementally update its chunks.
+
+        Args:
+            db: Database session
+            document: Stored document
+            full_text: New document text
+            file_hash: Hash of the new text
+            encode: Function embedding a list of texts (optional)
+
+        Returns:
+            Counts of 'kept', 'inserted' and 'deleted' chunks
+        """
+        document.full_text = full_text
+        document.file_hash = file_hash
+        return self.update(db, document, legal_chunker.chunk_text(full_text), encode)
+
+
+# Global document writer instance
+document_writer = DocumentWriter()
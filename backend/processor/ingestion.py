@@ -0,0 +1,532 @@
+"""
+Staged document ingestion pipeline: parse → chunk → embed → store.
+"""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional, Iterable, AsyncIterable, Union
+
+from bs4 import BeautifulSoup
+
+from core.cache import cache_invalidate_documents
+from core.config import settings
+from core.database import SessionLocal
+from models.document import Document, DocumentChunk
+from processor.document_writer import chunk_hash, document_writer
+from processor.legal_chunker import legal_chunker
+
+
+logger = logging.getLogger(__name__)
+
+
+# Documents shorter than this are navigation/listing pages, not content
+MIN_CONTENT_LENGTH = 100
+
+_NOISE_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside']
+_CONTENT_SELECTORS = ['article', 'main', '.content', '#content', '.post-content']
+
+# Optional Document columns a raw document may carry as-is
+DOCUMENT_FIELDS = ('document_number', 'date_published', 'date_effective', 'category', 'authority')
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+def extract_main_text(soup: BeautifulSoup) -> str:
+    """
+    Extract the main text content of a page.
+
+    Args:
+        soup: BeautifulSoup object (modified in place)
+
+    Returns:
+        Text with one non-empty line per block
+    """
+    for tag in soup(_NOISE_TAGS):
+        tag.decompose()
+
+    content = None
+    for selector in _CONTENT_SELECTORS:
+        content = soup.select_one(selector)
+        if content:
+            break
+
+    if not content:
+        content = soup.find('body')
+
+    if not content:
+        return ""
+
+    lines = (line.strip() for line in content.get_text(separator='\n').split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def detect_language(text: str) -> str:
+    """Detect language of text: 'ka', 'ru' or 'en'."""
+    if re.search(r'[\u10A0-\u10FF]', text):
+        return 'ka'
+    if re.search(r'[\u0400-\u04FF]', text):
+        return 'ru'
+    return 'en'
+
+
+def parse_and_chunk(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a raw scraped document and chunk it.
+
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        item: Raw document with 'url' and either 'html' or 'text', plus
+            optional 'title', 'document_type', 'language', 'metadata' and
+            any of DOCUMENT_FIELDS
+
+    Returns:
+        Parsed document with 'full_text', 'file_hash' and 'chunks', or None
+        if the content is too short to index
+    """
+    title = item.get('title')
+
+    if item.get('html') is not None:
+        soup = BeautifulSoup(item['html'], 'html.parser')
+        if not title:
+            title_tag = soup.find('h1') or soup.find('title')
+            if title_tag:
+                title = title_tag.get_text().strip()
+        text = extract_main_text(soup)
+    else:
+        text = item.get('text') or ""
+
+    if len(text) < MIN_CONTENT_LENGTH:
+        return None
+
+    metadata = item.get('metadata') or {}
+
+    return {
+        'url': item['url'],
+        'title': (title or 'Untitled')[:500],
+        'document_type': item.get('document_type', 'guideline'),
+        'language': item.get('language') or detect_language(text),
+        'full_text': text,
+        'file_hash': hashlib.md5(text.encode()).hexdigest(),
+        'metadata': metadata,
+        'fields': {key: item[key] for key in DOCUMENT_FIELDS if item.get(key) is not None},
+        'chunks': legal_chunker.chunk_text(text),
+    }
+
+
+class StageStats:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """Summarize the stage over the pipeline's wall-clock time."""
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 2),
+            'items_per_second': round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class IngestionPipeline:
+    """
+    Ingest scraped documents through bounded, concurrently running stages.
+
+    - parse: BeautifulSoup parsing and legal-structure chunking in a
+      process pool (one in-flight document per worker process)
+    - embed: a single stage that encodes chunks of many documents per batch;
+      chunks already stored for the document's URL are not re-encoded
+    - store: bulk inserts of documents and chunks, one transaction per batch
+
+    Queues between stages are bounded, so a fast producer (scraper) waits
+    instead of buffering the whole crawl in memory.
+
+    Usage:
+        pipeline = IngestionPipeline()
+        await pipeline.start()
+        await pipeline.submit({'url': url, 'html': html})
+        report = await pipeline.close()
+
+    or simply `report = await pipeline.run(documents)`.
+    """
+
+    def __init__(
+        self,
+        parse_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
+        write_batch_size: Optional[int] = None,
+        embedder=None,
+        on_processed: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize ingestion pipeline.
+
+        Args:
+            parse_workers: Parse/chunk processes (default from settings, else CPU count)
+            queue_size: Capacity of each inter-stage queue (default from settings)
+            embed_batch_size: Chunks per embedding call (default from settings)
+            write_batch_size: Documents per database transaction (default from settings)
+            embedder: Object with encode(texts, batch_size) and a 'model'
+                attribute (default: global embeddings generator)
+            on_processed: Called with the URL of each document once it is
+                stored, found unchanged, or skipped as too short; not called
+                for documents that failed to parse or store
+        """
+        self.parse_workers = parse_workers or settings.INGEST_PARSE_WORKERS or os.cpu_count() or 1
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self.embed_batch_size = embed_batch_size or settings.INGEST_EMBED_BATCH_SIZE
+        self.write_batch_size = write_batch_size or settings.INGEST_WRITE_BATCH_SIZE
+
+        if embedder is None:
+            # Imported lazily: loading the model is not needed in parse workers
+            from rag.embeddings import embeddings_generator
+            embedder = embeddings_generator
+        self.embedder = embedder
+        self.on_processed = on_processed
+
+        self.stats = {name: StageStats(name) for name in ('parse', 'embed', 'store')}
+        self.document_ids: List[str] = []
+        self.skipped = 0
+        self.updated = 0
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._started_at: Optional[float] = None
+
+    async def start(self) -> None:
+        """Start the process pool and stage tasks."""
+        # spawn: forking a process that holds torch/tokenizer threads can deadlock
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        self._input = asyncio.Queue(maxsize=self.queue_size)
+        self._parsed = asyncio.Queue(maxsize=self.queue_size)
+        self._embedded = asyncio.Queue(maxsize=self.queue_size)
+        self._started_at = time.perf_counter()
+
+        parsers = [asyncio.create_task(self._parse_worker()) for _ in range(self.parse_workers)]
+        self._tasks = [
+            asyncio.create_task(self._close_after(parsers, self._parsed)),
+            asyncio.create_task(self._embed_stage()),
+            asyncio.create_task(self._store_stage()),
+            *parsers,
+        ]
+        logger.info(f"Ingestion pipeline started with {self.parse_workers} parse workers")
+
+    async def submit(self, item: Dict[str, Any]) -> None:
+        """
+        Queue a raw document; waits while the pipeline is saturated.
+
+        Args:
+            item: Raw document (see parse_and_chunk)
+        """
+        await self._input.put(item)
+
+    async def close(self) -> Dict[str, Any]:
+        """
+        Drain all stages, stop workers and return the throughput report.
+
+        Returns:
+            Report with stored/skipped counts and per-stage throughput
+        """
+        for _ in range(self.parse_workers):
+            await self._input.put(_DONE)
+
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            self._pool.shutdown()
+
+        report = self.report()
+        for name, stage in report['stages'].items():
+            logger.info(
+                f"Stage {name}: {stage['items']} items, {stage['items_per_second']}/s, "
+                f"busy {stage['busy_seconds']}s, {stage['errors']} errors"
+            )
+        return report
+
+    async def run(self, documents: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Ingest documents from any (async) iterable of raw documents.
+
+        Args:
+            documents: Raw documents (see parse_and_chunk)
+
+        Returns:
+            Throughput report (see close)
+        """
+        await self.start()
+        try:
+            if hasattr(documents, '__aiter__'):
+                async for item in documents:
+                    await self.submit(item)
+            else:
+                for item in documents:
+                    await self.submit(item)
+        finally:
+            report = await self.close()
+        return report
+
+    def report(self) -> Dict[str, Any]:
+        """Current counters and per-stage throughput."""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            'documents_stored': len(self.document_ids),
+            'documents_updated': self.updated,
+            'documents_skipped': self.skipped,
+            'elapsed_seconds': round(elapsed, 2),
+            'stages': {name: stage.report(elapsed) for name, stage in self.stats.items()},
+        }
+
+    async def _close_after(self, tasks: List[asyncio.Task], queue: asyncio.Queue) -> None:
+        """Signal the next stage once all workers of a stage are done."""
+        await asyncio.gather(*tasks)
+        await queue.put(_DONE)
+
+    async def _parse_worker(self) -> None:
+        """Send raw documents to the process pool for parsing and chunking."""
+        loop = asyncio.get_running_loop()
+        stats = self.stats['parse']
+
+        while True:
+            item = await self._input.get()
+            if item is _DONE:
+                return
+
+            started = time.perf_counter()
+            try:
+                parsed = await loop.run_in_executor(self._pool, parse_and_chunk, item)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Error parsing {item.get('url')}: {e}")
+                continue
+            finally:
+                stats.busy_seconds += time.perf_counter() - started
+
+            stats.items += 1
+            if parsed is None:
+                self.skipped += 1
+                self._processed(item.get('url'))
+                continue
+            await self._parsed.put(parsed)
+
+    async def _embed_stage(self) -> None:
+        """Encode chunks of many documents per model call."""
+        batch: List[Dict[str, Any]] = []
+        batch_chunks = 0
+
+        while True:
+            document = await self._parsed.get()
+            if document is _DONE:
+                break
+
+            batch.append(document)
+            batch_chunks += len(document['chunks'])
+
+            # Flush when the batch is full or no more parsed input is ready
+            if batch_chunks >= self.embed_batch_size or self._parsed.empty():
+                await self._embed_batch(batch)
+                batch, batch_chunks = [], 0
+
+        if batch:
+            await self._embed_batch(batch)
+        await self._embedded.put(_DONE)
+
+    async def _embed_batch(self, documents: List[Dict[str, Any]]) -> None:
+        """
+        Attach embeddings to the chunks of a batch of documents.
+
+        Unchanged documents (same file_hash as stored) are not embedded at
+        all, and of changed ones only the chunks whose content is not stored
+        yet: the writer keeps the stored chunks with their embeddings.
+        """
+        stats = self.stats['embed']
+
+        started = time.perf_counter()
+        chunks: List[Dict[str, Any]] = []
+        if self.embedder.model:
+            try:
+                stored = await asyncio.to_thread(self._stored_content, documents)
+            except Exception as e:
+                logger.warning(f"Could not look up stored documents, embedding all chunks: {e}")
+                stored = {}
+
+            for document in documents:
+                known = stored.get(document['url'], set())
+                if known is not None:
+                    chunks.extend(chunk for chunk in document['chunks'] if chunk_hash(chunk['content']) not in known)
+
+        if chunks:
+            try:
+                embeddings = await asyncio.to_thread(
+                    self.embedder.encode,
+                    [chunk['content'] for chunk in chunks],
+                    self.embed_batch_size,
+                )
+                for chunk, embedding in zip(chunks, embeddings):
+                    chunk['embedding'] = embedding
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Error embedding batch of {len(chunks)} chunks: {e}")
+        stats.busy_seconds += time.perf_counter() - started
+        stats.items += len(chunks)
+
+        for document in documents:
+            await self._embedded.put(document)
+
+    def _stored_content(self, documents: List[Dict[str, Any]]) -> Dict[str, Optional[set]]:
+        """
+        Look up what is already stored for a batch of parsed documents.
+
+        Returns:
+            For each stored URL, None if its text is unchanged, else the
+            content hashes of its stored chunks
+        """
+        file_hashes = {document['url']: document['file_hash'] for document in documents}
+        db = SessionLocal()
+        try:
+            stored: Dict[str, Optional[set]] = {}
+            changed = {}
+            for document_id, url, file_hash in db.query(
+                Document.id, Document.source_url, Document.file_hash
+            ).filter(Document.source_url.in_(list(file_hashes))):
+                if file_hash == file_hashes[url]:
+                    stored[url] = None
+                else:
+                    stored[url] = set()
+                    changed[document_id] = url
+
+            if changed:
+                for document_id, content, metadata in db.query(
+                    DocumentChunk.document_id,
+                    DocumentChunk.content,
+                    DocumentChunk.metadata_json,
+                ).filter(DocumentChunk.document_id.in_(list(changed))):
+                    stored[changed[document_id]].add((metadata or {}).get('content_hash') or chunk_hash(content))
+            return stored
+
+        finally:
+            db.close()
+
+    async def _store_stage(self) -> None:
+        """Write embedded documents in batches."""
+        batch: List[Dict[str, Any]] = []
+
+        while True:
+            document = await self._embedded.get()
+            if document is _DONE:
+                break
+
+            batch.append(document)
+            if len(batch) >= self.write_batch_size or self._embedded.empty():
+                await self._store_batch(batch)
+                batch = []
+
+        if batch:
+            await self._store_batch(batch)
+
+    async def _store_batch(self, documents: List[Dict[str, Any]]) -> None:
+        """Insert a batch of documents and their chunks off the event loop."""
+        stats = self.stats['store']
+        started = time.perf_counter()
+        try:
+            stored = await asyncio.to_thread(self._write_documents, documents)
+            stats.items += len(stored)
+            self.skipped += len(documents) - len(stored)
+            self.document_ids.extend(stored)
+        except Exception as e:
+            stats.errors += 1
+            logger.error(f"Error storing batch of {len(documents)} documents: {e}")
+            return
+        finally:
+            stats.busy_seconds += time.perf_counter() - started
+
+        for document in documents:
+            self._processed(document['url'])
+
+    def _processed(self, url: Optional[str]) -> None:
+        """Report a document that needs no further processing."""
+        if self.on_processed and url:
+            self.on_processed(url)
+
+    def _write_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insert new documents and all their chunks in one transaction.
+
+        Documents whose source_url is already stored are skipped when their
+        content hash is unchanged and re-indexed chunk by chunk otherwise.
+        The whole batch commits once; cached answers citing re-indexed
+        documents are invalidated after that commit.
+
+        Returns:
+            IDs of inserted or updated documents
+        """
+        db = SessionLocal()
+        try:
+            urls = [document['url'] for document in documents]
+            existing = {
+                document.source_url: document for document in
+                db.query(Document).filter(Document.source_url.in_(urls))
+            }
+
+            items, updated, seen = [], [], set()
+            for document in documents:
+                if document['url'] in seen:
+                    continue
+                seen.add(document['url'])
+
+                stored = existing.get(document['url'])
+                if stored is not None:
+                    if stored.file_hash != document['file_hash']:
+                        stored.full_text = document['full_text']
+                        stored.file_hash = document['file_hash']
+                        # The embed stage embedded the chunks not stored yet; only those are inserted
+                        document_writer.update(db, stored, document['chunks'], commit=False)
+                        updated.append(str(stored.id))
+                    continue
+
+                items.append((
+                    Document(
+                        title=document['title'],
+                        document_type=document['document_type'],
+                        language=document['language'],
+                        source_url=document['url'],
+                        full_text=document['full_text'],
+                        file_hash=document['file_hash'],
+                        metadata_json={
+                            **document['metadata'],
+                            'ingested_at': datetime.utcnow().isoformat(),
+                        },
+                        status='active',
+                        **document.get('fields', {}),
+                    ),
+                    document['chunks'],
+                    None,  # embeddings are already on the chunks
+                ))
+
+            inserted = [str(document.id) for document in document_writer.write_many(db, items, commit=False)]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if updated:
+            cache_invalidate_documents(updated)
+        self.updated += len(updated)
+        return updated + inserted
@@ -0,0 +1,148 @@
+"""
+Structure-aware chunking for Georgian legal documents.
+"""
+from typing import List, Dict, Any, Iterator, Tuple
+import re
+
+from processor.chunker import TextChunker
+
+
+_SUPERSCRIPTS = "¹²³⁴⁵⁶⁷⁸⁹⁰"
+
+# Article header at line start: "მუხლი 168¹. სათაური", "## Статья 5", "**Article 12.**";
+# the number ends in "." or the line, so a reference like "მუხლი 168-ით" is not a header
+_ARTICLE_PATTERN = re.compile(
+    rf'^[ \t#*]*(?:მუხლი|Статья|Article)[ \t]+(\d+[{_SUPERSCRIPTS}]*)'
+    rf'(?:\.[ \t*]*([^\n]*)|[ \t*]*)$',
+    re.MULTILINE,
+)
+
+# Part (ნაწილი) at line start: "1. ...", "12¹. ...", "ნაწილი 3"
+_PART_PATTERN = re.compile(
+    rf'^[ \t]*(?:ნაწილი[ \t]+\d+|\d+[{_SUPERSCRIPTS}]*\.)(?=\s)',
+    re.MULTILINE,
+)
+
+# Sub-item (ქვეპუნქტი) at line start: "ა) ...", "ა.ბ) ...", "ქვეპუნქტი ა"
+_SUBITEM_PATTERN = re.compile(
+    r'^[ \t]*(?:ქვეპუნქტი[ \t]+\S+|[ა-ჰ](?:\.[ა-ჰ])*\))(?=\s)',
+    re.MULTILINE,
+)
+
+# Finer levels tried, in order, when an article does not fit in one chunk
+_SPLIT_LEVELS = (_PART_PATTERN, _SUBITEM_PATTERN)
+
+
+class LegalStructureChunker(TextChunker):
+    """
+    Chunk legal text along მუხლი (article) / ნაწილი (part) / ქვეპუნქტი
+    (sub-item) boundaries.
+
+    Each article that fits in chunk_size tokens becomes exactly one chunk.
+    Longer articles are packed from whole parts, then sub-items, and only
+    fall back to sentences when a single sub-item is still too long. Text
+    without article headers is chunked like TextChunker.
+    """
+
+    def iter_chunks(self, text: str, metadata: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily chunk text along its legal structure.
+
+        Args:
+            text: Text to chunk
+            metadata: Optional metadata to attach to each chunk
+
+        Yields:
+            Chunk dictionaries; chunks inside an article carry
+            'article_number' and 'article_title' in their metadata
+        """
+        if not text or not text.strip():
+            return
+
+        headers = list(_ARTICLE_PATTERN.finditer(text))
+        if not headers:
+            yield from super().iter_chunks(text, metadata)
+            return
+
+        index = 0
+
+        # Preamble before the first article
+        if text[:headers[0].start()].strip():
+            for chunk in self._pack_units(
+                text,
+                self._counted_units(text, 0, headers[0].start()),
+                metadata,
+                start_index=index,
+            ):
+                index += 1
+                yield chunk
+
+        bounds = [header.start() for header in headers[1:]] + [len(text)]
+        articles = [
+            (header, header.start(), self._rstrip(text, header.start(), end))
+            for header, end in zip(headers, bounds)
+        ]
+        counts = self.token_counter.count_batch([text[start:end] for _, start, end in articles])
+
+        for (header, start, end), tokens in zip(articles, counts):
+            article_metadata = {
+                **(metadata or {}),
+                "article_number": header.group(1),
+                "article_title": (header.group(2) or "").strip(" *#") or None,
+            }
+            for chunk in self._pack_units(
+                text,
+                self._structural_units(text, start, end, tokens, 0),
+                article_metadata,
+                start_index=index,
+                overlap=0,
+            ):
+                index += 1
+                yield chunk
+
+    def _structural_units(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        tokens: int,
+        level: int,
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, tokens) units of text[start:end] that each fit
+        in chunk_size, splitting at the coarsest structural level possible.
+        """
+        if tokens <= self.chunk_size:
+            yield start, end, tokens
+            return
+
+        for depth in range(level, len(_SPLIT_LEVELS)):
+            spans = self._split_at(text, start, end, _SPLIT_LEVELS[depth])
+            if len(spans) > 1:
+                counts = self.token_counter.count_batch([text[s:e] for s, e in spans])
+                for (span_start, span_end), span_tokens in zip(spans, counts):
+                    yield from self._structural_units(text, span_start, span_end, span_tokens, depth + 1)
+                return
+
+        yield from self._counted_units(text, start, end)
+
+    def _split_at(self, text: str, start: int, end: int, pattern: re.Pattern) -> List[Tuple[int, int]]:
+        """Split text[start:end] before every match of pattern."""
+        cuts = [match.start() for match in pattern.finditer(text, start, end) if match.start() > start]
+        spans = []
+        for span_start, span_end in zip([start] + cuts, cuts + [end]):
+            span_end = self._rstrip(text, span_start, span_end)
+            if span_end > span_start:
+                spans.append((span_start, span_end))
+        return spans
+
+    @staticmethod
+    def _rstrip(text: str, start: int, end: int) -> int:
+        """Move end back over trailing whitespace."""
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return end
+
+
+# Global legal chunker instance
+legal_chunker = LegalStructureChunker()
@@ -0,0 +1,86 @@
+"""
+Token counting with the embedding model's tokenizer.
+"""
+from threading import Lock
+from typing import List
+
+from core.config import settings
+
+
+class TokenCounter:
+    """Count tokens using the Hugging Face tokenizer of the embedding model."""
+
+    def __init__(self, model_name: str = None):
+        """
+        Initialize token counter.
+
+        The tokenizer is loaded lazily on first use so that importing this
+        module (e.g. in worker processes) stays cheap.
+
+        Args:
+            model_name: Tokenizer model name (default: EMBEDDING_MODEL)
+        """
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.tokenizer = None
+        self._loaded = False
+        self._lock = Lock()
+
+    def _load_tokenizer(self):
+        """Load tokenizer once."""
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                from transformers import AutoTokenizer
+
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            except Exception as e:
+                print(f"⚠ Warning: Could not load tokenizer {self.model_name}: {e}")
+                print("⚠ Falling back to character-based token estimates")
+                self.tokenizer = None
+            self._loaded = True
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens in a single text.
+
+        Args:
+            text: Text to count
+
+        Returns:
+            Token count
+        """
+        return self.count_batch([text])[0]
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens for many texts in one tokenizer call.
+
+        Args:
+            texts: Texts to count
+
+        Returns:
+            Token count per text
+        """
+        if not texts:
+            return []
+
+        if not self._loaded:
+            self._load_tokenizer()
+
+        if self.tokenizer is None:
+            # Rough estimation: 1 token ≈ 4 characters for multilingual text
+            return [len(text) // 4 for text in texts]
+
+        encoded = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,  # texts longer than the model window are expected
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+# Global token counter instance
+token_counter = TokenCounter()
@@ -1,18 +1,31 @@
 """
 RAG (Retrieval-Augmented Generation) module.
 """
-from rag.embeddings import embeddings_generator, EmbeddingsGenerator
+from rag.embeddings import embeddings_generator, EmbeddingsGenerator, get_embeddings_generator
+from rag.embedding_versions import embedding_versions, EmbeddingVersionStore
 from rag.vector_store_pgvector import vector_store, PgVectorStore as VectorStore
 from rag.llm import llm_client, LLMClient
+from rag.reranker import reranker, CrossEncoderReranker
+from rag.context_packer import context_packer, ContextPacker
+from rag.relation_graph import relation_index, DocumentRelationIndex
 from rag.pipeline import rag_pipeline, RAGPipeline
 
 __all__ = [
     "embeddings_generator",
     "EmbeddingsGenerator",
+    "get_embeddings_generator",
+    "embedding_versions",
+    "EmbeddingVersionStore",
     "vector_store",
     "VectorStore",
     "llm_client",
     "LLMClient",
+    "reranker",
+    "CrossEncoderReranker",
+    "context_packer",
+    "ContextPacker",
+    "relation_index",
+    "DocumentRelationIndex",
     "rag_pipeline",
     "RAGPipeline",
 ]
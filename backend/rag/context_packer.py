@@ -0,0 +1,233 @@
+"""
+Token-budgeted context packing with overlap stripping and deduplication.
+"""
+import hashlib
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+from core.config import settings
+from processor.tokenizer import token_counter as default_token_counter
+
+
+# MinHash parameters
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NUM_PERM = 64
+_SHINGLE_SIZE = 5
+
+# Shorter suffix/prefix matches are treated as coincidence, not chunk overlap
+_MIN_OVERLAP = 20
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, np.iinfo(np.int64).max, size=_NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, np.iinfo(np.int64).max, size=_NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+
+def overlap_length(left: str, right: str, max_length: int = 4000) -> int:
+    """
+    Length of the longest suffix of `left` that is a prefix of `right`.
+
+    Uses the KMP prefix function over `right[:n] + sep + left[-n:]`, so the
+    check is linear in the overlap window.
+
+    Args:
+        left: Preceding text
+        right: Following text
+        max_length: Largest overlap to look for (in characters)
+
+    Returns:
+        Overlap length in characters
+    """
+    n = min(len(left), len(right), max_length)
+    if n == 0:
+        return 0
+
+    combined = right[:n] + "\x00" + left[-n:]
+    prefix = [0] * len(combined)
+    for i in range(1, len(combined)):
+        j = prefix[i - 1]
+        while j and combined[i] != combined[j]:
+            j = prefix[j - 1]
+        if combined[i] == combined[j]:
+            j += 1
+        prefix[i] = j
+
+    return prefix[-1]
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    Compute a MinHash signature over word shingles.
+
+    Args:
+        text: Text to sign
+
+    Returns:
+        Signature array of length _NUM_PERM
+    """
+    words = text.split()
+    if len(words) <= _SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i:i + _SHINGLE_SIZE])
+            for i in range(len(words) - _SHINGLE_SIZE + 1)
+        }
+
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles
+        ],
+        dtype=np.uint64,
+    )
+
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def estimated_similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+class ContextPacker:
+    """Pack retrieved chunks into an LLM context under a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        dedup_threshold: Optional[float] = None,
+        token_counter=None,
+    ):
+        """
+        Initialize context packer.
+
+        Args:
+            max_tokens: Token budget for packed context (default from settings)
+            dedup_threshold: Estimated Jaccard similarity at which a passage
+                counts as a near-duplicate (default from settings)
+            token_counter: Object with count_batch(texts) -> List[int]
+        """
+        self.max_tokens = max_tokens or settings.RAG_CONTEXT_MAX_TOKENS
+        self.dedup_threshold = dedup_threshold or settings.RAG_DEDUP_THRESHOLD
+        self.token_counter = token_counter or default_token_counter
+
+    def pack(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge, deduplicate and budget retrieved chunks.
+
+        Args:
+            chunks: Retrieved chunks, best first (with 'content' and 'metadata')
+
+        Returns:
+            Passages, best first, each with 'content', 'metadata',
+            'chunk_ids' and 'tokens_count'
+        """
+        passages = self._merge_adjacent(chunks)
+        passages = self._drop_near_duplicates(passages)
+        return self._fill_budget(passages)
+
+    def _merge_adjacent(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge chunks with consecutive chunk_index from the same document.
+
+        The overlap the chunker repeated at the start of each chunk is
+        stripped. Merged passages keep the rank of their best chunk.
+        """
+        by_document: Dict[str, List[tuple]] = {}
+        standalone = []
+
+        for rank, chunk in enumerate(chunks):
+            metadata = chunk.get("metadata", {})
+            doc_id = metadata.get("document_id")
+            chunk_index = metadata.get("chunk_index")
+            if doc_id is None or chunk_index is None:
+                standalone.append((rank, chunk))
+                continue
+            by_document.setdefault(doc_id, []).append((int(chunk_index), rank, chunk))
+
+        ranked_passages = []
+        for rank, chunk in standalone:
+            ranked_passages.append((rank, self._new_passage(chunk)))
+
+        for doc_chunks in by_document.values():
+            doc_chunks.sort(key=lambda item: item[0])
+            passage, best_rank, last_index = None, None, None
+
+            for chunk_index, rank, chunk in doc_chunks:
+                if passage is not None and chunk_index == last_index + 1:
+                    content = chunk["content"]
+                    overlap = overlap_length(passage["content"], content)
+                    if overlap >= _MIN_OVERLAP:
+                        passage["content"] += content[overlap:]
+                    else:
+                        passage["content"] += "\n" + content
+                    passage["chunk_ids"].append(chunk["id"])
+                    if rank < best_rank:
+                        best_rank = rank
+                        passage["metadata"] = chunk.get("metadata", {})
+                elif chunk_index == last_index:
+                    continue  # same chunk retrieved twice
+                else:
+                    if passage is not None:
+                        ranked_passages.append((best_rank, passage))
+                    passage, best_rank = self._new_passage(chunk), rank
+                last_index = chunk_index
+
+            if passage is not None:
+                ranked_passages.append((best_rank, passage))
+
+        ranked_passages.sort(key=lambda item: item[0])
+        return [passage for _, passage in ranked_passages]
+
+    def _drop_near_duplicates(self, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop passages whose shingle sets nearly match a better-ranked one."""
+        kept, signatures = [], []
+
+        for passage in passages:
+            signature = minhash_signature(passage["content"])
+            if any(
+                estimated_similarity(signature, other) >= self.dedup_threshold
+                for other in signatures
+            ):
+                continue
+            kept.append(passage)
+            signatures.append(signature)
+
+        return kept
+
+    def _fill_budget(self, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Take passages in rank order while they fit in the token budget."""
+        counts = self.token_counter.count_batch([p["content"] for p in passages])
+
+        packed, used = [], 0
+        for passage, tokens in zip(passages, counts):
+            if used + tokens <= self.max_tokens:
+                packed.append({**passage, "tokens_count": tokens})
+                used += tokens
+            elif not packed:
+                # Best passage alone exceeds the budget: keep a proportional prefix
+                keep_chars = len(passage["content"]) * self.max_tokens // max(tokens, 1)
+                packed.append({
+                    **passage,
+                    "content": passage["content"][:keep_chars],
+                    "tokens_count": self.max_tokens,
+                })
+                used = self.max_tokens
+
+        return packed
+
+    @staticmethod
+    def _new_passage(chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a passage from a single chunk."""
+        return {
+            "content": chunk["content"],
+            "metadata": chunk.get("metadata", {}),
+            "chunk_ids": [chunk["id"]],
+        }
+
+
+# Global context packer instance
+context_packer = ContextPacker()
@@ -0,0 +1,454 @@
+"""
+Versioned chunk embeddings for blue/green embedding model migrations.
+"""
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from core.config import settings
+from core.database import SessionLocal
+from models.document import EmbeddingVersion
+
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_version() -> Dict[str, Any]:
+    """Version served from document_chunks.embedding (no model_version)."""
+    return {
+        'model_version': None,
+        'model_name': settings.EMBEDDING_MODEL,
+        'dimension': settings.EMBEDDING_DIMENSION,
+    }
+
+
+def is_relevant(content: str, expected: List[str]) -> bool:
+    """Check whether chunk content contains any expected marker."""
+    return any(marker in content for marker in expected)
+
+
+class EmbeddingVersionStore:
+    """
+    Embedding versions stored side by side in chunk_embeddings.
+
+    A new model is registered as a 'building' version and filled in the
+    background while the active version keeps serving queries. Each version
+    gets its own partial HNSW index. Switching is one transaction that
+    retires the active version and activates the new one, and is refused
+    unless the new version covers every chunk and a recall comparison run
+    showed it does not retrieve worse than the serving version.
+
+    Without an active version, queries are served from
+    document_chunks.embedding (the legacy version).
+    """
+
+    def __init__(self, cache_ttl: Optional[float] = None):
+        self.cache_ttl = settings.EMBEDDING_VERSION_CACHE_TTL if cache_ttl is None else cache_ttl
+        self._active: Optional[Dict[str, Any]] = None
+        self._active_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def active(self) -> Dict[str, Any]:
+        """
+        Get the serving version, cached for cache_ttl seconds.
+
+        Returns:
+            Dict with 'model_version', 'model_name' and 'dimension'
+        """
+        with self._lock:
+            if self._active is None or time.monotonic() - self._active_loaded_at > self.cache_ttl:
+                self._active = self._load_active()
+                self._active_loaded_at = time.monotonic()
+            return self._active
+
+    def _load_active(self) -> Dict[str, Any]:
+        """Read the active version from the database."""
+        db = SessionLocal()
+        try:
+            version = db.query(EmbeddingVersion).filter(EmbeddingVersion.status == 'active').first()
+            if version is None:
+                return legacy_version()
+            return {
+                'model_version': version.model_version,
+                'model_name': version.model_name,
+                'dimension': version.dimension,
+            }
+        except Exception as e:
+            logger.error(f"Error loading active embedding version: {e}")
+            return legacy_version()
+        finally:
+            db.close()
+
+    def get(self, model_version: Optional[str]) -> Dict[str, Any]:
+        """
+        Get a version by name (None for the legacy version).
+
+        Raises:
+            ValueError: If the version is not registered
+        """
+        if model_version is None:
+            return legacy_version()
+
+        db = SessionLocal()
+        try:
+            version = db.get(EmbeddingVersion, model_version)
+            if version is None:
+                raise ValueError(f"Unknown embedding version: {model_version}")
+            return {
+                'model_version': version.model_version,
+                'model_name': version.model_name,
+                'dimension': version.dimension,
+                'status': version.status,
+                'recall': version.recall,
+                'baseline_recall': version.baseline_recall,
+            }
+        finally:
+            db.close()
+
+    def register(self, model_version: str, model_name: str, dimension: int) -> None:
+        """
+        Register a new version to be filled in the background.
+
+        Args:
+            model_version: Version name (e.g. "mpnet-v2")
+            model_name: Sentence transformer model
+            dimension: Embedding dimension of the model
+        """
+        db = SessionLocal()
+        try:
+            db.add(EmbeddingVersion(
+                model_version=model_version,
+                model_name=model_name,
+                dimension=dimension,
+                status='building',
+            ))
+            db.commit()
+            logger.info(f"Registered embedding version {model_version} ({model_name}, {dimension}d)")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def missing_count(self, model_version: str) -> int:
+        """Number of chunks without an embedding in this version."""
+        db = SessionLocal()
+        try:
+            return db.execute(
+                text("""
+                    SELECT COUNT(*) FROM document_chunks c
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM chunk_embeddings e
+                        WHERE e.chunk_id = c.id AND e.model_version = :model_version
+                    )
+                """),
+                {"model_version": model_version},
+            ).scalar() or 0
+        finally:
+            db.close()
+
+    def backfill(
+        self,
+        model_version: str,
+        encode: Callable[[List[str]], List[List[float]]],
+        batch_size: int = 512,
+    ) -> int:
+        """
+        Embed every chunk that has no vector in this version yet.
+
+        Chunks are read in id order with keyset pagination; the version's
+        own rows are the checkpoint, so an interrupted backfill resumes where
+        it stopped and later runs only pick up new chunks.
+
+        Args:
+            model_version: Version to fill
+            encode: Function embedding a list of texts with the version's model
+            batch_size: Chunks read, encoded and written per batch
+
+        Returns:
+            Number of vectors written
+        """
+        written = 0
+        after_id = None
+        started = time.time()
+
+        while True:
+            db = SessionLocal()
+            try:
+                rows = db.execute(
+                    text("""
+                        SELECT c.id, c.content FROM document_chunks c
+                        WHERE (CAST(:after_id AS uuid) IS NULL OR c.id > CAST(:after_id AS uuid))
+                          AND NOT EXISTS (
+                              SELECT 1 FROM chunk_embeddings e
+                              WHERE e.chunk_id = c.id AND e.model_version = :model_version
+                          )
+                        ORDER BY c.id
+                        LIMIT :limit
+                    """),
+                    {"after_id": after_id, "model_version": model_version, "limit": batch_size},
+                ).fetchall()
+                if not rows:
+                    break
+
+                embeddings = encode([content for _, content in rows])
+                self._upsert(db, model_version, [chunk_id for chunk_id, _ in rows], embeddings)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+            written += len(rows)
+            after_id = str(rows[-1][0])
+            logger.info(
+                f"Embedding version {model_version}: {written} vectors written "
+                f"({written / max(time.time() - started, 1e-9):.0f}/s)"
+            )
+
+        return written
+
+    def write_active(self, db, rows: List[Dict[str, Any]]) -> int:
+        """
+        Write the active version's vectors of new chunks in the caller's transaction.
+
+        New chunks are embedded into document_chunks.embedding with
+        EMBEDDING_MODEL. While another version serves queries, they would
+        stay invisible until the next backfill, so their vectors for that
+        version are written together with the chunks. Vectors of the base
+        column are reused when the active version uses the same model;
+        otherwise the chunks are encoded with the version's model. Chunks
+        without a vector (model unavailable) are left to the backfill.
+
+        Args:
+            db: Session of the transaction inserting the chunks
+            rows: Chunk rows with 'id', 'content' and 'embedding'
+
+        Returns:
+            Number of vectors written
+        """
+        version = self.active()
+        if version['model_version'] is None or not rows:
+            return 0
+
+        if version['model_name'] == settings.EMBEDDING_MODEL:
+            rows = [row for row in rows if row.get('embedding') is not None]
+            embeddings = [row['embedding'] for row in rows]
+        else:
+            from rag.embeddings import get_embeddings_generator
+
+            embedder = get_embeddings_generator(version['model_name'])
+            if not embedder.model:
+                logger.warning(
+                    f"Embedding model {version['model_name']} unavailable, "
+                    f"{len(rows)} new chunks left to backfill"
+                )
+                return 0
+            embeddings = embedder.encode([row['content'] for row in rows])
+
+        if rows:
+            self._upsert(db, version['model_version'], [row['id'] for row in rows], embeddings)
+        return len(rows)
+
+    @staticmethod
+    def _upsert(db, model_version: str, chunk_ids: List[Any], embeddings: List[List[float]]) -> None:
+        """Write one batch of vectors with a single INSERT ... ON CONFLICT."""
+        from rag.vector_store_pgvector import PgVectorStore
+
+        db.execute(
+            text("""
+                INSERT INTO chunk_embeddings (chunk_id, model_version, embedding, created_at)
+                SELECT v.id, :model_version, CAST(v.embedding AS vector), now()
+                FROM unnest(CAST(:ids AS uuid[]), CAST(:embeddings AS text[])) AS v(id, embedding)
+                ON CONFLICT (chunk_id, model_version) DO UPDATE SET embedding = EXCLUDED.embedding
+            """),
+            {
+                "model_version": model_version,
+                "ids": [str(chunk_id) for chunk_id in chunk_ids],
+                "embeddings": [PgVectorStore._to_pgvector(embedding) for embedding in embeddings],
+            },
+        )
+
+    @staticmethod
+    def index_name(model_version: str) -> str:
+        """Name of a version's HNSW index."""
+        return "chunk_embeddings_" + re.sub(r'[^a-z0-9]+', '_', model_version.lower()).strip('_') + "_hnsw_idx"
+
+    def create_index(self, model_version: str) -> None:
+        """
+        Create the HNSW index of one version.
+
+        The index is partial (one version only) over the vector cast to the
+        version's dimension, which is what vector_store queries order by.
+        """
+        version = self.get(model_version)
+
+        db = SessionLocal()
+        try:
+            db.execute(text("""
+                CREATE INDEX IF NOT EXISTS {index}
+                ON chunk_embeddings
+                USING hnsw ((CAST(embedding AS vector({dimension}))) vector_cosine_ops)
+                WITH (m = 16, ef_construction = 64)
+                WHERE model_version = '{model_version}';
+            """.format(
+                index=self.index_name(model_version),
+                dimension=int(version['dimension']),
+                model_version=model_version.replace("'", "''"),
+            )))
+            db.commit()
+            logger.info(f"Created HNSW index for embedding version {model_version}")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def recall(self, version: Dict[str, Any], queries: List[Dict[str, Any]], top_k: int) -> float:
+        """
+        Fraction of queries with a relevant chunk in the top k of a version.
+
+        Args:
+            version: Version dict (from get() or active())
+            queries: [{"query": ..., "expected": [markers]}, ...]
+            top_k: Results considered per query
+
+        Returns:
+            Recall@k between 0 and 1
+        """
+        from rag.embeddings import get_embeddings_generator
+        from rag.vector_store_pgvector import vector_store
+
+        if not queries:
+            return 0.0
+
+        embedder = get_embeddings_generator(version['model_name'])
+        hits = 0
+        for item in queries:
+            results = vector_store.search(
+                embedder.encode_query(item['query']),
+                limit=top_k,
+                version=version,
+            )
+            hits += any(is_relevant(result['document'], item['expected']) for result in results)
+        return hits / len(queries)
+
+    def compare(self, model_version: str, queries: List[Dict[str, Any]], top_k: int = 10) -> Dict[str, float]:
+        """
+        Run the recall comparison of a candidate against the serving version.
+
+        Both recalls are stored on the candidate and checked by activate().
+
+        Returns:
+            Dict with 'baseline' and 'candidate' recall@k
+        """
+        candidate = self.get(model_version)
+        baseline_recall = self.recall(self.active(), queries, top_k)
+        candidate_recall = self.recall(candidate, queries, top_k)
+
+        db = SessionLocal()
+        try:
+            version = db.get(EmbeddingVersion, model_version)
+            version.recall = candidate_recall
+            version.baseline_recall = baseline_recall
+            db.commit()
+        finally:
+            db.close()
+
+        logger.info(
+            f"Recall@{top_k}: serving {baseline_recall:.3f}, "
+            f"{model_version} {candidate_recall:.3f}"
+        )
+        return {'baseline': baseline_recall, 'candidate': candidate_recall}
+
+    def activate(self, model_version: str, force: bool = False) -> None:
+        """
+        Atomically make a version the one that serves queries.
+
+        Args:
+            model_version: Version to activate
+            force: Skip the coverage and recall checks
+
+        Raises:
+            ValueError: If the version is incomplete or lost recall
+        """
+        version = self.get(model_version)
+
+        if not force:
+            missing = self.missing_count(model_version)
+            if missing:
+                raise ValueError(f"{missing} chunks have no embedding in {model_version}; run backfill first")
+            if version['recall'] is None or version['baseline_recall'] is None:
+                raise ValueError(f"No recall comparison recorded for {model_version}")
+            if version['recall'] < version['baseline_recall'] - settings.EMBEDDING_RECALL_TOLERANCE:
+                raise ValueError(
+                    f"{model_version} recall {version['recall']:.3f} is below serving "
+                    f"recall {version['baseline_recall']:.3f}"
+                )
+
+        db = SessionLocal()
+        try:
+            # Retire first: the partial unique index allows one active row
+            db.execute(
+                text("UPDATE embedding_versions SET status = 'retired' WHERE status = 'active'")
+            )
+            db.execute(
+                text("""
+                    UPDATE embedding_versions
+                    SET status = 'active', activated_at = :now
+                    WHERE model_version = :model_version
+                """),
+                {"model_version": model_version, "now": datetime.utcnow()},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self._active = None
+        logger.info(f"Activated embedding version {model_version}")
+
+    def pending_versions(self) -> List[Dict[str, Any]]:
+        """Versions still kept up to date (building or active)."""
+        db = SessionLocal()
+        try:
+            return [
+                {'model_version': v.model_version, 'model_name': v.model_name, 'dimension': v.dimension}
+                for v in db.query(EmbeddingVersion).filter(
+                    EmbeddingVersion.status.in_(('building', 'active'))
+                )
+            ]
+        finally:
+            db.close()
+
+    def drop(self, model_version: str) -> None:
+        """Delete a non-active version with its vectors and index."""
+        db = SessionLocal()
+        try:
+            version = db.get(EmbeddingVersion, model_version)
+            if version is None:
+                return
+            if version.status == 'active':
+                raise ValueError("Cannot drop the active embedding version")
+            db.execute(text(f"DROP INDEX IF EXISTS {self.index_name(model_version)}"))
+            db.delete(version)  # chunk_embeddings rows cascade
+            db.commit()
+            logger.info(f"Dropped embedding version {model_version}")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Global embedding version store instance
+embedding_versions = EmbeddingVersionStore()
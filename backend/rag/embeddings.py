@@ -1,7 +1,8 @@
 """
 Embeddings generation using multilingual sentence transformers.
 """
-from typing import List, Union
+import threading
+from typing import Dict, List, Optional, Union
 from sentence_transformers import SentenceTransformer
 
 from core.config import settings
@@ -10,17 +11,23 @@ from core.config import settings
 class EmbeddingsGenerator:
     """Generate embeddings for text using sentence transformers."""
 
-    def __init__(self):
-        """Initialize embedding model."""
+    def __init__(self, model_name: Optional[str] = None):
+        """
+        Initialize embedding model.
+
+        Args:
+            model_name: Sentence transformer model (default: EMBEDDING_MODEL)
+        """
+        self.model_name = model_name or settings.EMBEDDING_MODEL
         self.model = None
         self._load_model()
 
     def _load_model(self):
         """Load sentence transformer model."""
         try:
-            print(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-            self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
-            print(f"✓ Embedding model loaded (dimension: {settings.EMBEDDING_DIMENSION})")
+            print(f"Loading embedding model: {self.model_name}")
+            self.model = SentenceTransformer(self.model_name)
+            print(f"✓ Embedding model loaded (dimension: {self.dimension})")
         except Exception as e:
             print(f"⚠ Warning: Could not load embedding model: {e}")
             print(f"⚠ Embeddings will not work until model is downloaded")
@@ -50,7 +57,7 @@ class EmbeddingsGenerator:
             return embeddings.tolist()
         except Exception as e:
             print(f"Error generating embeddings: {e}")
-            return [[0.0] * settings.EMBEDDING_DIMENSION] * len(texts)
+            return [[0.0] * self.dimension] * len(texts)
 
     def encode_query(self, query: str) -> List[float]:
         """
@@ -63,8 +70,38 @@ class EmbeddingsGenerator:
             Embedding vector
         """
         embeddings = self.encode(query)
-        return embeddings[0] if embeddings else [0.0] * settings.EMBEDDING_DIMENSION
+        return embeddings[0] if embeddings else [0.0] * self.dimension
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension of the loaded model."""
+        if self.model is not None and self.model_name != settings.EMBEDDING_MODEL:
+            return self.model.get_sentence_embedding_dimension()
+        return settings.EMBEDDING_DIMENSION
 
 
 # Global embeddings generator instance
 embeddings_generator = EmbeddingsGenerator()
+
+# Generators for other models (embedding version migrations), by model name
+_generators: Dict[str, EmbeddingsGenerator] = {}
+_generators_lock = threading.Lock()
+
+
+def get_embeddings_generator(model_name: Optional[str] = None) -> EmbeddingsGenerator:
+    """
+    Get the generator for a model, loading it on first use.
+
+    Args:
+        model_name: Sentence transformer model (default: EMBEDDING_MODEL)
+
+    Returns:
+        Shared generator for that model
+    """
+    if not model_name or model_name == embeddings_generator.model_name:
+        return embeddings_generator
+
+    with _generators_lock:
+        if model_name not in _generators:
+            _generators[model_name] = EmbeddingsGenerator(model_name)
+        return _generators[model_name]
@@ -0,0 +1,44 @@
+"""
+Rank fusion for combining results from multiple retrievers.
+"""
+from typing import List, Dict, Any
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    k: int = 60,
+    id_key: str = "id",
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists with Reciprocal Rank Fusion (RRF).
+
+    Each item scores sum(1 / (k + rank)) over the lists it appears in, so
+    items ranked well by several retrievers rise to the top without having
+    to calibrate their raw scores against each other.
+
+    Args:
+        result_lists: Ranked result lists (best first)
+        k: RRF damping constant
+        id_key: Key identifying the same item across lists
+
+    Returns:
+        Fused list (best first); each item carries an 'rrf_score'.
+        When an item appears in several lists, the first occurrence is kept.
+    """
+    scores: Dict[Any, float] = {}
+    items: Dict[Any, Dict[str, Any]] = {}
+
+    for results in result_lists:
+        for rank, item in enumerate(results, 1):
+            item_id = item.get(id_key)
+            if item_id is None:
+                continue
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+            if item_id not in items:
+                items[item_id] = item
+
+    fused = []
+    for item_id in sorted(scores, key=scores.get, reverse=True):
+        fused.append({**items[item_id], "rrf_score": scores[item_id]})
+
+    return fused
@@ -1,15 +1,21 @@
 """
 RAG (Retrieval-Augmented Generation) pipeline.
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 
 from core.config import settings
 from core.database import SessionLocal
 from models import Document, DocumentChunk
-from rag.embeddings import embeddings_generator
-from rag.vector_store import vector_store
+from rag.embeddings import embeddings_generator, get_embeddings_generator
+from rag.embedding_versions import embedding_versions
+from rag.vector_store_pgvector import vector_store
 from rag.llm import llm_client
+from rag.fusion import reciprocal_rank_fusion
+from rag.reranker import reranker
+from rag.context_packer import context_packer
+from rag.relation_graph import relation_index
 
 
 class RAGPipeline:
@@ -20,6 +26,15 @@ class RAGPipeline:
         self.embeddings = embeddings_generator
         self.vector_store = vector_store
         self.llm = llm_client
+        self.reranker = reranker
+        self.context_packer = context_packer
+        self.relation_index = relation_index
+        # Lexical search runs here while the query is embedded and searched
+        # on the calling thread, so hybrid retrieval adds no serial latency
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.RAG_HYBRID_WORKERS,
+            thread_name_prefix="rag-lexical",
+        )
 
     def process_query(
         self,
@@ -39,33 +54,75 @@ class RAGPipeline:
             Dictionary with response and sources
         """
         try:
-            # Step 1: Generate query embedding
-            query_embedding = self.embeddings.encode_query(query)
+            # Retrieve wider when reranking: recall comes from the candidate
+            # pool, the context packer's token budget keeps the LLM context small
+            top_k = (
+                settings.RAG_RERANK_CANDIDATES
+                if settings.RAG_RERANK_ENABLED
+                else settings.RAG_TOP_K
+            )
+
+            # Step 1: Start lexical search (article numbers, exact terms)
+            lexical_future = None
+            if settings.RAG_HYBRID_ENABLED:
+                lexical_future = self._executor.submit(
+                    self.vector_store.lexical_search,
+                    query,
+                    top_k,
+                )
+
+            # Step 2: Generate query embedding with the serving version's model
+            version = embedding_versions.active()
+            query_embedding = self._query_encoder(version).encode_query(query)
             print(f"[RAG] Query: {query[:50]}..., Language: {language}")
 
-            # Step 2: Search vector store
+            # Step 3: Search vector store
             search_results = self.vector_store.search(
                 query_embedding=query_embedding,
-                n_results=settings.RAG_TOP_K,
+                limit=top_k,
                 where={"language": language} if language else None,
+                version=version,
             )
-            print(f"[RAG] Search results: {len(search_results.get('ids', [[]])[0])} chunks found")
+            print(f"[RAG] Search results: {len(search_results)} chunks found")
 
-            # Step 3: Retrieve full documents from database
             retrieved_chunks = self._retrieve_chunks(search_results)
+
+            # Step 4: Fuse vector and lexical rankings
+            if lexical_future is not None:
+                lexical_chunks = self._retrieve_chunks(lexical_future.result())
+                print(f"[RAG] Lexical results: {len(lexical_chunks)} chunks found")
+                retrieved_chunks = reciprocal_rank_fusion(
+                    [retrieved_chunks, lexical_chunks],
+                    k=settings.RAG_RRF_K,
+                )[:top_k]
             print(f"[RAG] Retrieved chunks: {len(retrieved_chunks)}")
 
-            # Step 4: Assemble context
+            # Step 5: Expand through document relations, drop repealed documents
+            if settings.RAG_GRAPH_EXPANSION_ENABLED:
+                retrieved_chunks = self._expand_relations(retrieved_chunks, query_embedding, version)
+            retrieved_chunks = [
+                chunk for chunk in retrieved_chunks
+                if not self.relation_index.is_repealed(chunk["metadata"].get("document_id", ""))
+            ]
+
+            # Step 6: Rerank candidates (all kept: the token budget does the cut)
+            if settings.RAG_RERANK_ENABLED:
+                retrieved_chunks = self.reranker.rerank(
+                    query, retrieved_chunks, top_k=len(retrieved_chunks) or None
+                )
+                print(f"[RAG] Reranked chunks: {len(retrieved_chunks)}")
+
+            # Step 7: Assemble context
             context = self._assemble_context(retrieved_chunks)
 
-            # Step 5: Generate response using LLM
+            # Step 8: Generate response using LLM
             response = self.llm.generate_response(
                 query=query,
                 context=context,
                 conversation_history=conversation_history,
             )
 
-            # Step 6: Prepare sources
+            # Step 9: Prepare sources
             sources = self._prepare_sources(retrieved_chunks)
             print(f"[RAG] Prepared sources: {len(sources)}")
             if len(sources) == 0 and len(retrieved_chunks) > 0:
@@ -86,9 +143,15 @@ class RAGPipeline:
                 "retrieved_count": 0,
             }
 
-    def _retrieve_chunks(self, search_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _query_encoder(self, version: Dict[str, Any]):
+        """Embeddings generator matching an embedding version."""
+        if version["model_name"] == self.embeddings.model_name:
+            return self.embeddings
+        return get_embeddings_generator(version["model_name"])
+
+    def _retrieve_chunks(self, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Retrieve full chunk information from database.
+        Convert vector store results into chunk dictionaries.
 
         Args:
             search_results: Results from vector store search
@@ -97,31 +160,110 @@ class RAGPipeline:
             List of chunk dictionaries with metadata
         """
         chunks = []
-        
-        if not search_results.get("ids") or not search_results["ids"][0]:
-            return chunks
-
-        chunk_ids = search_results["ids"][0]
-        documents = search_results["documents"][0]
-        metadatas = search_results.get("metadatas", [[]])[0]
-        distances = search_results.get("distances", [[]])[0]
 
-        for i, chunk_id in enumerate(chunk_ids):
+        for result in search_results:
             chunks.append({
-                "id": chunk_id,
-                "content": documents[i] if i < len(documents) else "",
-                "metadata": metadatas[i] if i < len(metadatas) else {},
-                "similarity": 1 - distances[i] if i < len(distances) else 0.0,
+                "id": result["id"],
+                "content": result.get("document", ""),
+                "metadata": result.get("metadata", {}),
+                "similarity": result.get("similarity", 0.0),
+                "parent_content": result.get("parent_document"),
             })
 
         return chunks
 
+    def _expand_relations(
+        self,
+        chunks: List[Dict[str, Any]],
+        query_embedding: List[float],
+        version: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Add the best chunk of documents related to the top hits.
+
+        Related documents (e.g. the order amending a Tax Code article) come
+        from the in-memory relation index; only their chunks are fetched.
+
+        Args:
+            chunks: Retrieved chunks, best first
+            query_embedding: Query embedding vector
+            version: Embedding version the query was encoded for
+
+        Returns:
+            Chunks with related-document chunks appended
+        """
+        seed_ids = []
+        for chunk in chunks[:settings.RAG_GRAPH_SEED_HITS]:
+            doc_id = chunk["metadata"].get("document_id")
+            if doc_id and doc_id not in seed_ids:
+                seed_ids.append(doc_id)
+
+        related_ids = self.relation_index.expand(seed_ids, settings.RAG_GRAPH_MAX_NEIGHBORS)
+        if not related_ids:
+            return chunks
+
+        seen_ids = {chunk["id"] for chunk in chunks}
+        related_chunks = [
+            chunk
+            for chunk in self._retrieve_chunks(
+                self.vector_store.search_in_documents(query_embedding, related_ids, version)
+            )
+            if chunk["id"] not in seen_ids
+        ]
+        print(f"[RAG] Relation expansion: {len(related_chunks)} chunks from related documents")
+
+        return chunks + related_chunks
+
+    def _expand_to_parents(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Replace sentence-window chunks with their enclosing parent section.
+
+        The parent text comes back with the search results (cut from the
+        document by stored offsets). Windows sharing a parent collapse into
+        one entry at the rank of the best window.
+
+        Args:
+            chunks: Ranked chunks
+
+        Returns:
+            Ranked chunks with parent sections as content
+        """
+        expanded = []
+        seen_parents = set()
+
+        for chunk in chunks:
+            parent_content = chunk.get("parent_content")
+            metadata = chunk.get("metadata", {})
+            if not parent_content:
+                expanded.append(chunk)
+                continue
+
+            parent_key = (metadata.get("document_id"), metadata.get("parent_index"))
+            if parent_key in seen_parents:
+                continue
+            seen_parents.add(parent_key)
+
+            expanded.append({
+                **chunk,
+                "content": parent_content,
+                # Adjacency for context packing is between parent sections
+                "metadata": {**metadata, "chunk_index": metadata.get("parent_index")},
+            })
+
+        return expanded
+
     def _assemble_context(self, chunks: List[Dict[str, Any]]) -> str:
         """
         Assemble context from retrieved chunks.
 
+        Adjacent chunks of a document are merged (with the chunker overlap
+        stripped), near-duplicates are dropped and passages are added until
+        RAG_CONTEXT_MAX_TOKENS is reached. The whole ranked list is packed:
+        cutting it to a fixed count first would leave the budget unused
+        when chunks are short.
+
         Args:
-            chunks: List of retrieved chunks
+            chunks: List of retrieved chunks, best first
 
         Returns:
             Assembled context string
@@ -129,14 +271,23 @@ class RAGPipeline:
         if not chunks:
             return "Нет доступной информации в базе данных."
 
+        if settings.RAG_RETRIEVAL_MODE == "small_to_big":
+            chunks = self._expand_to_parents(chunks)
+
+        passages = self.context_packer.pack(chunks)
+        print(
+            f"[RAG] Packed {len(passages)} passages, "
+            f"{sum(p['tokens_count'] for p in passages)} tokens"
+        )
+
         context_parts = []
-        for i, chunk in enumerate(chunks[:settings.RAG_RERANK_TOP_K], 1):
-            metadata = chunk.get("metadata", {})
+        for i, passage in enumerate(passages, 1):
+            metadata = passage.get("metadata", {})
             doc_title = metadata.get("title", "Неизвестный документ")
             doc_type = metadata.get("document_type", "")
             
             context_parts.append(
-                f"[Документ {i}: {doc_title} ({doc_type})]\n{chunk['content']}\n"
+                f"[Документ {i}: {doc_title} ({doc_type})]\n{passage['content']}\n"
             )
 
         return "\n---\n".join(context_parts)
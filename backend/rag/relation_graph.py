@@ -0,0 +1,192 @@
+"""
+In-memory adjacency index over document relations (amends/references/repeals).
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.database import SessionLocal
+from models.document import Document, DocumentRelation
+
+
+logger = logging.getLogger(__name__)
+
+
+# Relation types followed when expanding retrieval hits
+EXPANSION_RELATIONS = ("amends", "references")
+
+
+class DocumentRelationIndex:
+    """
+    Adjacency index of DocumentRelation rows, kept in memory.
+
+    Built once at startup and refreshed incrementally (rows newer than the
+    last watermark), so retrieval never joins document_relations per request.
+    """
+
+    def __init__(self):
+        self.outgoing: Dict[str, Dict[str, Set[str]]] = {}
+        self.incoming: Dict[str, Dict[str, Set[str]]] = {}
+        self.repealed: Set[str] = set()
+        self._relations_watermark: Optional[datetime] = None
+        self._documents_watermark: Optional[datetime] = None
+        self._lock = threading.RLock()
+        self._stop_event: Optional[threading.Event] = None
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Load relations and repealed documents changed since the last refresh.
+
+        Args:
+            full: Drop the current index and rebuild from scratch
+
+        Returns:
+            Number of relation rows loaded
+        """
+        db = SessionLocal()
+        try:
+            if full:
+                with self._lock:
+                    self.outgoing, self.incoming, self.repealed = {}, {}, set()
+                    self._relations_watermark = None
+                    self._documents_watermark = None
+
+            relations_query = db.query(
+                DocumentRelation.source_doc_id,
+                DocumentRelation.target_doc_id,
+                DocumentRelation.relation_type,
+                DocumentRelation.created_at,
+            )
+            if self._relations_watermark is not None:
+                # >= so rows sharing the watermark timestamp are not missed;
+                # re-adding an edge to a set is a no-op
+                relations_query = relations_query.filter(
+                    DocumentRelation.created_at >= self._relations_watermark
+                )
+
+            documents_query = db.query(
+                Document.id,
+                Document.status,
+                Document.updated_at,
+            )
+            if self._documents_watermark is not None:
+                documents_query = documents_query.filter(
+                    Document.updated_at >= self._documents_watermark
+                )
+
+            loaded = 0
+            with self._lock:
+                for source_id, target_id, relation_type, created_at in relations_query.yield_per(1000):
+                    self._add_relation(str(source_id), str(target_id), relation_type or "references")
+                    if self._relations_watermark is None or created_at > self._relations_watermark:
+                        self._relations_watermark = created_at
+                    loaded += 1
+
+                for doc_id, status, updated_at in documents_query.yield_per(1000):
+                    doc_id = str(doc_id)
+                    if status == "repealed":
+                        self.repealed.add(doc_id)
+                    elif "repeals" not in self.incoming.get(doc_id, {}):
+                        self.repealed.discard(doc_id)
+                    if self._documents_watermark is None or updated_at > self._documents_watermark:
+                        self._documents_watermark = updated_at
+
+            logger.info(
+                f"Relation index refreshed: {loaded} relations loaded, "
+                f"{len(self.repealed)} repealed documents"
+            )
+            return loaded
+
+        except Exception as e:
+            logger.error(f"Error refreshing relation index: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def _add_relation(self, source_id: str, target_id: str, relation_type: str) -> None:
+        """Add one edge to the adjacency maps."""
+        self.outgoing.setdefault(source_id, {}).setdefault(relation_type, set()).add(target_id)
+        self.incoming.setdefault(target_id, {}).setdefault(relation_type, set()).add(source_id)
+        if relation_type == "repeals":
+            self.repealed.add(target_id)
+
+    def is_repealed(self, document_id: str) -> bool:
+        """Check whether a document has been repealed."""
+        return str(document_id) in self.repealed
+
+    def neighbors(
+        self,
+        document_id: str,
+        relation_types: Iterable[str] = EXPANSION_RELATIONS,
+    ) -> Set[str]:
+        """
+        Documents linked to a document in either direction.
+
+        For a Tax Code article this includes the orders that amend it
+        (incoming 'amends') and the documents it references.
+
+        Args:
+            document_id: Document ID
+            relation_types: Relation types to follow
+
+        Returns:
+            Set of related document IDs
+        """
+        document_id = str(document_id)
+        related = set()
+        with self._lock:
+            for adjacency in (self.outgoing, self.incoming):
+                edges = adjacency.get(document_id, {})
+                for relation_type in relation_types:
+                    related |= edges.get(relation_type, set())
+        return related
+
+    def expand(self, document_ids: List[str], max_neighbors: int) -> List[str]:
+        """
+        Related documents for a ranked list of documents.
+
+        Args:
+            document_ids: Seed documents, best first
+            max_neighbors: Maximum number of related documents to return
+
+        Returns:
+            Related, non-repealed document IDs not among the seeds, in seed order
+        """
+        seeds = [str(doc_id) for doc_id in document_ids]
+        seen = set(seeds)
+        expanded = []
+
+        for doc_id in seeds:
+            for neighbor in sorted(self.neighbors(doc_id)):
+                if neighbor in seen or neighbor in self.repealed:
+                    continue
+                seen.add(neighbor)
+                expanded.append(neighbor)
+                if len(expanded) >= max_neighbors:
+                    return expanded
+
+        return expanded
+
+    def start_auto_refresh(self, interval_seconds: int) -> None:
+        """Refresh the index incrementally on a background thread."""
+        if self._stop_event is not None:
+            return
+
+        stop_event = self._stop_event = threading.Event()
+
+        def _loop():
+            while not stop_event.wait(interval_seconds):
+                self.refresh()
+
+        threading.Thread(target=_loop, name="relation-index-refresh", daemon=True).start()
+
+    def stop_auto_refresh(self) -> None:
+        """Stop the background refresh thread."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+            self._stop_event = None
+
+
+# Global relation index instance
+relation_index = DocumentRelationIndex()
@@ -0,0 +1,104 @@
+"""
+Cross-encoder reranking of retrieved chunks.
+"""
+import time
+from threading import Lock
+from typing import List, Dict, Any, Optional
+from cachetools import LRUCache
+from sentence_transformers import CrossEncoder
+
+from core.config import settings
+
+
+class CrossEncoderReranker:
+    """Rerank retrieval candidates with a multilingual cross-encoder."""
+
+    def __init__(self):
+        """Initialize reranker model and score cache."""
+        self.model = None
+        self._cache = LRUCache(maxsize=settings.RAG_RERANK_CACHE_SIZE)
+        self._cache_lock = Lock()
+        if settings.RAG_RERANK_ENABLED:
+            self._load_model()
+
+    def _load_model(self):
+        """Load cross-encoder model."""
+        try:
+            print(f"Loading reranker model: {settings.RERANKER_MODEL}")
+            self.model = CrossEncoder(settings.RERANKER_MODEL)
+            print("✓ Reranker model loaded")
+        except Exception as e:
+            print(f"⚠ Warning: Could not load reranker model: {e}")
+            print("⚠ Results will keep retrieval order")
+            self.model = None
+
+    def rerank(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        top_k: Optional[int] = None,
+        budget_ms: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder chunks by cross-encoder relevance to the query.
+
+        Candidates are scored in batches. If the latency budget runs out
+        before all candidates are scored, the original (retrieval) order is
+        returned instead, so reranking never stalls a request.
+
+        Args:
+            query: User query text
+            chunks: Retrieved chunks (best first), each with 'id' and 'content'
+            top_k: Number of chunks to return (default: RAG_RERANK_TOP_K)
+            budget_ms: Latency budget in milliseconds (default: RAG_RERANK_BUDGET_MS)
+
+        Returns:
+            Top-k chunks; reranked chunks carry a 'rerank_score'
+        """
+        top_k = top_k or settings.RAG_RERANK_TOP_K
+        budget_ms = budget_ms if budget_ms is not None else settings.RAG_RERANK_BUDGET_MS
+
+        if not chunks or self.model is None:
+            return chunks[:top_k]
+
+        deadline = time.perf_counter() + budget_ms / 1000
+        query_key = query.strip()
+
+        # Reuse cached scores for (query, chunk) pairs seen before
+        scores: Dict[str, float] = {}
+        pending = []
+        with self._cache_lock:
+            for chunk in chunks:
+                cached = self._cache.get((query_key, chunk["id"]))
+                if cached is None:
+                    pending.append(chunk)
+                else:
+                    scores[chunk["id"]] = cached
+
+        batch_size = settings.RAG_RERANK_BATCH_SIZE
+        for start in range(0, len(pending), batch_size):
+            if time.perf_counter() > deadline:
+                print(f"[RAG] Rerank budget of {budget_ms}ms exceeded, keeping retrieval order")
+                return chunks[:top_k]
+
+            batch = pending[start:start + batch_size]
+            batch_scores = self.model.predict(
+                [(query, chunk["content"]) for chunk in batch],
+                batch_size=batch_size,
+                show_progress_bar=False,
+            )
+
+            with self._cache_lock:
+                for chunk, score in zip(batch, batch_scores):
+                    scores[chunk["id"]] = float(score)
+                    self._cache[(query_key, chunk["id"])] = float(score)
+
+        ranked = sorted(chunks, key=lambda chunk: scores[chunk["id"]], reverse=True)
+        return [
+            {**chunk, "rerank_score": scores[chunk["id"]]}
+            for chunk in ranked[:top_k]
+        ]
+
+
+# Global reranker instance
+reranker = CrossEncoderReranker()
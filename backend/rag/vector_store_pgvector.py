@@ -9,12 +9,46 @@ from sqlalchemy import text, select
 from sqlalchemy.orm import Session
 
 from core.database import SessionLocal, engine
-from models.document import DocumentChunk
+from rag.embedding_versions import embedding_versions
 
 
 logger = logging.getLogger(__name__)
 
 
+# Columns returned by every chunk search. Sentence-window chunks carry their
+# parent section's offsets in metadata; the section is cut from the joined
+# document here, so small-to-big expansion needs no extra query.
+_RESULT_COLUMNS = """
+    c.id,
+    c.document_id,
+    c.chunk_index,
+    c.content,
+    c.metadata AS metadata_json,
+    d.title,
+    d.document_type,
+    d.source_url,
+    d.language,
+    CASE WHEN c.metadata->>'parent_end' IS NOT NULL THEN
+        substr(
+            d.full_text,
+            (c.metadata->>'parent_start')::int + 1,
+            (c.metadata->>'parent_end')::int - (c.metadata->>'parent_start')::int
+        )
+    END AS parent_content
+"""
+
+# Full-text query matching any term of the query text. websearch_to_tsquery
+# ANDs every word, so whole questions rarely matched; ts_rank_cd still ranks
+# chunks containing more of the terms first. Lexemes are quoted, so
+# tsquery operators in the text are matched as plain words.
+_ANY_TERM_QUERY = """
+    (
+        SELECT to_tsquery('simple', COALESCE(string_agg(quote_literal(lexeme), ' | '), '')) AS q
+        FROM unnest(tsvector_to_array(to_tsvector('simple', :query_text))) AS lexeme
+    ) AS terms
+"""
+
+
 class PgVectorStore:
     """Vector store using PostgreSQL with pgvector extension."""
     
@@ -58,41 +92,87 @@ class PgVectorStore:
         if not (len(ids) == len(embeddings) == len(documents) == len(metadatas)):
             raise ValueError("All input lists must have the same length")
         
+        # IDs have the format "doc_{doc_id}_chunk_{chunk_id}"
+        chunk_ids = [chunk_id_str.rsplit('_chunk_', 1)[-1] for chunk_id_str in ids]
+        updated = self.update_embeddings(chunk_ids, embeddings)
+        if updated < len(ids):
+            logger.warning(f"{len(ids) - updated} of {len(ids)} chunks not found in database")
+        logger.info(f"Added {updated} vectors to pgvector")
+    
+    def update_embeddings(self, chunk_ids: List[str], embeddings: List[List[float]]) -> int:
+        """
+        Set embeddings of many chunks with a single UPDATE.
+        
+        Args:
+            chunk_ids: Chunk UUIDs
+            embeddings: One vector per chunk
+        
+        Returns:
+            Number of chunks updated
+        """
+        if not chunk_ids:
+            return 0
+        
         db = SessionLocal()
         try:
-            for chunk_id_str, embedding, text, metadata in zip(ids, embeddings, documents, metadatas):
-                # Extract chunk_id from format "doc_{doc_id}_chunk_{chunk_id}"
-                try:
-                    chunk_id = int(chunk_id_str.split('_')[-1])
-                except:
-                    logger.warning(f"Could not parse chunk_id from {chunk_id_str}, skipping")
-                    continue
-                
-                # Update chunk with embedding
-                chunk = db.query(DocumentChunk).filter_by(id=chunk_id).first()
-                if chunk:
-                    # Convert embedding to PostgreSQL vector format
-                    embedding_array = np.array(embedding, dtype=np.float32)
-                    chunk.embedding = embedding_array.tolist()  # Store as list, SQLAlchemy will convert
-                    db.merge(chunk)
-                else:
-                    logger.warning(f"Chunk {chunk_id} not found in database")
-            
+            result = db.execute(
+                text("""
+                    UPDATE document_chunks AS c
+                    SET embedding = CAST(v.embedding AS vector)
+                    FROM unnest(CAST(:ids AS uuid[]), CAST(:embeddings AS text[])) AS v(id, embedding)
+                    WHERE c.id = v.id
+                """),
+                {
+                    "ids": [str(chunk_id) for chunk_id in chunk_ids],
+                    "embeddings": [self._to_pgvector(embedding) for embedding in embeddings],
+                }
+            )
             db.commit()
-            logger.info(f"Added {len(ids)} vectors to pgvector")
+            return result.rowcount
         
         except Exception as e:
-            logger.error(f"Error adding documents to pgvector: {e}")
+            logger.error(f"Error updating embeddings in pgvector: {e}")
             db.rollback()
             raise
         finally:
             db.close()
     
+    @staticmethod
+    def _vector_source(version: Optional[Dict[str, Any]]):
+        """
+        SQL pieces selecting the vectors of an embedding version.
+        
+        Args:
+            version: Version dict from embedding_versions (model_version None
+                for document_chunks.embedding)
+        
+        Returns:
+            (FROM clause, vector expression, WHERE condition, parameters)
+        """
+        if version is None or version['model_version'] is None:
+            return (
+                "document_chunks c JOIN documents d ON d.id = c.document_id",
+                "c.embedding",
+                "c.embedding IS NOT NULL",
+                {},
+            )
+        
+        # Same expression and predicate as the version's partial HNSW index
+        return (
+            "chunk_embeddings e "
+            "JOIN document_chunks c ON c.id = e.chunk_id "
+            "JOIN documents d ON d.id = c.document_id",
+            f"CAST(e.embedding AS vector({int(version['dimension'])}))",
+            "e.model_version = :model_version",
+            {"model_version": version['model_version']},
+        )
+    
     def search(
         self,
         query_embedding: List[float],
         limit: int = 10,
-        where: Optional[Dict[str, Any]] = None
+        where: Optional[Dict[str, Any]] = None,
+        version: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for similar vectors using cosine similarity.
@@ -101,54 +181,48 @@ class PgVectorStore:
             query_embedding: Query vector
             limit: Maximum number of results
             where: Optional metadata filters (not implemented yet)
+            version: Embedding version the query was encoded for
+                (default: the active version)
         
         Returns:
             List of results with 'id', 'document', 'metadata', 'distance'
         """
+        from_clause, vector, condition, params = self._vector_source(
+            version or embedding_versions.active()
+        )
+        
         db = SessionLocal()
         try:
-            # Convert query to numpy array
-            query_vec = np.array(query_embedding, dtype=np.float32)
+            # Convert query to pgvector text format
+            query_vec = self._to_pgvector(query_embedding)
             
             # Build SQL query with pgvector cosine distance
             # Using <=> operator for cosine distance (1 - cosine similarity)
             query = text("""
                 SELECT 
-                    id,
-                    document_id,
-                    chunk_index,
-                    content,
-                    metadata_json,
-                    1 - (embedding <=> :query_embedding::vector) as similarity,
-                    embedding <=> :query_embedding::vector as distance
-                FROM document_chunks
-                WHERE embedding IS NOT NULL
-                ORDER BY embedding <=> :query_embedding::vector
+                    {columns},
+                    {vector} <=> CAST(:query_embedding AS vector) AS distance
+                FROM {from_clause}
+                WHERE {condition}
+                ORDER BY {vector} <=> CAST(:query_embedding AS vector)
                 LIMIT :limit
-            """)
+            """.format(columns=_RESULT_COLUMNS, vector=vector, from_clause=from_clause, condition=condition))
             
             result = db.execute(
                 query,
                 {
-                    "query_embedding": query_vec.tolist(),
+                    **params,
+                    "query_embedding": query_vec,
                     "limit": limit
                 }
             )
             
             results = []
             for row in result:
-                results.append({
-                    'id': f"doc_{row.document_id}_chunk_{row.id}",
-                    'document': row.content,
-                    'metadata': {
-                        'chunk_id': str(row.id),
-                        'document_id': str(row.document_id),
-                        'chunk_index': row.chunk_index,
-                        **(row.metadata_json or {})
-                    },
-                    'distance': float(row.distance),
-                    'similarity': float(row.similarity)
-                })
+                item = self._row_to_result(row)
+                item['distance'] = float(row.distance)
+                item['similarity'] = 1 - float(row.distance)
+                results.append(item)
             
             logger.info(f"Found {len(results)} similar documents")
             return results
@@ -159,6 +233,152 @@ class PgVectorStore:
         finally:
             db.close()
     
+    def search_in_documents(
+        self,
+        query_embedding: List[float],
+        document_ids: List[str],
+        version: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the best-matching chunk within each of the given documents.
+        
+        Args:
+            query_embedding: Query vector
+            document_ids: Documents to search in
+            version: Embedding version the query was encoded for
+                (default: the active version)
+        
+        Returns:
+            One result per document (best first), same shape as search()
+        """
+        if not document_ids:
+            return []
+        
+        from_clause, vector, condition, params = self._vector_source(
+            version or embedding_versions.active()
+        )
+        
+        db = SessionLocal()
+        try:
+            query = text("""
+                SELECT * FROM (
+                    SELECT DISTINCT ON (c.document_id)
+                        {columns},
+                        {vector} <=> CAST(:query_embedding AS vector) AS distance
+                    FROM {from_clause}
+                    WHERE {condition}
+                      AND c.document_id = ANY(CAST(:document_ids AS uuid[]))
+                    ORDER BY c.document_id, distance
+                ) best
+                ORDER BY distance
+            """.format(columns=_RESULT_COLUMNS, vector=vector, from_clause=from_clause, condition=condition))
+            
+            result = db.execute(
+                query,
+                {
+                    **params,
+                    "query_embedding": self._to_pgvector(query_embedding),
+                    "document_ids": [str(doc_id) for doc_id in document_ids],
+                }
+            )
+            
+            results = []
+            for row in result:
+                item = self._row_to_result(row)
+                item['distance'] = float(row.distance)
+                item['similarity'] = 1 - float(row.distance)
+                results.append(item)
+            
+            return results
+        
+        except Exception as e:
+            logger.error(f"Error searching documents in pgvector: {e}")
+            return []
+        finally:
+            db.close()
+    
+    def lexical_search(
+        self,
+        query_text: str,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search chunks by exact terms using full-text and trigram indexes.
+        
+        Catches queries that cite article or order numbers ("მუხლი 168",
+        "Order 996"), which embeddings tend to blur. A chunk matches if it
+        contains any term of the query; chunks with more of them rank
+        higher.
+        
+        Args:
+            query_text: Raw query text
+            limit: Maximum number of results
+        
+        Returns:
+            List of results with 'id', 'document', 'metadata', 'rank', 'similarity'
+        """
+        if not query_text or not query_text.strip():
+            return []
+        
+        db = SessionLocal()
+        try:
+            query = text("""
+                SELECT
+                    {columns},
+                    ts_rank_cd(c.content_tsv, q) AS rank,
+                    word_similarity(:query_text, c.content) AS similarity
+                FROM document_chunks c
+                JOIN documents d ON d.id = c.document_id,
+                     {any_term_query}
+                WHERE c.content_tsv @@ q
+                   OR :query_text <% c.content
+                ORDER BY rank DESC, similarity DESC
+                LIMIT :limit
+            """.format(columns=_RESULT_COLUMNS, any_term_query=_ANY_TERM_QUERY))
+            
+            result = db.execute(query, {"query_text": query_text, "limit": limit})
+            
+            results = []
+            for row in result:
+                item = self._row_to_result(row)
+                item['rank'] = float(row.rank)
+                item['similarity'] = float(row.similarity)
+                results.append(item)
+            
+            logger.info(f"Found {len(results)} lexical matches")
+            return results
+        
+        except Exception as e:
+            logger.error(f"Error in lexical search: {e}")
+            return []
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _to_pgvector(embedding: List[float]) -> str:
+        """Format an embedding as a pgvector literal ('[x,y,...]')."""
+        values = np.asarray(embedding, dtype=np.float32)
+        return "[" + ",".join(repr(float(v)) for v in values) + "]"
+    
+    @staticmethod
+    def _row_to_result(row) -> Dict[str, Any]:
+        """Convert a chunk/document row into a search result dict."""
+        return {
+            'id': f"doc_{row.document_id}_chunk_{row.id}",
+            'document': row.content,
+            'parent_document': row.parent_content,
+            'metadata': {
+                **(row.metadata_json or {}),
+                'chunk_id': str(row.id),
+                'document_id': str(row.document_id),
+                'chunk_index': row.chunk_index,
+                'title': row.title,
+                'document_type': row.document_type,
+                'source_url': row.source_url,
+                'language': row.language,
+            },
+        }
+    
     def get_count(self) -> int:
         """Get total number of vectors in store."""
         db = SessionLocal()
@@ -172,7 +392,12 @@ class PgVectorStore:
             db.close()
     
     def delete_collection(self) -> None:
-        """Delete all vectors (clear embeddings)."""
+        """
+        Delete all vectors (clear embeddings).
+        
+        Leaves search without results until a reindex completes; to change
+        EMBEDDING_MODEL, migrate through rag.embedding_versions instead.
+        """
         db = SessionLocal()
         try:
             db.execute(
@@ -204,6 +429,36 @@ class PgVectorStore:
             db.rollback()
         finally:
             db.close()
+    
+    def create_text_search_index(self) -> None:
+        """Create full-text (tsvector) and trigram indexes for lexical search."""
+        db = SessionLocal()
+        try:
+            db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+            # 'simple' config: no stemming, so article numbers and Georgian
+            # terms are indexed verbatim
+            db.execute(text("""
+                ALTER TABLE document_chunks
+                ADD COLUMN IF NOT EXISTS content_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED;
+            """))
+            db.execute(text("""
+                CREATE INDEX IF NOT EXISTS document_chunks_content_tsv_idx
+                ON document_chunks
+                USING gin (content_tsv);
+            """))
+            db.execute(text("""
+                CREATE INDEX IF NOT EXISTS document_chunks_content_trgm_idx
+                ON document_chunks
+                USING gin (content gin_trgm_ops);
+            """))
+            db.commit()
+            logger.info("Created full-text and trigram indexes on document_chunks")
+        except Exception as e:
+            logger.error(f"Error creating text search indexes: {e}")
+            db.rollback()
+        finally:
+            db.close()
 
 
 # Global instance
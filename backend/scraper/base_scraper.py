@@ -1,21 +1,27 @@
 """
 Base scraper class with rate limiting and robots.txt handling.
 """
-import time
 import asyncio
 import logging
 from typing import Optional, List, Dict, Any
 from urllib.parse import urlparse, urljoin
-from urllib.robotparser import RobotFileParser
 import aiohttp
 from bs4 import BeautifulSoup
 
 from core.config import settings
+from scraper.http_cache import http_cache
+from scraper.http_client import read_text
+from scraper.rate_limiter import RateLimiter, rate_limiter
+from scraper.robots import robots_cache
 
 
 logger = logging.getLogger(__name__)
 
 
+# Retries of a request answered with 429/503
+MAX_THROTTLE_RETRIES = 3
+
+
 class BaseScraper:
     """Base scraper with common functionality."""
     
@@ -40,52 +46,30 @@ class BaseScraper:
         self.respect_robots = respect_robots if respect_robots is not None else settings.SCRAPER_RESPECT_ROBOTS_TXT
         self.user_agent = user_agent or settings.SCRAPER_USER_AGENT
         
-        self.last_request_time = 0
-        self.robot_parser = None
-        
-        if self.respect_robots:
-            self._init_robot_parser()
-    
-    def _init_robot_parser(self):
-        """Initialize robots.txt parser."""
-        try:
-            self.robot_parser = RobotFileParser()
-            robots_url = urljoin(self.base_url, '/robots.txt')
-            self.robot_parser.set_url(robots_url)
-            self.robot_parser.read()
-            logger.info(f"Loaded robots.txt from {robots_url}")
-        except Exception as e:
-            logger.warning(f"Failed to load robots.txt: {e}")
-            self.robot_parser = None
+        # Shared per-host limits, unless this scraper asks for its own delay
+        self.rate_limiter = rate_limiter if delay is None else RateLimiter(delay=delay)
+        self.http_cache = http_cache if settings.SCRAPER_HTTP_CACHE_ENABLED else None
+        # Fetch in full, ignoring cached copies (validators are still stored)
+        self.refresh = False
     
-    def can_fetch(self, url: str) -> bool:
+    async def can_fetch(self, url: str, session: Optional[aiohttp.ClientSession] = None) -> bool:
         """
         Check if URL can be fetched according to robots.txt.
         
+        robots.txt is fetched asynchronously and cached per host across
+        scraper instances.
+        
         Args:
             url: URL to check
+            session: aiohttp session used to fetch robots.txt (optional)
             
         Returns:
             True if URL can be fetched
         """
-        if not self.respect_robots or not self.robot_parser:
+        if not self.respect_robots:
             return True
         
-        try:
-            return self.robot_parser.can_fetch(self.user_agent, url)
-        except Exception as e:
-            logger.warning(f"Error checking robots.txt for {url}: {e}")
-            return True
-    
-    async def _wait_for_rate_limit(self):
-        """Wait if necessary to respect rate limiting."""
-        if self.delay > 0:
-            elapsed = time.time() - self.last_request_time
-            if elapsed < self.delay:
-                wait_time = self.delay - elapsed
-                await asyncio.sleep(wait_time)
-        
-        self.last_request_time = time.time()
+        return await robots_cache.can_fetch(url, self.user_agent, session)
     
     async def fetch_page(self, url: str, session: aiohttp.ClientSession) -> Optional[str]:
         """
@@ -96,31 +80,102 @@ class BaseScraper:
             session: aiohttp session
             
         Returns:
-            HTML content or None if failed
+            HTML content (the cached copy if unchanged) or None if failed
+        """
+        result = await self.fetch(url, session)
+        return result['body'] if result else None
+    
+    async def fetch(self, url: str, session: aiohttp.ClientSession) -> Optional[Dict[str, Any]]:
         """
-        if not self.can_fetch(url):
+        Fetch a page, revalidating the cached copy if there is one.
+        
+        Throttling responses (429/503) are retried after the host's pause.
+        A fresh response is not cached here: callers pass the result to
+        remember() once the page is processed, so a page that failed to
+        process is fetched in full again.
+        
+        Args:
+            url: URL to fetch
+            session: aiohttp session
+            
+        Returns:
+            Dict with 'body', 'not_modified' (True when the server answered
+            304; body is then the cached copy, or None without one), 'etag'
+            and 'last_modified', or None if failed
+        """
+        if not await self.can_fetch(url, session):
             logger.warning(f"URL blocked by robots.txt: {url}")
             return None
         
-        await self._wait_for_rate_limit()
+        validators = {} if self.refresh else self.conditional_headers(url)
+        headers = {'User-Agent': self.user_agent, **validators}
+        
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            async with self.rate_limiter.slot(url) as slot:
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        slot.record(response.status, response.headers.get('Retry-After'))
+                        if response.status == 304 and validators:
+                            body = self.http_cache.load(url) if self.http_cache else None
+                            if body is not None:
+                                self.http_cache.mark_validated(url)
+                            logger.info(f"Not modified: {url}")
+                            return {
+                                'body': body,
+                                'not_modified': True,
+                                'etag': response.headers.get('ETag'),
+                                'last_modified': response.headers.get('Last-Modified'),
+                            }
+                        if response.status == 200:
+                            content = await read_text(response)
+                            logger.info(f"Successfully fetched: {url}")
+                            return {
+                                'body': content,
+                                'not_modified': False,
+                                'etag': response.headers.get('ETag'),
+                                'last_modified': response.headers.get('Last-Modified'),
+                            }
+                        if slot.throttled and attempt < MAX_THROTTLE_RETRIES:
+                            # The limiter pauses the host before the retry
+                            logger.warning(f"Throttled fetching {url}: HTTP {response.status}, retrying")
+                            continue
+                        logger.warning(f"Failed to fetch {url}: HTTP {response.status}")
+                        return None
+                except asyncio.TimeoutError:
+                    logger.error(f"Timeout fetching {url}")
+                    return None
+                except Exception as e:
+                    logger.error(f"Error fetching {url}: {e}")
+                    return None
         
-        headers = {'User-Agent': self.user_agent}
+        return None
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Request headers revalidating an earlier fetch of a URL.
         
-        try:
-            async with session.get(url, headers=headers, timeout=30) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    logger.info(f"Successfully fetched: {url}")
-                    return content
-                else:
-                    logger.warning(f"Failed to fetch {url}: HTTP {response.status}")
-                    return None
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout fetching {url}")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+        Returns:
+            If-None-Match / If-Modified-Since headers, or {} to fetch in full
+        """
+        if self.http_cache:
+            return self.http_cache.conditional_headers(url)
+        return {}
+    
+    def remember(self, url: str, result: Dict[str, Any]):
+        """
+        Cache a fetched page once it has been processed.
+        
+        Args:
+            url: Fetched URL
+            result: Result of fetch()
+        """
+        if self.http_cache and not result['not_modified']:
+            self.http_cache.store(
+                url,
+                result['body'],
+                etag=result.get('etag'),
+                last_modified=result.get('last_modified'),
+            )
     
     def parse_html(self, html: str) -> BeautifulSoup:
         """
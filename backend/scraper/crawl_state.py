@@ -0,0 +1,242 @@
+"""
+Persistent crawl state for incremental scraping.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Buffered URL records written per transaction
+BATCH_SIZE = 500
+
+# URLs per membership query (SQLite caps the number of bound parameters)
+QUERY_CHUNK_SIZE = 500
+
+# Runs listed by summary()
+RECENT_RUNS = 30
+
+
+class CrawlState:
+    """
+    URLs fetched by earlier crawls and statistics of past runs.
+
+    A SQLite table indexed by URL keeps the last fetch time, content hash
+    and ETag of each page. Records are buffered and written in batches,
+    one transaction per batch in WAL mode, so a crash loses at most the
+    last unflushed batch. Membership checks are primary-key lookups: the
+    URL set is never loaded into memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = BATCH_SIZE):
+        """
+        Initialize crawl state.
+
+        Args:
+            path: SQLite database file (default: SCRAPER_STATE_PATH)
+            batch_size: Records buffered before they are written
+        """
+        self.path = path or settings.SCRAPER_STATE_PATH
+        self.batch_size = batch_size
+        self.pending: Dict[str, tuple] = {}
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Database connection, created with the tables on first use."""
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    fetched_at TEXT NOT NULL,
+                    content_hash TEXT,
+                    etag TEXT
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    documents_scraped INTEGER NOT NULL,
+                    pages_visited INTEGER NOT NULL
+                );
+            """)
+            self._connection.commit()
+        return self._connection
+
+    def record(
+        self,
+        url: str,
+        content_hash: Optional[str] = None,
+        etag: Optional[str] = None,
+        fetched_at: Optional[datetime] = None,
+    ):
+        """
+        Record a fetched URL, writing the buffer once it is full.
+
+        Args:
+            url: Fetched URL
+            content_hash: Hash of the page body (kept from the last record if None)
+            etag: ETag the server sent (kept from the last record if None)
+            fetched_at: Fetch time (default: now)
+        """
+        fetched_at = (fetched_at or datetime.utcnow()).isoformat()
+        with self._lock:
+            previous = self.pending.get(url)
+            if previous:
+                # Keep what the buffered record knew, as the write does
+                content_hash = content_hash if content_hash is not None else previous[2]
+                etag = etag if etag is not None else previous[3]
+            self.pending[url] = (url, fetched_at, content_hash, etag)
+            if len(self.pending) >= self.batch_size:
+                self._write()
+
+    def flush(self):
+        """Write buffered records in one transaction."""
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        """Write the buffer; the caller holds the lock."""
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                """
+                INSERT INTO urls (url, fetched_at, content_hash, etag)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    fetched_at = excluded.fetched_at,
+                    content_hash = COALESCE(excluded.content_hash, urls.content_hash),
+                    etag = COALESCE(excluded.etag, urls.etag)
+                """,
+                list(self.pending.values()),
+            )
+        self.pending = {}
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            if url in self.pending:
+                return True
+            row = self.connection.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def seen(self, urls: Iterable[str], since: Optional[datetime] = None) -> Set[str]:
+        """
+        Select the URLs fetched before.
+
+        Args:
+            urls: URLs to check
+            since: Only count fetches at or after this time
+
+        Returns:
+            Subset of urls present in the state (written or buffered)
+        """
+        urls = list(dict.fromkeys(urls))
+        since = since.isoformat() if since else ''
+        found = set()
+        with self._lock:
+            found.update(url for url in urls if url in self.pending and self.pending[url][1] >= since)
+            for start in range(0, len(urls), QUERY_CHUNK_SIZE):
+                chunk = urls[start:start + QUERY_CHUNK_SIZE]
+                rows = self.connection.execute(
+                    f"SELECT url FROM urls WHERE url IN ({','.join('?' * len(chunk))}) AND fetched_at >= ?",
+                    [*chunk, since],
+                )
+                found.update(url for url, in rows)
+        return found
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Last fetch of a URL, or None if never fetched."""
+        fields = ('url', 'fetched_at', 'content_hash', 'etag')
+        with self._lock:
+            pending = self.pending.get(url)
+            row = self.connection.execute(
+                "SELECT url, fetched_at, content_hash, etag FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if pending is None:
+            return dict(zip(fields, row)) if row else None
+        # A buffered record keeps the stored hash and ETag it does not replace
+        stored = dict(zip(fields, row or (None,) * len(fields)))
+        return {
+            field: value if value is not None else stored[field]
+            for field, value in zip(fields, pending)
+        }
+
+    def count(self) -> int:
+        """Number of URLs in the state."""
+        self.flush()
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def record_run(self, documents_scraped: int, pages_visited: int):
+        """Record scraping run statistics, writing buffered URLs first."""
+        with self._lock:
+            self._write()
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO runs (timestamp, documents_scraped, pages_visited) VALUES (?, ?, ?)",
+                    (datetime.utcnow().isoformat(), documents_scraped, pages_visited),
+                )
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals and recent runs.
+
+        Returns:
+            Dictionary with URL count, last run, all-time totals and the
+            most recent runs
+        """
+        urls = self.count()
+        with self._lock:
+            total_documents, total_pages = self.connection.execute(
+                "SELECT COALESCE(SUM(documents_scraped), 0), COALESCE(SUM(pages_visited), 0) FROM runs"
+            ).fetchone()
+            rows = self.connection.execute(
+                "SELECT timestamp, documents_scraped, pages_visited FROM runs ORDER BY id DESC LIMIT ?",
+                (RECENT_RUNS,),
+            ).fetchall()
+
+        runs: List[Dict[str, Any]] = [
+            {'timestamp': timestamp, 'documents_scraped': documents, 'pages_visited': pages}
+            for timestamp, documents, pages in reversed(rows)
+        ]
+        return {
+            'visited_urls': urls,
+            'last_run': runs[-1]['timestamp'] if runs else None,
+            'total_documents': total_documents,
+            'total_pages_scraped': total_pages,
+            'runs': runs,
+        }
+
+    def clear(self):
+        """Forget all URLs and runs."""
+        with self._lock:
+            self.pending = {}
+            with self.connection:
+                self.connection.execute("DELETE FROM urls")
+                self.connection.execute("DELETE FROM runs")
+
+    def close(self):
+        """Write buffered records and close the connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._write()
+                self._connection.close()
+                self._connection = None
+
+
+# Global crawl state instance
+crawl_state = CrawlState()
@@ -3,11 +3,13 @@ Enhanced InfoHub scraper with document type priorities.
 Scrapes legislative documents, orders, guidelines, and case law.
 """
 import asyncio
+import itertools
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+import time
+from typing import Any, List, Dict, Optional
 
 from scraper.firecrawl_scraper import FirecrawlScraper
+from core.config import settings
 from core.database import SessionLocal
 from sqlalchemy.orm import Session
 
@@ -91,8 +93,96 @@ KEY_DOCUMENT_SEARCHES = {
 }
 
 
+# Document types crawled per priority tier
+PRIORITY_TIERS = {
+    'high': [
+        'საქართველოს კანონი',  # Laws (Tax Code)
+        'ბრძანება',  # Orders (Order 996)
+        'მთავრობის დადგენილება',  # Government resolutions
+    ],
+    'medium': [
+        'მეთოდური მითითება',  # Methodological guidelines
+        'სიტუაციური სახელმძღვანელო',  # Situational guidelines
+        'ბრძანება ინსტრუქციების დამტკიცების შესახებ',  # Instruction orders
+    ],
+    'low': [
+        'უზენაესი სასამართლოს გადაწყვეტილება',  # Supreme court
+        'ფინანსთა სამინისტროს დავების გადაწყვეტილება',  # Ministry decisions
+    ],
+}
+
+# Key documents outrank every other document of their type
+KEY_DOCUMENT_BONUS = 10
+
+# Listings are newest first: the first FRESHNESS_HORIZON documents of a
+# type get up to FRESHNESS_WEIGHT extra priority, decreasing with rank
+FRESHNESS_WEIGHT = 10
+FRESHNESS_HORIZON = 200
+
+# Documents per listing page
+LISTING_PAGE_SIZE = 40
+
+
+def freshness_bonus(rank: int) -> float:
+    """Priority bonus of the rank-th (0-based) document of a newest-first listing."""
+    return FRESHNESS_WEIGHT * max(0.0, 1 - rank / FRESHNESS_HORIZON)
+
+
+def document_links(result: Optional[Dict]) -> List[str]:
+    """InfoHub document links of a Firecrawl result."""
+    if not result or 'data' not in result:
+        return []
+    links = result['data'].get('links', [])
+    return list(dict.fromkeys(
+        link for link in links
+        if 'infohub.rs.ge' in link and '/document/' in link
+    ))
+
+
+class CrawlScheduler:
+    """
+    Global priority queue of crawl tasks.
+    
+    Tasks are search pages, listing pages and documents; the highest
+    score is fetched first (ties in submission order) and every URL is
+    scheduled at most once.
+    """
+    
+    def __init__(self):
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.scheduled = set()
+        self._sequence = itertools.count()
+    
+    def push(self, kind: str, url: str, score: float, **info: Any) -> bool:
+        """
+        Schedule a task.
+        
+        Args:
+            kind: 'search', 'listing' or 'document'
+            url: URL to fetch
+            score: Priority (higher is fetched first)
+            **info: Task details passed to the handler
+            
+        Returns:
+            True if scheduled, False if the URL already was
+        """
+        if url in self.scheduled:
+            return False
+        self.scheduled.add(url)
+        self.queue.put_nowait((-score, next(self._sequence), {'kind': kind, 'url': url, 'score': score, **info}))
+        return True
+
+
 class EnhancedInfoHubScraper:
-    """Enhanced scraper with document type awareness and prioritization."""
+    """
+    Enhanced scraper with document type awareness and prioritization.
+    
+    Key-document searches, listing pages and documents of all types share
+    one priority queue, scored by DOCUMENT_PRIORITY plus a freshness bonus
+    for recently published/amended documents. A pool of workers consumes
+    it under the Firecrawl client's rate budget, so a time-budgeted crawl
+    spends its time on the most valuable documents first.
+    """
     
     def __init__(self, api_key: str):
         self.firecrawl = FirecrawlScraper(api_key)
@@ -101,6 +191,10 @@ class EnhancedInfoHubScraper:
             'by_priority': {'high': 0, 'medium': 0, 'low': 0},
             'total': 0,
         }
+        self.key_documents: List[Dict] = []
+        self.tasks_done = 0
+        self.tasks_skipped = 0
+        self._types: Dict[str, Dict] = {}
     
     def get_document_priority(self, doc_type: str) -> int:
         """Get priority weight for document type."""
@@ -114,269 +208,242 @@ class EnhancedInfoHubScraper:
             return 'medium'
         return 'low'
     
-    async def search_key_documents(self, db: Session) -> List[Dict]:
+    def seed(self, scheduler: CrawlScheduler, base_url: str, limits: Dict[str, int]):
         """
-        Search and scrape key foundational documents.
+        Schedule key-document searches and the first listing page of each type.
         
-        Returns:
-            List of scraped document URLs
+        Args:
+            scheduler: Crawl scheduler
+            base_url: InfoHub base URL
+            limits: Maximum documents per type, by tier
         """
-        logger.info("Searching for key foundational documents...")
-        found_documents = []
-        
         for doc_key, doc_info in KEY_DOCUMENT_SEARCHES.items():
-            logger.info(f"Searching for {doc_key}: {doc_info['query']}")
-            
-            # Use Firecrawl to search InfoHub
-            search_url = f"https://infohub.rs.ge/ka?search={doc_info['query']}"
-            
-            try:
-                result = self.firecrawl.scrape_url(search_url, formats=["markdown", "links"])
-                
-                if result and 'data' in result:
-                    data = result['data']
-                    links = data.get('links', [])
-                    
-                    # Filter document links
-                    doc_links = [
-                        link for link in links
-                        if 'infohub.rs.ge' in link and '/document/' in link
-                    ]
-                    
-                    logger.info(f"Found {len(doc_links)} links for {doc_key}")
-                    
-                    # Scrape first relevant document
-                    for doc_url in doc_links[:3]:  # Check first 3 results
-                        doc_result = self.firecrawl.scrape_url(doc_url)
-                        
-                        if doc_result and 'data' in doc_result:
-                            doc_data = doc_result['data']
-                            markdown = doc_data.get('markdown', '')
-                            
-                            # Process document
-                            metadata = {
-                                'key_document': doc_key,
-                                'search_query': doc_info['query'],
-                                'priority': doc_info['priority'],
-                                'document_type': doc_info['type'],
-                            }
-                            
-                            document = await self.firecrawl.process_document(
-                                doc_url,
-                                markdown,
-                                metadata,
-                                db
-                            )
-                            
-                            if document:
-                                found_documents.append({
-                                    'key': doc_key,
-                                    'url': doc_url,
-                                    'title': document.title,
-                                    'type': doc_info['type'],
-                                })
-                                logger.info(f"✓ Scraped {doc_key}: {document.title}")
-                                break
-                        
-                        await asyncio.sleep(2)  # Rate limiting
-                
-            except Exception as e:
-                logger.error(f"Error searching for {doc_key}: {e}")
-                continue
-            
-            await asyncio.sleep(3)  # Rate limiting between searches
+            scheduler.push(
+                'search',
+                f"https://infohub.rs.ge/ka?search={doc_info['query']}",
+                doc_info['priority'] + KEY_DOCUMENT_BONUS,
+                key=doc_key,
+            )
         
-        return found_documents
+        for tier, doc_types in PRIORITY_TIERS.items():
+            for doc_type_ka in doc_types:
+                doc_type = DOCUMENT_TYPE_MAP.get(doc_type_ka, 'unknown')
+                self._types[doc_type_ka] = {
+                    'type': doc_type,
+                    'priority': self.get_document_priority(doc_type),
+                    'limit': limits[tier],
+                    'url': f"{base_url}?documentType={doc_type_ka}",
+                    'queued': 0,  # documents scheduled and not failed
+                    'next_page': 1,  # None once the listing is exhausted
+                    'listing_pending': False,
+                }
+                self._schedule_listing(scheduler, doc_type_ka)
     
-    async def scrape_by_document_type(
-        self,
-        base_url: str,
-        document_type_filter: str,
-        max_documents: int = 50,
-        db: Session = None
-    ) -> List[Dict]:
-        """
-        Scrape documents filtered by document type.
+    def _schedule_listing(self, scheduler: CrawlScheduler, doc_type_ka: str):
+        """Schedule the next listing page of a type while it needs documents."""
+        state = self._types[doc_type_ka]
+        if state['listing_pending'] or state['next_page'] is None or state['queued'] >= state['limit']:
+            return
         
-        Args:
-            base_url: InfoHub base URL
-            document_type_filter: Georgian document type name
-            max_documents: Maximum documents to scrape
-            db: Database session
-        
-        Returns:
-            List of scraped documents
-        """
-        doc_type_en = DOCUMENT_TYPE_MAP.get(document_type_filter, 'unknown')
-        priority = self.get_document_priority(doc_type_en)
-        priority_class = self.classify_priority(priority)
+        page = state['next_page']
+        rank = (page - 1) * LISTING_PAGE_SIZE
+        if scheduler.push(
+            'listing',
+            f"{state['url']}&page={page}",
+            state['priority'] + freshness_bonus(rank),
+            doc_type_ka=doc_type_ka,
+            page=page,
+        ):
+            state['listing_pending'] = True
+            state['next_page'] = page + 1
+    
+    async def _search(self, scheduler: CrawlScheduler, task: Dict):
+        """Schedule the top results of a key-document search."""
+        doc_info = KEY_DOCUMENT_SEARCHES[task['key']]
+        result = await self.firecrawl.scrape_url(task['url'], formats=["markdown", "links"])
+        links = document_links(result)
+        logger.info(f"Found {len(links)} links for {task['key']}")
         
-        logger.info(f"Scraping {document_type_filter} (priority: {priority_class}/{priority})")
+        for i, doc_url in enumerate(links[:3]):  # Check first 3 results
+            scheduler.push(
+                'document',
+                doc_url,
+                task['score'] - i,
+                key=task['key'],
+                metadata={
+                    'key_document': task['key'],
+                    'search_query': doc_info['query'],
+                    'priority': doc_info['priority'],
+                    'document_type': doc_info['type'],
+                },
+            )
+    
+    async def _listing(self, scheduler: CrawlScheduler, task: Dict):
+        """Schedule the documents of a listing page and the next page."""
+        doc_type_ka = task['doc_type_ka']
+        state = self._types[doc_type_ka]
+        state['listing_pending'] = False
         
-        # Build search URL with document type filter
-        search_url = f"{base_url}?documentType={document_type_filter}"
+        result = await self.firecrawl.scrape_url(task['url'], formats=["markdown", "links"])
+        links = document_links(result)
+        if not links:
+            state['next_page'] = None
+            return
         
-        scraped_docs = []
-        page = 1
-        docs_count = 0
+        logger.info(f"{doc_type_ka} page {task['page']}: found {len(links)} documents")
         
-        while docs_count < max_documents:
-            paginated_url = f"{search_url}&page={page}"
-            
-            try:
-                result = self.firecrawl.scrape_url(paginated_url, formats=["markdown", "links"])
-                
-                if not result or 'data' not in result:
-                    break
-                
-                data = result['data']
-                links = data.get('links', [])
-                
-                # Extract document links
-                doc_links = [
-                    link for link in links
-                    if 'infohub.rs.ge' in link and '/document/' in link
-                ]
-                
-                if not doc_links:
-                    break
-                
-                logger.info(f"Page {page}: found {len(doc_links)} documents")
-                
-                # Scrape individual documents
-                for doc_url in doc_links:
-                    if docs_count >= max_documents:
-                        break
-                    
-                    try:
-                        doc_result = self.firecrawl.scrape_url(doc_url)
-                        
-                        if doc_result and 'data' in doc_result:
-                            doc_data = doc_result['data']
-                            markdown = doc_data.get('markdown', '')
-                            
-                            metadata = {
-                                'document_type_ka': document_type_filter,
-                                'document_type': doc_type_en,
-                                'priority': priority,
-                                'priority_class': priority_class,
-                            }
-                            
-                            document = await self.firecrawl.process_document(
-                                doc_url,
-                                markdown,
-                                metadata,
-                                db
-                            )
-                            
-                            if document:
-                                scraped_docs.append({
-                                    'url': doc_url,
-                                    'title': document.title,
-                                    'type': doc_type_en,
-                                    'priority': priority,
-                                })
-                                docs_count += 1
-                                
-                                # Update stats
-                                self.stats['by_type'][doc_type_en] = self.stats['by_type'].get(doc_type_en, 0) + 1
-                                self.stats['by_priority'][priority_class] += 1
-                                self.stats['total'] += 1
-                        
-                        await asyncio.sleep(1)  # Rate limiting
-                    
-                    except Exception as e:
-                        logger.error(f"Error scraping document {doc_url}: {e}")
-                        continue
-                
-                page += 1
-                await asyncio.sleep(2)  # Rate limiting between pages
-            
-            except Exception as e:
-                logger.error(f"Error scraping page {page}: {e}")
+        rank = (task['page'] - 1) * LISTING_PAGE_SIZE
+        for i, doc_url in enumerate(links):
+            if state['queued'] >= state['limit']:
                 break
+            if scheduler.push(
+                'document',
+                doc_url,
+                state['priority'] + freshness_bonus(rank + i),
+                doc_type_ka=doc_type_ka,
+                metadata={
+                    'document_type_ka': doc_type_ka,
+                    'document_type': state['type'],
+                    'priority': state['priority'],
+                    'priority_class': self.classify_priority(state['priority']),
+                },
+            ):
+                state['queued'] += 1
+        
+        self._schedule_listing(scheduler, doc_type_ka)
+    
+    async def _document(self, scheduler: CrawlScheduler, task: Dict, db: Session):
+        """Scrape and store one document."""
+        key = task.get('key')
+        if key and any(doc['key'] == key for doc in self.key_documents):
+            return  # an earlier result already provided this key document
+        
+        document = None
+        doc_result = await self.firecrawl.scrape_url(task['url'])
+        if doc_result and 'data' in doc_result:
+            document = await self.firecrawl.process_document(
+                task['url'],
+                doc_result['data'].get('markdown', ''),
+                dict(task['metadata']),
+                db
+            )
+        
+        if key:
+            # Another worker may have found the key document meanwhile
+            if document and not any(doc['key'] == key for doc in self.key_documents):
+                doc_info = KEY_DOCUMENT_SEARCHES[key]
+                self.key_documents.append({
+                    'key': key,
+                    'url': task['url'],
+                    'title': document.title,
+                    'type': doc_info['type'],
+                })
+                logger.info(f"✓ Scraped {key}: {document.title}")
+            return
         
-        return scraped_docs
+        doc_type_ka = task['doc_type_ka']
+        if document:
+            doc_type = task['metadata']['document_type']
+            self.stats['by_type'][doc_type] = self.stats['by_type'].get(doc_type, 0) + 1
+            self.stats['by_priority'][task['metadata']['priority_class']] += 1
+            self.stats['total'] += 1
+        else:
+            # Free the slot for another document of this type
+            self._types[doc_type_ka]['queued'] -= 1
+            self._schedule_listing(scheduler, doc_type_ka)
+    
+    async def _worker(self, scheduler: CrawlScheduler, deadline: float):
+        """Run tasks from the queue, highest score first, until the deadline."""
+        handlers = {'search': self._search, 'listing': self._listing}
+        
+        # A session must not be shared between concurrent workers
+        db = SessionLocal()
+        try:
+            while True:
+                _, _, task = await scheduler.queue.get()
+                try:
+                    if time.monotonic() >= deadline:
+                        self.tasks_skipped += 1
+                    elif task['kind'] == 'document':
+                        await self._document(scheduler, task, db)
+                        self.tasks_done += 1
+                    else:
+                        await handlers[task['kind']](scheduler, task)
+                        self.tasks_done += 1
+                except Exception as e:
+                    logger.error(f"Error in {task['kind']} task {task['url']}: {e}")
+                finally:
+                    scheduler.queue.task_done()
+        finally:
+            db.close()
     
     async def scrape_priority_documents(
         self,
         base_url: str = "https://infohub.rs.ge/ka",
         high_priority_limit: int = 100,
         medium_priority_limit: int = 50,
-        low_priority_limit: int = 20
+        low_priority_limit: int = 20,
+        time_budget: Optional[float] = None,
+        concurrency: Optional[int] = None,
     ) -> Dict:
         """
-        Scrape documents by priority: high priority first.
+        Scrape documents by priority: highest-value tasks first, concurrently.
+        
+        Args:
+            base_url: InfoHub base URL
+            high_priority_limit: Maximum documents per high-priority type
+            medium_priority_limit: Maximum documents per medium-priority type
+            low_priority_limit: Maximum documents per low-priority type
+            time_budget: Seconds after which no new task is started (default: no limit)
+            concurrency: Worker count (default: FIRECRAWL_CONCURRENCY)
         
         Returns:
             Summary statistics
         """
-        db = SessionLocal()
+        scheduler = CrawlScheduler()
+        self.seed(scheduler, base_url, {
+            'high': high_priority_limit,
+            'medium': medium_priority_limit,
+            'low': low_priority_limit,
+        })
         
-        try:
-            # Step 1: Search for key foundational documents
-            logger.info("=== STEP 1: Searching key documents ===")
-            key_docs = await self.search_key_documents(db)
-            logger.info(f"Found {len(key_docs)} key documents")
-            
-            # Step 2: Scrape high-priority document types
-            logger.info("=== STEP 2: Scraping high-priority documents ===")
-            high_priority_types = [
-                'საქართველოს კანონი',  # Laws (Tax Code)
-                'ბრძანება',  # Orders (Order 996)
-                'მთავრობის დადგენილება',  # Government resolutions
-            ]
-            
-            for doc_type in high_priority_types:
-                await self.scrape_by_document_type(
-                    base_url,
-                    doc_type,
-                    max_documents=high_priority_limit,
-                    db=db
-                )
-            
-            # Step 3: Scrape medium-priority document types
-            logger.info("=== STEP 3: Scraping medium-priority documents ===")
-            medium_priority_types = [
-                'მეთოდური მითითება',  # Methodological guidelines
-                'სიტუაციური სახელმძღვანელო',  # Situational guidelines
-                'ბრძანება ინსტრუქციების დამტკიცების შესახებ',  # Instruction orders
-            ]
-            
-            for doc_type in medium_priority_types:
-                await self.scrape_by_document_type(
-                    base_url,
-                    doc_type,
-                    max_documents=medium_priority_limit,
-                    db=db
-                )
-            
-            # Step 4: Scrape low-priority document types (case law)
-            logger.info("=== STEP 4: Scraping low-priority documents ===")
-            low_priority_types = [
-                'უზენაესი სასამართლოს გადაწყვეტილება',  # Supreme court
-                'ფინანსთა სამინისტროს დავების გადაწყვეტილება',  # Ministry decisions
-            ]
-            
-            for doc_type in low_priority_types:
-                await self.scrape_by_document_type(
-                    base_url,
-                    doc_type,
-                    max_documents=low_priority_limit,
-                    db=db
-                )
-            
-            logger.info("=== SCRAPING COMPLETE ===")
-            logger.info(f"Total documents: {self.stats['total']}")
-            logger.info(f"High priority: {self.stats['by_priority']['high']}")
-            logger.info(f"Medium priority: {self.stats['by_priority']['medium']}")
-            logger.info(f"Low priority: {self.stats['by_priority']['low']}")
-            logger.info(f"By type: {self.stats['by_type']}")
-            
-            return {
-                'key_documents': key_docs,
-                'statistics': self.stats,
-            }
+        started = time.monotonic()
+        deadline = started + time_budget if time_budget is not None else float('inf')
+        concurrency = concurrency or settings.FIRECRAWL_CONCURRENCY
+        
+        workers = [
+            asyncio.create_task(self._worker(scheduler, deadline))
+            for _ in range(concurrency)
+        ]
         
+        try:
+            await scheduler.queue.join()
         finally:
-            db.close()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        elapsed = time.monotonic() - started
+        minutes = elapsed / 60 if elapsed else 0
+        self.stats['elapsed_seconds'] = round(elapsed, 1)
+        self.stats['documents_per_minute'] = round(self.stats['total'] / minutes, 1) if minutes else 0.0
+        self.stats['high_priority_per_minute'] = (
+            round(self.stats['by_priority']['high'] / minutes, 1) if minutes else 0.0
+        )
+        self.stats['tasks_done'] = self.tasks_done
+        self.stats['tasks_skipped'] = self.tasks_skipped
+        
+        logger.info("=== SCRAPING COMPLETE ===")
+        logger.info(f"Key documents: {len(self.key_documents)}")
+        logger.info(f"Total documents: {self.stats['total']} ({self.stats['documents_per_minute']}/min)")
+        logger.info(f"High priority: {self.stats['by_priority']['high']}")
+        logger.info(f"Medium priority: {self.stats['by_priority']['medium']}")
+        logger.info(f"Low priority: {self.stats['by_priority']['low']}")
+        logger.info(f"By type: {self.stats['by_type']}")
+        if self.tasks_skipped:
+            logger.info(f"Time budget reached: {self.tasks_skipped} tasks not run")
+        
+        return {
+            'key_documents': self.key_documents,
+            'statistics': self.stats,
+        }
@@ -0,0 +1,245 @@
+"""
+Asynchronous Firecrawl API client.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from core.config import settings
+from scraper.http_client import http_client, read_text
+from scraper.rate_limiter import RateLimiter, THROTTLE_STATUSES
+
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses worth retrying besides throttling
+RETRY_STATUSES = (408, 500, 502, 504)
+
+# First retry delay in seconds, doubled on every attempt
+RETRY_BACKOFF = 1.0
+
+# Firecrawl renders the page before answering
+REQUEST_TIMEOUT = 60.0
+
+# Job statuses after which polling stops
+FINISHED_JOB_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class FirecrawlError(Exception):
+    """Firecrawl request or job failed."""
+
+
+class FirecrawlClient:
+    """
+    Firecrawl v2 API client on the shared aiohttp session.
+
+    Requests run through a rate limiter of their own, which bounds the
+    number of calls in flight to FIRECRAWL_CONCURRENCY and pauses on 429.
+    Throttled, timed out and 5xx calls are retried with exponential backoff.
+    Many URLs are best scraped as one batch job (or a crawl job), which
+    Firecrawl renders in parallel on its side while the client polls.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        """
+        Initialize Firecrawl client.
+
+        Args:
+            api_key: Firecrawl API key
+            base_url: API root (default: FIRECRAWL_API_URL)
+            concurrency: Most calls in flight (default: FIRECRAWL_CONCURRENCY)
+            max_retries: Retries of a failed call (default: FIRECRAWL_MAX_RETRIES)
+            poll_interval: Seconds between job status polls (default: FIRECRAWL_POLL_INTERVAL)
+        """
+        self.base_url = (base_url or settings.FIRECRAWL_API_URL).rstrip('/')
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self.max_retries = max_retries if max_retries is not None else settings.FIRECRAWL_MAX_RETRIES
+        self.poll_interval = poll_interval if poll_interval is not None else settings.FIRECRAWL_POLL_INTERVAL
+        self.rate_limiter = RateLimiter(
+            delay=0,
+            max_concurrency=concurrency or settings.FIRECRAWL_CONCURRENCY,
+            adaptive=False,
+        )
+
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Call an API endpoint, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            path: Endpoint path (e.g. "/scrape") or absolute URL
+            payload: JSON body
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            FirecrawlError: If the call failed permanently or ran out of retries
+        """
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+        error = None
+
+        for attempt in range(self.max_retries + 1):
+            async with self.rate_limiter.slot(self.base_url) as slot:
+                try:
+                    async with http_client.session().request(
+                        method,
+                        url,
+                        headers=self.headers,
+                        json=payload,
+                        timeout=aiohttp.ClientTimeout(
+                            total=None,
+                            connect=settings.SCRAPER_CONNECT_TIMEOUT,
+                            sock_read=REQUEST_TIMEOUT,
+                        ),
+                    ) as response:
+                        slot.record(response.status, response.headers.get("Retry-After"))
+                        body = await read_text(response)
+
+                        if response.status < 400:
+                            return json.loads(body)
+
+                        error = FirecrawlError(f"{method} {url}: HTTP {response.status}: {body[:200]}")
+                        if response.status not in THROTTLE_STATUSES + RETRY_STATUSES:
+                            raise error
+
+                except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+                    slot.record(None)
+                    error = FirecrawlError(f"{method} {url}: {e}")
+
+            if attempt < self.max_retries:
+                # Throttled calls already wait for the limiter's pause
+                delay = 0 if slot.throttled else RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"{error}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay * random.uniform(1, 1.5))
+
+        raise error
+
+    async def scrape(self, url: str, formats: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Scrape one URL.
+
+        Args:
+            url: URL to scrape
+            formats: Formats to return (markdown, html, links, ...)
+
+        Returns:
+            API response ({'success': ..., 'data': {...}})
+        """
+        return await self.request("POST", "/scrape", {
+            "url": url,
+            "formats": formats or ["markdown", "links"],
+        })
+
+    async def batch_scrape(
+        self,
+        urls: List[str],
+        formats: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Scrape many URLs as one batch job and wait for the results.
+
+        Args:
+            urls: URLs to scrape
+            formats: Formats to return
+            timeout: Seconds to wait for the job (default: FIRECRAWL_JOB_TIMEOUT)
+
+        Returns:
+            Scraped pages; page['metadata']['sourceURL'] is the requested URL
+        """
+        if not urls:
+            return []
+
+        job = await self.request("POST", "/batch/scrape", {
+            "urls": urls,
+            "formats": formats or ["markdown", "links"],
+        })
+        return await self.wait_for_job("/batch/scrape", job['id'], timeout)
+
+    async def crawl(
+        self,
+        url: str,
+        limit: int,
+        include_paths: Optional[List[str]] = None,
+        formats: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Crawl a site as one job and wait for the results.
+
+        Args:
+            url: Start URL
+            limit: Most pages to crawl
+            include_paths: Path regexes a page must match to be crawled
+            formats: Formats to return
+            timeout: Seconds to wait for the job (default: FIRECRAWL_JOB_TIMEOUT)
+
+        Returns:
+            Crawled pages
+        """
+        payload = {
+            "url": url,
+            "limit": limit,
+            "scrapeOptions": {"formats": formats or ["markdown", "links"]},
+        }
+        if include_paths:
+            payload["includePaths"] = include_paths
+
+        job = await self.request("POST", "/crawl", payload)
+        return await self.wait_for_job("/crawl", job['id'], timeout)
+
+    async def wait_for_job(self, endpoint: str, job_id: str, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Poll a batch-scrape or crawl job until it finishes.
+
+        Args:
+            endpoint: Job endpoint ("/batch/scrape" or "/crawl")
+            job_id: Job ID returned on submission
+            timeout: Seconds to wait (default: FIRECRAWL_JOB_TIMEOUT)
+
+        Returns:
+            All pages of the job, following result pagination
+
+        Raises:
+            FirecrawlError: If the job failed or did not finish in time
+        """
+        deadline = time.monotonic() + (timeout or settings.FIRECRAWL_JOB_TIMEOUT)
+        path = f"{endpoint}/{job_id}"
+
+        while True:
+            status = await self.request("GET", path)
+            if status.get('status') in FINISHED_JOB_STATUSES:
+                break
+            if time.monotonic() >= deadline:
+                raise FirecrawlError(f"Job {job_id} not finished after {timeout or settings.FIRECRAWL_JOB_TIMEOUT}s")
+
+            logger.info(f"Job {job_id}: {status.get('completed', 0)}/{status.get('total', '?')} pages")
+            await asyncio.sleep(self.poll_interval)
+
+        if status['status'] != 'completed':
+            raise FirecrawlError(f"Job {job_id} {status['status']}")
+
+        pages = list(status.get('data') or [])
+        # Large results are split into pages linked by "next"
+        while status.get('next'):
+            status = await self.request("GET", status['next'])
+            pages.extend(status.get('data') or [])
+
+        return pages
@@ -6,14 +6,14 @@ import logging
 import hashlib
 from typing import List, Dict, Optional
 from datetime import datetime
-import requests
 from sqlalchemy.orm import Session
 
 from core.database import SessionLocal
-from models.document import Document, DocumentChunk
+from models.document import Document
 from rag.embeddings import embeddings_generator
-from rag.vector_store import vector_store
-from core.config import settings
+from processor.legal_chunker import legal_chunker
+from processor.document_writer import document_writer
+from scraper.firecrawl_client import FirecrawlClient, FirecrawlError
 
 
 logger = logging.getLogger(__name__)
@@ -22,17 +22,13 @@ logger = logging.getLogger(__name__)
 class FirecrawlScraper:
     """Scraper using Firecrawl API for JavaScript-rendered sites."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, concurrency: Optional[int] = None):
         self.api_key = api_key
-        self.base_url = "https://api.firecrawl.dev/v2"
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        self.client = FirecrawlClient(api_key, base_url=base_url, concurrency=concurrency)
         self.documents_scraped = 0
         self.pages_scraped = 0
     
-    def scrape_url(self, url: str, formats: List[str] = None) -> Dict:
+    async def scrape_url(self, url: str, formats: List[str] = None) -> Optional[Dict]:
         """
         Scrape a single URL using Firecrawl.
         
@@ -43,25 +39,37 @@ class FirecrawlScraper:
         Returns:
             Dictionary with scraped data
         """
-        if formats is None:
-            formats = ["markdown", "links"]
-        
         try:
-            response = requests.post(
-                f"{self.base_url}/scrape",
-                headers=self.headers,
-                json={
-                    "url": url,
-                    "formats": formats
-                },
-                timeout=60
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
+            return await self.client.scrape(url, formats)
+        except FirecrawlError as e:
             logger.error(f"Error scraping {url}: {e}")
             return None
     
+    async def scrape_urls(self, urls: List[str], formats: List[str] = None) -> Dict[str, Dict]:
+        """
+        Scrape many URLs as one Firecrawl batch job.
+        
+        Args:
+            urls: URLs to scrape
+            formats: List of formats to return
+            
+        Returns:
+            Scraped page data keyed by requested URL (failed URLs are missing)
+        """
+        try:
+            pages = await self.client.batch_scrape(urls, formats)
+        except FirecrawlError as e:
+            logger.error(f"Error batch scraping {len(urls)} URLs: {e}")
+            return {}
+        
+        results = {}
+        for data in pages:
+            metadata = data.get('metadata', {})
+            url = metadata.get('sourceURL') or metadata.get('url')
+            if url and not metadata.get('error'):
+                results[url] = data
+        return results
+    
     def detect_language(self, text: str) -> str:
         """Detect language (Georgian, Russian, English)."""
         import re
@@ -71,35 +79,6 @@ class FirecrawlScraper:
             return 'ru'
         return 'en'
     
-    def chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
-        """Split text into chunks."""
-        chunk_size = chunk_size or settings.RAG_CHUNK_SIZE
-        overlap = overlap or settings.RAG_CHUNK_OVERLAP
-        
-        if len(text) <= chunk_size:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to break at sentence boundary
-            if end < len(text):
-                for i in range(end, max(start + overlap, start), -1):
-                    if text[i] in '.!?\n':
-                        end = i + 1
-                        break
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            start = end - overlap
-        
-        return chunks
-    
     async def process_document(
         self,
         url: str,
@@ -123,7 +102,17 @@ class FirecrawlScraper:
             # Check if exists
             existing = db.query(Document).filter_by(source_url=url).first()
             if existing:
-                logger.info(f"Document already exists: {url}")
+                if existing.file_hash == content_hash:
+                    logger.info(f"Document unchanged: {url}")
+                else:
+                    # Content changed: re-embed only the chunks that differ
+                    document_writer.reindex(
+                        db,
+                        existing,
+                        markdown_content,
+                        content_hash,
+                        encode=embeddings_generator.encode if embeddings_generator.model else None,
+                    )
                 return existing
             
             # Extract title from markdown content
@@ -159,68 +148,31 @@ class FirecrawlScraper:
                 'firecrawl': True,
             }
             
-            document = Document(
-                title=title,
-                document_type='guideline',  # InfoHub documents are tax guidelines
-                language=language,
-                source_url=url,
-                full_text=markdown_content,
-                file_hash=content_hash,
-                metadata_json=doc_metadata,
-                status='active',
-            )
-            db.add(document)
-            db.flush()
-            
             # Chunk text
-            chunks = self.chunk_text(markdown_content)
-            logger.info(f"Created {len(chunks)} chunks for document {document.id}")
+            chunks = legal_chunker.chunk_text(markdown_content)
+            logger.info(f"Created {len(chunks)} chunks for {url}")
             
             # Generate embeddings
+            embeddings = None
             if embeddings_generator.model:
-                embeddings = embeddings_generator.encode(chunks)
-                
-                # Store chunks
-                vector_ids = []
-                vector_embeddings = []
-                vector_metadatas = []
-                vector_documents = []
-                
-                for i, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
-                    chunk = DocumentChunk(
-                        document_id=document.id,
-                        chunk_index=i,
-                        content=chunk_text,
-                        metadata_json={'position': i, 'total_chunks': len(chunks)},
-                    )
-                    db.add(chunk)
-                    db.flush()
-                    
-                    vector_ids.append(f"doc_{document.id}_chunk_{chunk.id}")
-                    vector_embeddings.append(embedding)
-                    vector_metadatas.append({
-                        'document_id': str(document.id),
-                        'chunk_id': str(chunk.id),
-                        'title': title,
-                        'source_url': url,
-                        'document_type': 'guideline',
-                        'language': language,
-                        'source': 'infohub.rs.ge',
-                        'chunk_index': i,
-                    })
-                    vector_documents.append(chunk_text)
-                
-                # Add to vector store
-                if vector_store.client:
-                    vector_store.add_documents(
-                        ids=vector_ids,
-                        embeddings=vector_embeddings,
-                        documents=vector_documents,
-                        metadatas=vector_metadatas,
-                    )
-                    logger.info(f"Added {len(vector_ids)} chunks to vector store")
+                embeddings = embeddings_generator.encode([c["content"] for c in chunks])
             
-            db.commit()
+            # Store document, chunks and embeddings in one transaction
+            document = document_writer.write(
+                db,
+                Document(
+                    title=title,
+                    document_type='guideline',  # InfoHub documents are tax guidelines
+                    language=language,
+                    source_url=url,
+                    full_text=markdown_content,
+                    file_hash=content_hash,
+                    metadata_json=doc_metadata,
+                    status='active',
+                ),
+                chunks,
+                embeddings,
+            )
             self.documents_scraped += 1
             logger.info(f"Successfully processed: {url}")
             
@@ -254,65 +206,60 @@ class FirecrawlScraper:
         """
         documents = []
         
-        for page in range(1, max_pages + 1):
-            url = f"{base_url}?species={species}&page={page}&pageSize={page_size}"
-            
-            logger.info(f"Scraping page {page}/{max_pages}: {url}")
-            
-            # Scrape page with Firecrawl
-            result = self.scrape_url(url, formats=["markdown", "links"])
-            
-            if not result or 'data' not in result:
+        # Listing pages render in parallel as one batch job
+        page_urls = {
+            f"{base_url}?species={species}&page={page}&pageSize={page_size}": page
+            for page in range(1, max_pages + 1)
+        }
+        logger.info(f"Scraping {len(page_urls)} {species} pages")
+        listings = await self.scrape_urls(list(page_urls), formats=["links"])
+        
+        doc_pages = {}
+        for url, page in page_urls.items():
+            data = listings.get(url)
+            if data is None:
                 logger.warning(f"Failed to scrape {url}")
                 continue
             
-            data = result['data']
-            markdown = data.get('markdown', '')
-            links = data.get('links', [])
-            metadata = data.get('metadata', {})
-            
-            # Process the page listing
             self.pages_scraped += 1
             
             # Extract document links from the page
-            # InfoHub likely has links to individual documents
             doc_links = [
-                link for link in links
+                link for link in data.get('links', [])
                 if 'infohub.rs.ge' in link and 'document' in link.lower()
             ]
             
             logger.info(f"Found {len(doc_links)} document links on page {page}")
             
-            # Scrape individual documents
-            for doc_url in doc_links[:10]:  # Limit per page to avoid rate limits
-                try:
-                    doc_result = self.scrape_url(doc_url)
-                    if doc_result and 'data' in doc_result:
-                        doc_data = doc_result['data']
-                        doc_markdown = doc_data.get('markdown', '')
-                        doc_metadata = doc_data.get('metadata', {})
-                        doc_metadata['species'] = species
-                        doc_metadata['page'] = page
-                        
-                        document = await self.process_document(
-                            doc_url,
-                            doc_markdown,
-                            doc_metadata,
-                            db
-                        )
-                        
-                        if document:
-                            documents.append(document)
-                        
-                        # Rate limiting
-                        await asyncio.sleep(1)
+            for doc_url in doc_links[:10]:  # Limit per page
+                doc_pages.setdefault(doc_url, page)
+        
+        # Then all their documents, again as one batch
+        doc_results = await self.scrape_urls(list(doc_pages), formats=["markdown"])
+        
+        for doc_url, page in doc_pages.items():
+            doc_data = doc_results.get(doc_url)
+            if doc_data is None:
+                continue
+            
+            try:
+                doc_metadata = doc_data.get('metadata', {})
+                doc_metadata['species'] = species
+                doc_metadata['page'] = page
                 
-                except Exception as e:
-                    logger.error(f"Error processing document {doc_url}: {e}")
-                    continue
+                document = await self.process_document(
+                    doc_url,
+                    doc_data.get('markdown', ''),
+                    doc_metadata,
+                    db
+                )
+                
+                if document:
+                    documents.append(document)
             
-            # Rate limiting between pages
-            await asyncio.sleep(2)
+            except Exception as e:
+                logger.error(f"Error processing document {doc_url}: {e}")
+                continue
         
         return documents
     
@@ -337,32 +284,34 @@ class FirecrawlScraper:
             {"species": "Bill", "name": "კანონპროექტები", "total_pages": 2},
         ]
         
-        db = SessionLocal()
-        all_documents = []
-        
-        try:
-            for section in sections:
-                species = section['species']
-                total_pages = section['total_pages']
-                pages_to_scrape = min(max_pages_per_section, total_pages)
-                
-                logger.info(f"Scraping section: {section['name']} ({pages_to_scrape}/{total_pages} pages)")
-                
+        async def scrape_section(section: Dict) -> List[Dict]:
+            species = section['species']
+            total_pages = section['total_pages']
+            pages_to_scrape = min(max_pages_per_section, total_pages)
+            
+            logger.info(f"Scraping section: {section['name']} ({pages_to_scrape}/{total_pages} pages)")
+            
+            # Sections run concurrently, each with its own session
+            db = SessionLocal()
+            try:
                 documents = await self.scrape_paginated_section(
                     base_url=base_url,
                     species=species,
                     max_pages=pages_to_scrape,
                     db=db
                 )
-                
-                all_documents.extend(documents)
-                logger.info(f"Section {section['name']}: {len(documents)} documents")
+                # Read while the session is open: closing it detaches the documents
+                summaries = [{'id': doc.id, 'title': doc.title, 'url': doc.source_url} for doc in documents]
+            finally:
+                db.close()
+            
+            logger.info(f"Section {section['name']}: {len(summaries)} documents")
+            return summaries
         
-        finally:
-            db.close()
+        results = await asyncio.gather(*(scrape_section(section) for section in sections))
         
         return {
             'documents_scraped': self.documents_scraped,
             'pages_scraped': self.pages_scraped,
-            'documents': [{'id': doc.id, 'title': doc.title, 'url': doc.source_url} for doc in all_documents],
+            'documents': [summary for summaries in results for summary in summaries],
         }
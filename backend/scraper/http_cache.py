@@ -0,0 +1,151 @@
+"""
+On-disk HTTP cache for conditional re-crawls.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class HttpCache:
+    """
+    Validators and bodies of previously fetched pages.
+
+    A SQLite index keeps the ETag and Last-Modified of each URL; bodies are
+    stored gzip-compressed in one file per URL. Re-crawls send the
+    validators as If-None-Match / If-Modified-Since, so unchanged pages come
+    back as 304 with no body.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize HTTP cache.
+
+        Args:
+            directory: Cache directory (default: SCRAPER_HTTP_CACHE_DIR)
+        """
+        self.directory = directory or settings.SCRAPER_HTTP_CACHE_DIR
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Index connection, created with the cache directory on first use."""
+        if self._connection is None:
+            os.makedirs(os.path.join(self.directory, 'bodies'), exist_ok=True)
+            self._connection = sqlite3.connect(
+                os.path.join(self.directory, 'index.sqlite'),
+                check_same_thread=False,
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    validated_at TEXT NOT NULL
+                )
+            """)
+            self._connection.commit()
+        return self._connection
+
+    def _body_path(self, url: str) -> str:
+        """File holding the compressed body of a URL."""
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'bodies', name[:2], f"{name}.gz")
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Request headers revalidating the cached copy of a URL.
+
+        Returns:
+            If-None-Match / If-Modified-Since headers, or {} if not cached
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+        if row is None or not os.path.exists(self._body_path(url)):
+            return {}
+
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        Cache a 200 response.
+
+        Responses without validators are not cached: they cannot be revalidated.
+        """
+        if not etag and not last_modified:
+            return
+
+        path = self._body_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = body.encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self.connection.execute(
+                """
+                INSERT INTO responses (url, etag, last_modified, content_hash, fetched_at, validated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    fetched_at = excluded.fetched_at,
+                    validated_at = excluded.validated_at
+                """,
+                (url, etag, last_modified, hashlib.md5(data).hexdigest(), now, now),
+            )
+            self.connection.commit()
+
+    def mark_validated(self, url: str):
+        """Record that the server confirmed the cached copy (304)."""
+        with self._lock:
+            self.connection.execute(
+                "UPDATE responses SET validated_at = ? WHERE url = ?",
+                (datetime.utcnow().isoformat(), url),
+            )
+            self.connection.commit()
+
+    def load(self, url: str) -> Optional[str]:
+        """Cached body of a URL, or None."""
+        try:
+            with gzip.open(self._body_path(url), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def close(self):
+        """Close the index connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Global HTTP cache instance
+http_cache = HttpCache()
@@ -0,0 +1,123 @@
+"""
+Shared HTTP client for all scrapers.
+"""
+import asyncio
+import logging
+import weakref
+from typing import Optional
+
+import aiohttp
+
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+try:
+    import brotli  # noqa: F401  (aiohttp decodes "br" when it is installed)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+# Bytes read from a response body at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(Exception):
+    """Response body exceeds the configured size limit."""
+
+
+class HttpClient:
+    """
+    Process-wide pooled aiohttp session.
+
+    One connector per event loop keeps connections alive across requests
+    and scraper instances, caps connections in total and per host, and
+    caches DNS lookups. Timeouts are split into connect and read, so a slow
+    but progressing download is not cut off by a total deadline.
+    """
+
+    def __init__(self):
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """Shared session of the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.SCRAPER_MAX_CONNECTIONS,
+                    limit_per_host=settings.SCRAPER_CONCURRENT_REQUESTS,
+                    ttl_dns_cache=settings.SCRAPER_DNS_CACHE_TTL,
+                    enable_cleanup_closed=True,
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    connect=settings.SCRAPER_CONNECT_TIMEOUT,
+                    sock_read=settings.SCRAPER_READ_TIMEOUT,
+                ),
+                headers={
+                    'User-Agent': settings.SCRAPER_USER_AGENT,
+                    'Accept-Encoding': ACCEPT_ENCODING,
+                },
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """Close the session of the running event loop."""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+async def read_body(response: aiohttp.ClientResponse, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Read a (decompressed) response body in chunks, enforcing a size limit.
+
+    Args:
+        response: Response to read
+        max_bytes: Size limit (default: SCRAPER_MAX_RESPONSE_BYTES)
+
+    Returns:
+        Body bytes
+
+    Raises:
+        ResponseTooLarge: If the body exceeds the limit
+    """
+    max_bytes = max_bytes or settings.SCRAPER_MAX_RESPONSE_BYTES
+
+    declared = response.headers.get('Content-Length')
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise ResponseTooLarge(f"{response.url}: Content-Length {declared} exceeds {max_bytes} bytes")
+
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise ResponseTooLarge(f"{response.url}: body exceeds {max_bytes} bytes")
+    return bytes(body)
+
+
+async def read_text(response: aiohttp.ClientResponse, max_bytes: Optional[int] = None) -> str:
+    """
+    Read a response body as text with the size limit of read_body().
+
+    Args:
+        response: Response to read
+        max_bytes: Size limit (default: SCRAPER_MAX_RESPONSE_BYTES)
+
+    Returns:
+        Decoded body
+    """
+    body = await read_body(response, max_bytes)
+    return body.decode(response.charset or 'utf-8', errors='replace')
+
+
+# Global HTTP client instance
+http_client = HttpClient()
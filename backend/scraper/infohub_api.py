@@ -0,0 +1,306 @@
+"""
+InfoHub scraper using the JSON API behind the SPA.
+"""
+import asyncio
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from core.config import settings
+from processor.ingestion import IngestionPipeline, MIN_CONTENT_LENGTH
+from scraper.base_scraper import MAX_THROTTLE_RETRIES
+from scraper.enhanced_scraper import DOCUMENT_TYPE_MAP
+from scraper.http_client import http_client, read_text
+from scraper.rate_limiter import rate_limiter
+
+
+logger = logging.getLogger(__name__)
+
+
+# Endpoints the SPA calls, relative to INFOHUB_API_URL
+SEARCH_PATH = "/documents"
+DOCUMENT_PATH = "/documents/{id}"
+
+# Documents per listing request (the SPA's own page size)
+PAGE_SIZE = 40
+
+# Public page of a document, used as its source_url
+DOCUMENT_URL = "https://infohub.rs.ge/{language}/workspace/document/{id}"
+
+# Keys the API has used for each field, in order of preference
+FIELD_KEYS = {
+    'id': ('id', 'documentId', 'uniqueKey'),
+    'title': ('name', 'title', 'documentName'),
+    'content': ('content', 'text', 'body', 'documentText'),
+    'document_type': ('documentType', 'type', 'documentTypeName'),
+    'document_number': ('number', 'documentNumber', 'registrationNumber'),
+    'date_published': ('publishDate', 'adoptionDate', 'date', 'createDate'),
+    'date_effective': ('effectiveDate', 'startDate'),
+    'authority': ('issuer', 'authority', 'publisher'),
+    'species': ('species', 'speciesName'),
+}
+
+# Keys holding the items and total of a listing response
+ITEMS_KEYS = ('items', 'data', 'documents', 'result')
+TOTAL_KEYS = ('totalCount', 'total', 'count')
+
+
+def _first(item: Dict[str, Any], field: str) -> Any:
+    """Value of the first key of a field that is present in an API item."""
+    for key in FIELD_KEYS[field]:
+        value = item.get(key)
+        if value not in (None, ''):
+            # Lookups come as {"id": ..., "name": ...}
+            if isinstance(value, dict):
+                value = value.get('name') or value.get('title')
+            return value
+    return None
+
+
+def parse_api_date(value: Any) -> Optional[date]:
+    """Parse an ISO date or datetime string from the API."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
+def html_to_text(content: str) -> str:
+    """Text of an HTML fragment, one non-empty line per block."""
+    if '<' not in content:
+        return content.strip()
+    soup = BeautifulSoup(content, 'html.parser')
+    for tag in soup(['script', 'style']):
+        tag.decompose()
+    lines = (line.strip() for line in soup.get_text(separator='\n').split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def map_document(item: Dict[str, Any], language: str = 'ka') -> Optional[Dict[str, Any]]:
+    """
+    Map an API document to a raw document for the ingestion pipeline.
+
+    Args:
+        item: Document object from the API
+        language: Site language the document was requested in
+
+    Returns:
+        Raw document (see processor.ingestion.parse_and_chunk), or None if
+        the item has no ID or no indexable text
+    """
+    doc_id = _first(item, 'id')
+    content = _first(item, 'content')
+    if doc_id is None or not isinstance(content, str):
+        return None
+
+    text = html_to_text(content)
+    if len(text) < MIN_CONTENT_LENGTH:
+        return None
+
+    type_name = _first(item, 'document_type')
+    authority = _first(item, 'authority')
+    number = _first(item, 'document_number')
+
+    return {
+        'url': DOCUMENT_URL.format(language=language, id=doc_id),
+        'text': text,
+        'title': _first(item, 'title'),
+        'document_type': DOCUMENT_TYPE_MAP.get(type_name, 'guideline'),
+        'language': language,
+        'document_number': str(number)[:100] if number is not None else None,
+        'date_published': parse_api_date(_first(item, 'date_published')),
+        'date_effective': parse_api_date(_first(item, 'date_effective')),
+        'authority': str(authority)[:50] if authority else None,
+        'metadata': {
+            'source': 'infohub.rs.ge',
+            'scraper': 'api',
+            'api_id': str(doc_id),
+            'document_type_ka': type_name,
+            'species': _first(item, 'species'),
+            'scraped_at': datetime.utcnow().isoformat(),
+        },
+    }
+
+
+def parse_listing(payload: Any) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Split a listing response into its items and total count.
+
+    Returns:
+        (items, total), total being None if the response has none
+    """
+    if isinstance(payload, list):
+        return payload, None
+    if not isinstance(payload, dict):
+        return [], None
+
+    items = next((payload[key] for key in ITEMS_KEYS if isinstance(payload.get(key), list)), [])
+    total = next((payload[key] for key in TOTAL_KEYS if isinstance(payload.get(key), int)), None)
+    return items, total
+
+
+class InfoHubApiScraper:
+    """
+    Scraper reading InfoHub documents from the SPA's JSON endpoints.
+
+    One listing request returns a page of documents, one detail request
+    returns a document's text: no rendering, no HTML of the page shell.
+    Documents the API returns without text are reported back so they can
+    be rendered with a browser scraper instead.
+    """
+
+    def __init__(self, api_url: Optional[str] = None, language: str = 'ka'):
+        """
+        Initialize API scraper.
+
+        Args:
+            api_url: API root (default: INFOHUB_API_URL)
+            language: Site language to request documents in
+        """
+        self.api_url = (api_url or settings.INFOHUB_API_URL).rstrip('/')
+        self.language = language
+        self.documents_listed = 0
+        self.documents_mapped = 0
+        self.unmapped_urls: List[str] = []
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        GET an API endpoint under the shared per-host rate limit.
+
+        Args:
+            path: Endpoint path relative to the API root
+            params: Query parameters
+
+        Returns:
+            Decoded JSON, or None on error
+        """
+        url = f"{self.api_url}{path}"
+        headers = {'Accept': 'application/json', 'Accept-Language': self.language}
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            async with rate_limiter.slot(url) as slot:
+                try:
+                    async with http_client.session().get(url, params=params, headers=headers) as response:
+                        slot.record(response.status, response.headers.get('Retry-After'))
+                        if slot.throttled and attempt < MAX_THROTTLE_RETRIES:
+                            logger.warning(f"Throttled fetching {url}, retrying")
+                            continue
+                        if response.status != 200:
+                            logger.warning(f"Failed to fetch {url}: HTTP {response.status}")
+                            return None
+                        return json.loads(await read_text(response))
+                except Exception as e:
+                    logger.error(f"Error fetching {url}: {e}")
+                    return None
+        return None
+
+    async def list_documents(
+        self,
+        skip: int = 0,
+        take: int = PAGE_SIZE,
+        species: Optional[str] = None,
+        search_text: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Fetch one page of the document listing.
+
+        Args:
+            skip: Documents to skip
+            take: Documents to return
+            species: Section filter (NewDocument, LegislativeNews, Bill)
+            search_text: Full-text search query
+
+        Returns:
+            (items, total)
+        """
+        params = {'skip': skip, 'take': take}
+        if species:
+            params['species'] = species
+        if search_text:
+            params['searchText'] = search_text
+        return parse_listing(await self.get_json(SEARCH_PATH, params))
+
+    async def get_document(self, doc_id: Any) -> Optional[Dict[str, Any]]:
+        """Fetch one document with its text."""
+        payload = await self.get_json(DOCUMENT_PATH.format(id=doc_id))
+        return payload if isinstance(payload, dict) else None
+
+    async def _complete(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Listing item, fetching its details when the text is not included."""
+        if _first(item, 'content') is not None or _first(item, 'id') is None:
+            return item
+        details = await self.get_document(_first(item, 'id'))
+        return {**item, **details} if details else item
+
+    async def iter_documents(
+        self,
+        max_documents: int = 100,
+        species: Optional[str] = None,
+        search_text: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield raw documents page by page, fetching each page's details concurrently.
+
+        Args:
+            max_documents: Most documents to list
+            species: Section filter
+            search_text: Full-text search query
+        """
+        skip = 0
+        while skip < max_documents:
+            items, total = await self.list_documents(skip, min(PAGE_SIZE, max_documents - skip), species, search_text)
+            if not items:
+                break
+
+            self.documents_listed += len(items)
+            for item in await asyncio.gather(*(self._complete(item) for item in items)):
+                document = map_document(item, self.language)
+                if document is None:
+                    if _first(item, 'id') is not None:
+                        self.unmapped_urls.append(DOCUMENT_URL.format(language=self.language, id=_first(item, 'id')))
+                    continue
+                self.documents_mapped += 1
+                yield document
+
+            skip += len(items)
+            if total is not None and skip >= total:
+                break
+
+    async def scrape(
+        self,
+        max_documents: int = 100,
+        species: Optional[str] = None,
+        search_text: Optional[str] = None,
+        pipeline: Optional[IngestionPipeline] = None,
+    ) -> Dict[str, Any]:
+        """
+        List documents through the API and ingest them.
+
+        Args:
+            max_documents: Most documents to list
+            species: Section filter
+            search_text: Full-text search query
+            pipeline: Ingestion pipeline (default: a new one)
+
+        Returns:
+            Counts, the ingestion report, and the URLs of documents the API
+            returned no text for (to be rendered by a browser scraper)
+        """
+        pipeline = pipeline or IngestionPipeline()
+        ingestion = await pipeline.run(self.iter_documents(max_documents, species, search_text))
+
+        logger.info(
+            f"InfoHub API: {self.documents_listed} listed, {self.documents_mapped} mapped, "
+            f"{len(self.unmapped_urls)} without text"
+        )
+        return {
+            'documents_listed': self.documents_listed,
+            'documents_mapped': self.documents_mapped,
+            'unmapped_urls': self.unmapped_urls,
+            'ingestion': ingestion,
+        }
@@ -6,22 +6,38 @@ import logging
 import re
 import hashlib
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
-from urllib.parse import urlparse, urljoin
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, urljoin, urldefrag
 import aiohttp
-from sqlalchemy.orm import Session
 
 from scraper.base_scraper import BaseScraper
+from scraper.crawl_state import CrawlState
+from scraper.http_client import http_client
+from scraper.jobs import JobProgress
 from core.database import SessionLocal
-from models.document import Document, DocumentChunk
+from models.document import Document
 from rag.embeddings import embeddings_generator
-from rag.vector_store_pgvector import vector_store
 from core.config import settings
+from processor.legal_chunker import legal_chunker
+from processor.document_writer import document_writer
+from processor.ingestion import IngestionPipeline, extract_main_text
 
 
 logger = logging.getLogger(__name__)
 
 
+# Frontier priorities (lower is fetched first)
+DOCUMENT_PRIORITY = 0
+NAVIGATION_PRIORITY = 1
+
+# Path segment of infohub document pages
+DOCUMENT_LINK_MARKER = '/document/'
+
+# Navigation links are followed only when they look tax-related
+RELEVANT_KEYWORDS = ['tax', 'налог', 'vat', 'ндс', 'საგადასახადო', 'დღგ', 'law', 'закон', 'კანონი']
+MAX_NAVIGATION_LINKS_PER_PAGE = 10
+
+
 class InfoHubScraper(BaseScraper):
     """Scraper for infohub.rs.ge tax documents."""
     
@@ -29,6 +45,15 @@ class InfoHubScraper(BaseScraper):
         super().__init__(base_url="https://infohub.rs.ge")
         self.visited_urls = set()
         self.documents_scraped = 0
+        self.pages_not_modified = 0
+        self.pipeline: Optional[IngestionPipeline] = None
+        self.progress: Optional[JobProgress] = None
+        self.state: Optional[CrawlState] = None
+        # Fetch results of pages handed to the pipeline, until it reports them processed
+        self._unprocessed: Dict[str, Dict] = {}
+        self.max_depth = 2
+        self.max_pages = 100
+        self._enqueued = 0
     
     def detect_language(self, text: str) -> str:
         """
@@ -105,84 +130,45 @@ class InfoHubScraper(BaseScraper):
         Returns:
             Extracted text
         """
-        # Remove script and style elements
-        for script in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-            script.decompose()
-        
-        # Try to find main content area
-        content = None
-        for selector in ['article', 'main', '.content', '#content', '.post-content']:
-            content = soup.select_one(selector)
-            if content:
-                break
-        
-        # Fall back to body if no main content found
-        if not content:
-            content = soup.find('body')
-        
-        if content:
-            text = content.get_text(separator='\n')
-            return self.clean_text(text)
-        
-        return ""
+        return self.clean_text(extract_main_text(soup))
     
-    def chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    async def process_document(self, url: str, html: str) -> Tuple[Optional[Dict], bool]:
         """
-        Split text into chunks for RAG.
+        Process and store a document off the event loop.
+        
+        Parsing, chunking, embedding and the database writes are blocking,
+        so they run in a thread (see store_document) while the other
+        frontier workers keep fetching.
         
         Args:
-            text: Text to chunk
-            chunk_size: Maximum chunk size in characters
-            overlap: Overlap between chunks
+            url: Document URL
+            html: HTML content
             
         Returns:
-            List of text chunks
-        """
-        chunk_size = chunk_size or settings.RAG_CHUNK_SIZE
-        overlap = overlap or settings.RAG_CHUNK_OVERLAP
-        
-        if len(text) <= chunk_size:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to break at sentence boundary
-            if end < len(text):
-                # Look for sentence endings
-                for i in range(end, max(start + overlap, start), -1):
-                    if text[i] in '.!?\n':
-                        end = i + 1
-                        break
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
+            See store_document
             
-            start = end - overlap
-        
-        return chunks
+        Raises:
+            Exception: If the document could not be stored (after rollback)
+        """
+        return await asyncio.to_thread(self.store_document, url, html)
     
-    async def process_document(
-        self,
-        url: str,
-        html: str,
-        db: Session
-    ) -> Optional[Document]:
+    def store_document(self, url: str, html: str) -> Tuple[Optional[Dict], bool]:
         """
-        Process and store a document.
+        Process and store a document in a session owned by the calling thread.
         
         Args:
             url: Document URL
             html: HTML content
-            db: Database session
             
         Returns:
-            Stored Document object or None
+            The document ({'id', 'title', 'url'}, read while the session is
+            open, or None if the page holds no document) and whether it was
+            written (new or changed)
+            
+        Raises:
+            Exception: If the document could not be stored (after rollback)
         """
+        db = SessionLocal()
         try:
             soup = self.parse_html(html)
             
@@ -190,7 +176,7 @@ class InfoHubScraper(BaseScraper):
             text = self.extract_main_content(soup)
             if not text or len(text) < 100:  # Skip if too short
                 logger.info(f"Skipping {url}: content too short")
-                return None
+                return None, False
             
             metadata = self.extract_document_metadata(soup, url)
             language = self.detect_language(text)
@@ -200,184 +186,331 @@ class InfoHubScraper(BaseScraper):
             content_hash = hashlib.md5(text.encode()).hexdigest()
             
             # Check if already exists
-            existing = db.query(Document).filter_by(url=url).first()
+            existing = db.query(Document).filter_by(source_url=url).first()
             if existing:
-                logger.info(f"Document already exists: {url}")
-                return existing
-            
-            # Create document record
-            document = Document(
-                url=url,
-                title=metadata.get('title', 'Untitled'),
-                content=text,
-                language=language,
-                source='infohub.ge',
-                metadata_=metadata,
-                content_hash=content_hash,
-            )
-            db.add(document)
-            db.flush()  # Get document ID
+                summary = {'id': existing.id, 'title': existing.title, 'url': existing.source_url}
+                if existing.file_hash == content_hash:
+                    logger.info(f"Document unchanged: {url}")
+                    return summary, False
+                # Content changed: re-embed only the chunks that differ
+                document_writer.reindex(
+                    db,
+                    existing,
+                    text,
+                    content_hash,
+                    encode=embeddings_generator.encode if embeddings_generator.model else None,
+                )
+                return summary, True
             
             # Chunk text
-            chunks = self.chunk_text(text)
-            logger.info(f"Created {len(chunks)} chunks for document {document.id}")
+            chunks = legal_chunker.chunk_text(text)
+            logger.info(f"Created {len(chunks)} chunks for {url}")
             
             # Generate embeddings
+            embeddings = None
             if embeddings_generator.model:
-                embeddings = embeddings_generator.encode(chunks)
-                
-                # Store chunks in database and vector store
-                vector_ids = []
-                vector_embeddings = []
-                vector_metadatas = []
-                vector_documents = []
-                
-                for i, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
-                    # Create chunk record
-                    chunk = DocumentChunk(
-                        document_id=document.id,
-                        chunk_index=i,
-                        content=chunk_text,
-                        metadata_={'position': i, 'total_chunks': len(chunks)},
-                    )
-                    db.add(chunk)
-                    db.flush()
-                    
-                    # Prepare for vector store
-                    vector_ids.append(f"doc_{document.id}_chunk_{chunk.id}")
-                    vector_embeddings.append(embedding)
-                    vector_metadatas.append({
-                        'document_id': document.id,
-                        'chunk_id': chunk.id,
-                        'title': document.title,
-                        'url': document.url,
-                        'language': language,
-                        'source': 'infohub.ge',
-                        'chunk_index': i,
-                    })
-                    vector_documents.append(chunk_text)
-                
-                # Add to vector store
-                if vector_store.client:
-                    vector_store.add_documents(
-                        ids=vector_ids,
-                        embeddings=vector_embeddings,
-                        documents=vector_documents,
-                        metadatas=vector_metadatas,
-                    )
-                    logger.info(f"Added {len(vector_ids)} chunks to vector store")
+                embeddings = embeddings_generator.encode([c["content"] for c in chunks])
             
-            db.commit()
-            self.documents_scraped += 1
+            # Store document, chunks and embeddings in one transaction
+            document = document_writer.write(
+                db,
+                Document(
+                    title=metadata.get('title', 'Untitled'),
+                    document_type='guideline',
+                    language=language,
+                    source_url=url,
+                    full_text=text,
+                    file_hash=content_hash,
+                    metadata_json=metadata,
+                    status='active',
+                ),
+                chunks,
+                embeddings,
+            )
             logger.info(f"Successfully processed document: {url}")
             
-            return document
+            return {'id': document.id, 'title': document.title, 'url': document.source_url}, True
             
         except Exception as e:
             logger.error(f"Error processing document {url}: {e}")
             db.rollback()
-            return None
+            raise
+        finally:
+            db.close()
+    
+    def prioritize_links(self, links: List[str]) -> List[Tuple[int, str]]:
+        """
+        Select links worth following and rank them.
+        
+        Document pages are always followed and come first, unless the crawl
+        state records them as processed less than
+        SCRAPER_STATE_REVALIDATE_AFTER seconds ago (older ones are followed
+        to be revalidated); navigation pages are followed only when they
+        look tax-related.
+        
+        Args:
+            links: Absolute URLs found on a page
+            
+        Returns:
+            (priority, url) pairs, lower priority first
+        """
+        ranked = []
+        navigation = []
+        for link in links:
+            link = urldefrag(link)[0]
+            if not self.is_same_domain(link) or link in self.visited_urls:
+                continue
+            if DOCUMENT_LINK_MARKER in link:
+                ranked.append((DOCUMENT_PRIORITY, link))
+            elif any(keyword in link.lower() for keyword in RELEVANT_KEYWORDS):
+                navigation.append((NAVIGATION_PRIORITY, link))
+        
+        if self.state and ranked:
+            since = datetime.utcnow() - timedelta(seconds=settings.SCRAPER_STATE_REVALIDATE_AFTER)
+            known = self.state.seen((link for _, link in ranked), since=since)
+            ranked = [(priority, link) for priority, link in ranked if link not in known]
+        
+        return ranked + navigation[:MAX_NAVIGATION_LINKS_PER_PAGE]
+    
+    def enqueue(self, frontier: asyncio.PriorityQueue, url: str, depth: int, priority: int) -> bool:
+        """
+        Add a URL to the frontier unless it is known or over budget.
+        
+        Depth and page budgets are checked here, so the frontier never holds
+        more pages than will be fetched.
+        
+        Returns:
+            True if the URL was enqueued
+        """
+        if url in self.visited_urls or depth > self.max_depth:
+            return False
+        if len(self.visited_urls) >= self.max_pages:
+            return False
+        
+        self.visited_urls.add(url)
+        self._enqueued += 1
+        frontier.put_nowait((priority, depth, self._enqueued, url))
+        return True
+    
+    def _count(self, field: str):
+        """Report progress to the job running this crawl, if any."""
+        if self.progress:
+            self.progress.incr(field)
     
     async def scrape_page(
         self,
         url: str,
         session: aiohttp.ClientSession,
-        db: Session,
-        max_depth: int = 2,
-        current_depth: int = 0,
-    ) -> List[Document]:
+    ) -> Tuple[List[Dict], List[str]]:
         """
-        Scrape a page and optionally follow links.
+        Fetch and process one page.
+        
+        Pages answered with 304 Not Modified skip processing (parsing,
+        chunking and embedding); their cached copy, if any, only provides
+        links. Other pages are cached and recorded in the crawl state only
+        once processed, so a page that failed is fetched and processed
+        again on the next crawl.
         
         Args:
             url: URL to scrape
             session: aiohttp session
-            db: Database session
-            max_depth: Maximum depth to follow links
-            current_depth: Current depth
             
         Returns:
-            List of processed documents
+            Processed documents ({'id', 'title', 'url'}) and the links found
+            on the page
         """
-        if url in self.visited_urls or not self.is_same_domain(url):
-            return []
-        
-        self.visited_urls.add(url)
-        logger.info(f"Scraping {url} (depth {current_depth})")
-        
         documents = []
         
         # Fetch page
-        html = await self.fetch_page(url, session)
-        if not html:
-            return documents
+        result = await self.fetch(url, session)
+        if not result:
+            return documents, []
+        html = result['body']
+        self._count('pages_visited')
         
-        # Process current page
-        document = await self.process_document(url, html, db)
-        if document:
-            documents.append(document)
+        # Unchanged since the last crawl: only its links are needed
+        if result['not_modified']:
+            self.pages_not_modified += 1
+            self._count('pages_not_modified')
+            self.page_processed(url, result)
+            if html is None:
+                # Revalidated with the ETag of the crawl state, nothing cached
+                return documents, []
+        elif self.pipeline:
+            self._unprocessed[url] = result
+            await self.pipeline.submit({'url': url, 'html': html, 'metadata': {'source': 'infohub.ge'}})
+        else:
+            try:
+                document, written = await self.process_document(url, html)
+            except Exception:
+                # Logged by store_document; left uncached to be retried
+                document, written = None, False
+            else:
+                self.page_processed(url, result)
+            if document:
+                documents.append(document)
+            if written:
+                # Unchanged documents are not counted, as in pipeline mode
+                self.documents_scraped += 1
+                self._count('documents_scraped')
         
-        # Follow links if not at max depth
-        if current_depth < max_depth:
-            soup = self.parse_html(html)
-            links = self.extract_links(soup, url)
-            
-            # Filter relevant links (e.g., tax-related pages)
-            relevant_keywords = ['tax', 'налог', 'vat', 'ндс', 'საგადასახადო', 'დღგ', 'law', 'закон', 'კანონი']
-            relevant_links = [
-                link for link in links
-                if any(keyword in link.lower() for keyword in relevant_keywords)
-                and self.is_same_domain(link)
-                and link not in self.visited_urls
-            ]
-            
-            # Scrape linked pages
-            for link in relevant_links[:10]:  # Limit to 10 links per page
-                child_documents = await self.scrape_page(
-                    link, session, db, max_depth, current_depth + 1
-                )
-                documents.extend(child_documents)
+        soup = self.parse_html(html)
+        return documents, self.extract_links(soup, url)
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Request headers revalidating an earlier fetch of a URL.
         
-        return documents
+        Falls back to the ETag of the crawl state for pages missing from the
+        HTTP cache (disabled, or cleared since).
+        
+        Returns:
+            If-None-Match / If-Modified-Since headers, or {} to fetch in full
+        """
+        headers = super().conditional_headers(url)
+        if not headers and self.state:
+            known = self.state.get(url)
+            if known and known['etag']:
+                headers = {'If-None-Match': known['etag']}
+        return headers
+    
+    def page_processed(self, url: str, result: Dict):
+        """
+        Cache a page and record it in the crawl state once it is stored (or
+        holds no document, or is unchanged).
+        
+        Args:
+            url: Page URL
+            result: Result of fetch()
+        """
+        self.remember(url, result)
+        if self.state:
+            body = result['body']
+            content_hash = hashlib.md5(body.encode()).hexdigest() if body is not None else None
+            self.state.record(url, content_hash, result.get('etag'))
+    
+    def _pipeline_processed(self, url: str):
+        """Pipeline callback for a page it has stored or skipped."""
+        result = self._unprocessed.pop(url, None)
+        if result is not None:
+            self.page_processed(url, result)
+    
+    async def _crawl_worker(
+        self,
+        frontier: asyncio.PriorityQueue,
+        session: aiohttp.ClientSession,
+        documents: List[Dict],
+    ):
+        """Take pages off the frontier until the crawl is cancelled."""
+        while True:
+            priority, depth, _, url = await frontier.get()
+            try:
+                logger.info(f"Scraping {url} (depth {depth})")
+                page_documents, links = await self.scrape_page(url, session)
+                documents.extend(page_documents)
+                
+                if depth < self.max_depth:
+                    for link_priority, link in self.prioritize_links(links):
+                        self.enqueue(frontier, link, depth + 1, link_priority)
+            except Exception as e:
+                logger.error(f"Error scraping {url}: {e}")
+            finally:
+                frontier.task_done()
     
     async def scrape(
         self,
         start_url: str,
         max_depth: int = 2,
         max_pages: int = 100,
+        pipeline: Optional[IngestionPipeline] = None,
+        concurrency: Optional[int] = None,
+        progress: Optional[JobProgress] = None,
+        state: Optional[CrawlState] = None,
+        refresh: bool = False,
     ) -> Dict:
         """
-        Start scraping from a URL.
+        Crawl breadth-first from a URL.
+        
+        Worker coroutines share one frontier ordered by link priority, then
+        depth. URLs are deduplicated when enqueued, so each page is fetched
+        once; requests stay spaced by the scraper's rate limit.
         
         Args:
             start_url: Starting URL
             max_depth: Maximum link depth to follow
             max_pages: Maximum number of pages to scrape
+            pipeline: Ingestion pipeline to hand fetched pages to instead of
+                processing them inline (parsing, chunking and embedding then
+                run in parallel with the crawl)
+            concurrency: Worker coroutines (default: SCRAPER_CONCURRENT_REQUESTS)
+            progress: Job progress counters to update while crawling
+            state: Crawl state of incremental runs; processed pages are
+                recorded in it and document pages it holds are not followed
+                again until SCRAPER_STATE_REVALIDATE_AFTER has passed
+            refresh: Fetch every page in full and process it again instead
+                of revalidating cached copies (full re-ingests)
             
         Returns:
             Dictionary with scraping results
         """
         self.visited_urls = set()
         self.documents_scraped = 0
+        self.pages_not_modified = 0
+        self.pipeline = pipeline
+        self.progress = progress
+        self.state = state
+        self.refresh = refresh
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self._enqueued = 0
+        concurrency = concurrency or settings.SCRAPER_CONCURRENT_REQUESTS
         
-        db = SessionLocal()
-        documents = []
+        documents: List[Dict] = []
+        ingestion = None
         
         try:
-            async with aiohttp.ClientSession() as session:
-                documents = await self.scrape_page(
-                    start_url, session, db, max_depth=max_depth
-                )
-                
-                # Limit total pages
-                if len(self.visited_urls) >= max_pages:
-                    logger.warning(f"Reached max pages limit: {max_pages}")
+            if pipeline:
+                pipeline.on_processed = self._pipeline_processed
+                await pipeline.start()
+            
+            session = http_client.session()
+            frontier: asyncio.PriorityQueue = asyncio.PriorityQueue()
+            self.enqueue(frontier, urldefrag(start_url)[0], 0, DOCUMENT_PRIORITY)
+            
+            workers = [
+                asyncio.create_task(self._crawl_worker(frontier, session, documents))
+                for _ in range(concurrency)
+            ]
+            try:
+                await frontier.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            
+            if len(self.visited_urls) >= max_pages:
+                logger.warning(f"Reached max pages limit: {max_pages}")
         
         finally:
-            db.close()
+            if pipeline:
+                ingestion = await pipeline.close()
+                self.documents_scraped = ingestion['documents_stored']
+                self.pipeline = None
+                pipeline.on_processed = None
+                self._unprocessed = {}
+                if progress:
+                    progress.incr('documents_scraped', ingestion['documents_stored'])
+            if progress:
+                progress.flush()
+                self.progress = None
+            if state:
+                state.flush()
+                self.state = None
         
         return {
             'documents_scraped': self.documents_scraped,
             'pages_visited': len(self.visited_urls),
-            'documents': [{'id': doc.id, 'title': doc.title, 'url': doc.url} for doc in documents],
+            'pages_not_modified': self.pages_not_modified,
+            'documents': documents,
+            'ingestion': ingestion,
         }
@@ -0,0 +1,307 @@
+"""
+Scraper job status and progress stored in Redis.
+"""
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import redis.asyncio as aioredis
+from redis import Redis
+
+from core.cache import get_redis
+from core.config import settings
+
+
+# Job states; the last two are final
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+FINISHED_STATUSES = ('completed', 'failed')
+
+# Hash fields holding integer counters
+COUNTER_FIELDS = ('pages_visited', 'documents_scraped', 'pages_not_modified')
+
+# Hash fields holding JSON
+JSON_FIELDS = ('params', 'result')
+
+
+class JobProgress:
+    """
+    Progress counters of a running job.
+
+    Increments are buffered and written at most every flush_interval
+    seconds as one pipelined batch of HINCRBY commands, followed by a
+    PUBLISH that wakes up progress streams.
+    """
+
+    def __init__(self, store: "ScrapeJobStore", job_id: str, flush_interval: Optional[float] = None):
+        self.store = store
+        self.job_id = job_id
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.SCRAPER_PROGRESS_FLUSH_INTERVAL
+        )
+        self.pending: Dict[str, int] = {}
+        self._flushed_at = time.monotonic()
+
+    def incr(self, field: str, amount: int = 1):
+        """
+        Add to a counter.
+
+        Args:
+            field: Counter name (see COUNTER_FIELDS)
+            amount: Increment
+        """
+        self.pending[field] = self.pending.get(field, 0) + amount
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered increments in one round trip."""
+        self._flushed_at = time.monotonic()
+        if not self.pending:
+            return
+
+        key = self.store.key(self.job_id)
+        pipe = self.store.redis.pipeline(transaction=False)
+        for field, amount in self.pending.items():
+            pipe.hincrby(key, field, amount)
+        pipe.hset(key, 'updated_at', datetime.utcnow().isoformat())
+        pipe.publish(self.store.channel(self.job_id), 'progress')
+        pipe.execute()
+        self.pending = {}
+
+
+class ScrapeJobStore:
+    """
+    Scraper jobs as Redis hashes, shared by API and Celery workers.
+
+    Each job is a hash (status, timestamps, parameters, result, error and
+    progress counters) under scraper:job:<id>; a sorted set indexes jobs by
+    creation time. Every change is announced on the job's pub/sub channel.
+    """
+
+    KEY_PREFIX = "scraper:job:"
+    INDEX_KEY = "scraper:jobs"
+
+    def __init__(self, redis: Optional[Redis] = None, ttl: Optional[int] = None):
+        """
+        Initialize job store.
+
+        Args:
+            redis: Redis client with decode_responses=True (default: shared client)
+            ttl: Seconds a job is kept after its last change (default: SCRAPER_JOB_TTL)
+        """
+        self._redis = redis
+        self.ttl = ttl or settings.SCRAPER_JOB_TTL
+
+    @property
+    def redis(self) -> Redis:
+        return self._redis or get_redis()
+
+    def key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}{job_id}"
+
+    def channel(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}{job_id}:events"
+
+    def create(self, params: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        """
+        Register a queued job.
+
+        Args:
+            params: Job parameters
+            job_id: Job ID (default: a new UUID)
+
+        Returns:
+            Job ID
+        """
+        job_id = job_id or str(uuid.uuid4())
+        now = datetime.utcnow()
+
+        pipe = self.redis.pipeline()
+        pipe.hset(self.key(job_id), mapping={
+            'status': 'queued',
+            'created_at': now.isoformat(),
+            'updated_at': now.isoformat(),
+            'params': json.dumps(params),
+            **{field: 0 for field in COUNTER_FIELDS},
+        })
+        pipe.expire(self.key(job_id), self.ttl)
+        pipe.zadd(self.INDEX_KEY, {job_id: now.timestamp()})
+        pipe.execute()
+        return job_id
+
+    def update(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """
+        Change the status of a job.
+
+        Args:
+            job_id: Job ID
+            status: New status (see JOB_STATUSES)
+            result: Result to store (completed jobs)
+            error: Error message (failed jobs)
+        """
+        now = datetime.utcnow().isoformat()
+        fields = {'status': status, 'updated_at': now}
+        if status == 'running':
+            fields['started_at'] = now
+        if status in FINISHED_STATUSES:
+            fields['finished_at'] = now
+        if result is not None:
+            fields['result'] = json.dumps(result, default=str)
+        if error is not None:
+            fields['error'] = error
+
+        pipe = self.redis.pipeline()
+        pipe.hset(self.key(job_id), mapping=fields)
+        pipe.expire(self.key(job_id), self.ttl)
+        pipe.publish(self.channel(job_id), status)
+        pipe.execute()
+
+    def progress(self, job_id: str, flush_interval: Optional[float] = None) -> JobProgress:
+        """Progress counters of a job."""
+        return JobProgress(self, job_id, flush_interval)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Current state of a job.
+
+        Returns:
+            Job dictionary, or None if unknown or expired
+        """
+        return self.decode(job_id, self.redis.hgetall(self.key(job_id)))
+
+    @staticmethod
+    def decode(job_id: str, fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Job dictionary from the raw hash fields."""
+        if not fields:
+            return None
+
+        job: Dict[str, Any] = {'task_id': job_id, **fields}
+        for field in COUNTER_FIELDS:
+            job[field] = int(fields.get(field, 0))
+        for field in JSON_FIELDS:
+            if field in fields:
+                job[field] = json.loads(fields[field])
+        return job
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs, newest first."""
+        job_ids = self.redis.zrevrange(self.INDEX_KEY, 0, limit - 1)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(self.key(job_id))
+
+        jobs, expired = [], []
+        for job_id, fields in zip(job_ids, pipe.execute()):
+            job = self.decode(job_id, fields)
+            if job is None:
+                expired.append(job_id)
+            else:
+                jobs.append(job)
+
+        if expired:
+            self.redis.zrem(self.INDEX_KEY, *expired)
+        return jobs
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Forget a job.
+
+        Returns:
+            True if the job existed
+        """
+        pipe = self.redis.pipeline()
+        pipe.delete(self.key(job_id))
+        pipe.zrem(self.INDEX_KEY, job_id)
+        deleted, _ = pipe.execute()
+        return bool(deleted)
+
+    async def watch(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the state of a job now and after every change until it finishes.
+
+        Args:
+            job_id: Job ID
+            heartbeat: Seconds after which the state is re-sent without a change
+
+        Yields:
+            Job dictionaries (see get)
+        """
+        client = aioredis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+        pubsub = client.pubsub()
+        try:
+            # Subscribe before the first read so no change is missed
+            await pubsub.subscribe(self.channel(job_id))
+            while True:
+                job = self.decode(job_id, await client.hgetall(self.key(job_id)))
+                if job is None:
+                    return
+                yield job
+                if job['status'] in FINISHED_STATUSES:
+                    return
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+def run_scrape_job(
+    job_id: str,
+    url: str,
+    max_depth: int,
+    max_pages: int,
+    store: Optional[ScrapeJobStore] = None,
+    scraper=None,
+) -> Dict[str, Any]:
+    """
+    Crawl from a URL for a job, keeping its status and progress in Redis.
+
+    Args:
+        job_id: Job ID
+        url: Starting URL
+        max_depth: Maximum link depth
+        max_pages: Maximum pages to scrape
+        store: Job store (default: job_store)
+        scraper: Crawler (default: a new InfoHubScraper)
+
+    Returns:
+        Crawl result
+
+    Raises:
+        Exception: Whatever failed the crawl, after the job is marked failed
+    """
+    # Imported here: the scraper imports JobProgress from this module
+    from scraper.http_client import http_client
+    from scraper.infohub_scraper import InfoHubScraper
+
+    store = store or job_store
+    scraper = scraper or InfoHubScraper()
+    store.update(job_id, 'running')
+    progress = store.progress(job_id)
+
+    async def crawl():
+        try:
+            return await scraper.scrape(
+                start_url=url,
+                max_depth=max_depth,
+                max_pages=max_pages,
+                progress=progress,
+            )
+        finally:
+            await http_client.close()
+
+    try:
+        result = asyncio.run(crawl())
+    except Exception as e:
+        store.update(job_id, 'failed', error=str(e))
+        raise
+
+    store.update(job_id, 'completed', result=result)
+    return result
+
+
+# Global scraper job store instance
+job_store = ScrapeJobStore()
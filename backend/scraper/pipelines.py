@@ -2,39 +2,100 @@
 Scrapy pipelines for processing scraped documents.
 """
 import hashlib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
 
-from sqlalchemy.orm import Session
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
 
+from core.config import settings
 from core.database import SessionLocal
 from models import Document
 
 
+# Flushes queued on the writer thread before process_item waits for one
+MAX_PENDING_FLUSHES = 2
+
+
+def upsert_statement(rows: List[Dict[str, Any]]):
+    """
+    INSERT ... ON CONFLICT statement for a batch of document rows.
+
+    New URLs are inserted; stored URLs are updated only when the content
+    hash differs. RETURNING yields (id, inserted) for the rows written, so
+    unchanged documents are not returned.
+    """
+    stmt = insert(Document).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Document.source_url],
+        set_={
+            'full_text': stmt.excluded.full_text,
+            'file_hash': stmt.excluded.file_hash,
+            'updated_at': stmt.excluded.updated_at,
+        },
+        where=Document.file_hash.is_distinct_from(stmt.excluded.file_hash),
+    ).returning(Document.id, literal_column("xmax = 0").label("inserted"))
+
+
 class DocumentPipeline:
-    """Pipeline to save documents to database."""
+    """
+    Pipeline to save documents to database.
 
-    def __init__(self):
-        self.session: Session = None
+    Items are buffered and written every batch_size items or flush_interval
+    seconds as one upsert, on a writer thread so the Scrapy reactor keeps
+    downloading. A batch that fails is retried in halves down to the rows
+    that fail on their own, so one bad row does not drop its batch. IDs of
+    new and changed documents are handed to the process_document_ids
+    task, which chunks and embeds them.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        """
+        Initialize document pipeline.
+
+        Args:
+            batch_size: Items per write (default: SCRAPER_PIPELINE_BATCH_SIZE)
+            flush_interval: Most seconds an item waits in the buffer, checked
+                as items arrive (default: SCRAPER_PIPELINE_FLUSH_INTERVAL)
+        """
+        self.batch_size = batch_size or settings.SCRAPER_PIPELINE_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.SCRAPER_PIPELINE_FLUSH_INTERVAL
+        )
+        self.buffer: Dict[str, Dict[str, Any]] = {}
+        self.pending: List[Future] = []
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.spider = None
+        self._flushed_at = time.monotonic()
 
     def open_spider(self, spider):
-        """Initialize database session when spider opens."""
-        self.session = SessionLocal()
-        spider.logger.info("DocumentPipeline: Database session opened")
+        """Start the writer thread when spider opens."""
+        self.spider = spider
+        # One writer keeps batches in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="document-pipeline")
+        self._flushed_at = time.monotonic()
+        spider.logger.info(
+            f"DocumentPipeline: writing every {self.batch_size} items or {self.flush_interval}s"
+        )
 
     def close_spider(self, spider):
-        """Close database session when spider closes."""
-        if self.session:
-            self.session.close()
-        spider.logger.info("DocumentPipeline: Database session closed")
+        """Write the remaining items and wait for the writer thread."""
+        self.flush()
+        self.executor.shutdown(wait=True)
+        self.pending = []
+        spider.logger.info("DocumentPipeline: all batches written")
 
     def process_item(self, item, spider):
         """
-        Process scraped item and save to database.
-        
+        Buffer a scraped item, flushing the buffer when it is due.
+
         Args:
             item: Scraped item dictionary
             spider: Spider instance
-            
+
         Returns:
             Processed item
         """
@@ -42,47 +103,111 @@ class DocumentPipeline:
         if item.get("type") == "discovery":
             return item
 
+        url = item.get("url")
+        if not url:
+            spider.logger.warning(f"DocumentPipeline: skipping item without URL: {item.get('title')!r}")
+            return item
+
+        content = item.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(content)
+
+        now = datetime.utcnow()
+        # Keyed by URL: one upsert cannot touch the same row twice
+        self.buffer[url] = {
+            'id': uuid4(),
+            'title': item.get("title", "Unknown"),
+            'document_type': item.get("document_type", "unknown"),
+            'document_number': item.get("document_number"),
+            'language': item.get("language", "ka"),
+            'status': "active",
+            'full_text': content,
+            'source_url': url,
+            'file_hash': hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            'created_at': now,
+            'updated_at': now,
+        }
+
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+        return item
+
+    def flush(self):
+        """Hand the buffered rows to the writer thread."""
+        self._flushed_at = time.monotonic()
+        if not self.buffer:
+            return
+
+        rows, self.buffer = list(self.buffer.values()), {}
+        self.pending = [future for future in self.pending if not future.done()]
+        if len(self.pending) >= MAX_PENDING_FLUSHES:
+            # The database is behind the crawl: wait instead of buffering more
+            self.pending.pop(0).result()
+        self.pending.append(self.executor.submit(self.write_and_dispatch, rows))
+
+    def write_and_dispatch(self, rows: List[Dict[str, Any]]):
+        """Write one batch and queue processing of its new and changed documents."""
+        failed: List[Dict[str, Any]] = []
+        written = self.write_rows(rows, failed)
+
+        inserted = sum(1 for _, is_new in written if is_new)
+        self.spider.logger.info(
+            f"DocumentPipeline: {inserted} new, {len(written) - inserted} changed, "
+            f"{len(rows) - len(written) - len(failed)} unchanged, {len(failed)} failed"
+        )
+        if written:
+            self.dispatch([str(doc_id) for doc_id, _ in written])
+
+    def write_rows(self, rows: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Write rows, splitting a failing batch in halves until the failing
+        rows are isolated.
+
+        Args:
+            rows: Document rows
+            failed: Collects the rows that could not be written
+
+        Returns:
+            (id, inserted) of the documents inserted or changed
+        """
         try:
-            # Calculate content hash
-            content = item.get("content", "")
-            if isinstance(content, list):
-                content = " ".join(content)
-            file_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
-
-            # Check if document already exists
-            existing = (
-                self.session.query(Document)
-                .filter(Document.source_url == item.get("url"))
-                .first()
+            return self.write_batch(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                self.spider.logger.error(f"DocumentPipeline: failed to write {rows[0]['source_url']}: {e}")
+                failed.extend(rows)
+                return []
+            self.spider.logger.warning(
+                f"DocumentPipeline: failed to write {len(rows)} documents, retrying in halves: {e}"
             )
 
-            if existing:
-                # Update if content changed
-                if existing.file_hash != file_hash:
-                    existing.full_text = content
-                    existing.file_hash = file_hash
-                    existing.updated_at = datetime.utcnow()
-                    self.session.commit()
-                    spider.logger.info(f"Updated document: {item.get('url')}")
-                else:
-                    spider.logger.debug(f"Document unchanged: {item.get('url')}")
-            else:
-                # Create new document
-                document = Document(
-                    title=item.get("title", "Unknown"),
-                    document_type=item.get("document_type", "unknown"),
-                    document_number=item.get("document_number"),
-                    language=item.get("language", "ka"),
-                    full_text=content,
-                    source_url=item.get("url"),
-                    file_hash=file_hash,
-                )
-                self.session.add(document)
-                self.session.commit()
-                spider.logger.info(f"Saved new document: {item.get('url')}")
+        middle = len(rows) // 2
+        return self.write_rows(rows[:middle], failed) + self.write_rows(rows[middle:], failed)
 
-        except Exception as e:
-            spider.logger.error(f"Error processing item: {e}")
-            self.session.rollback()
+    def write_batch(self, rows: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Upsert a batch of documents in one transaction.
 
-        return item
+        Returns:
+            (id, inserted) of the documents inserted or changed
+        """
+        db = SessionLocal()
+        try:
+            written = db.execute(upsert_statement(rows)).all()
+            db.commit()
+            return [tuple(row) for row in written]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def dispatch(self, document_ids: List[str]):
+        """Queue chunking and embedding of documents."""
+        try:
+            # Imported here so the Celery app only loads once there is work to queue
+            from scraper.tasks import process_document_ids
+            process_document_ids.delay(document_ids)
+        except Exception as e:
+            # process_documents picks up new (unchunked) documents later
+            self.spider.logger.warning(f"DocumentPipeline: could not queue {len(document_ids)} documents: {e}")
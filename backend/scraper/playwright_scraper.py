@@ -3,45 +3,191 @@ Playwright-based scraper for InfoHub (JavaScript-rendered SPA).
 """
 import asyncio
 import logging
-from typing import List, Dict, Optional
-from playwright.async_api import async_playwright, Page, Browser
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright, Route
 import hashlib
 from datetime import datetime
 
 from core.database import SessionLocal
-from models.document import Document, DocumentChunk
+from models.document import Document
 from rag.embeddings import embeddings_generator
-from rag.vector_store import vector_store
 from core.config import settings
+from processor.legal_chunker import legal_chunker
+from processor.document_writer import document_writer
+from scraper.base_scraper import MAX_THROTTLE_RETRIES
+from scraper.rate_limiter import rate_limiter
 
 
 logger = logging.getLogger(__name__)
 
 
+# Resources the text extraction never needs
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+
+# Analytics and tracking hosts (matched with their subdomains)
+BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'mc.yandex.ru',
+    'clarity.ms',
+)
+
+# Navigation and readiness timeouts in milliseconds
+NAVIGATION_TIMEOUT = 30000
+READY_TIMEOUT = 10000
+
+# Rendered when a document's text is in the page
+DOCUMENT_READY_SCRIPT = """
+    () => {
+        const el = document.querySelector('.document-content, .content, main, article');
+        return el !== null && el.innerText.trim().length >= 100;
+    }
+"""
+
+
+def is_blocked(url: str, resource_type: str) -> bool:
+    """Whether a browser request is an image, font or analytics call."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlparse(url).hostname or ''
+    return any(host == blocked or host.endswith('.' + blocked) for blocked in BLOCKED_HOSTS)
+
+
 class PlaywrightInfoHubScraper:
-    """Scraper using Playwright for JavaScript-rendered content."""
+    """
+    Scraper using Playwright for JavaScript-rendered content.
+    
+    A pool of browser contexts, one page each, scrapes documents
+    concurrently. Images, fonts and analytics requests are aborted, and
+    pages are read as soon as their content selector renders.
+    """
     
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None):
+        """
+        Initialize scraper.
+        
+        Args:
+            pool_size: Concurrent browser pages (default: SCRAPER_BROWSER_POOL_SIZE)
+        """
+        self.pool_size = pool_size or settings.SCRAPER_BROWSER_POOL_SIZE
+        self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
+        self.contexts: List[BrowserContext] = []
+        self.pages: Optional[asyncio.Queue] = None
         self.documents_scraped = 0
+        self.pages_loaded = 0
+        self.requests_blocked = 0
+        self.started_at: Optional[float] = None
     
     async def init_browser(self):
-        """Initialize Playwright browser."""
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=True)
-        logger.info("Browser initialized")
+        """Start Playwright, launch Chromium and open the page pool."""
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
+        
+        self.pages = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self.pages.put_nowait(await self._new_page())
+        
+        self.started_at = time.monotonic()
+        logger.info(f"Browser initialized with {self.pool_size} pages")
+    
+    async def _new_page(self) -> Page:
+        """Open a page in a fresh context with resource blocking."""
+        context = await self.browser.new_context(user_agent=settings.SCRAPER_USER_AGENT)
+        await context.route("**/*", self._route)
+        self.contexts.append(context)
+        return await context.new_page()
+    
+    async def _route(self, route: Route):
+        """Abort images, fonts and analytics; let everything else through."""
+        request = route.request
+        if is_blocked(request.url, request.resource_type):
+            self.requests_blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Borrow a page from the pool (waits while all are busy)."""
+        page = await self.pages.get()
+        try:
+            yield page
+        finally:
+            if page.is_closed():
+                # Replace a closed page so the pool keeps its size
+                self.contexts.remove(page.context)
+                await page.context.close()
+                page = await self._new_page()
+            self.pages.put_nowait(page)
     
     async def close_browser(self):
-        """Close browser."""
+        """Close the page pool, the browser and Playwright."""
+        for context in self.contexts:
+            await context.close()
+        self.contexts = []
+        self.pages = None
+        
         if self.browser:
             await self.browser.close()
-            logger.info("Browser closed")
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+        
+        logger.info(f"Browser closed: {self.stats()}")
+    
+    async def __aenter__(self) -> "PlaywrightInfoHubScraper":
+        await self.init_browser()
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close_browser()
+        return False
+    
+    def stats(self) -> Dict:
+        """Throughput of the browser pool."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            'pool_size': self.pool_size,
+            'pages_loaded': self.pages_loaded,
+            'requests_blocked': self.requests_blocked,
+            'pages_per_minute': round(self.pages_loaded * 60 / elapsed, 1) if elapsed else 0.0,
+        }
+    
+    async def goto(self, page: Page, url: str):
+        """
+        Navigate to a URL under the shared per-host rate limit.
+        
+        Waits for the DOM only; callers wait for the selector they need.
+        A 429/503 on the document request pauses the host (honoring
+        Retry-After) and the navigation is retried once allowed.
+        """
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            async with rate_limiter.slot(url) as slot:
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+                self.pages_loaded += 1
+                if response is None:
+                    slot.record(200)
+                    return response
+                slot.record(response.status, response.headers.get("retry-after"))
+                if not slot.throttled or attempt == MAX_THROTTLE_RETRIES:
+                    return response
+                logger.warning(f"Throttled loading {url}: HTTP {response.status}, retrying")
+        return None
     
     async def scrape_search_page(
         self,
         page: Page,
         search_url: str,
-        wait_selector: str = ".document-item, .search-result, article"
+        wait_selector: str = ".document-item, .search-result, article, a[href*='/document/']"
     ) -> Dict:
         """
         Scrape a search results page.
@@ -50,17 +196,14 @@ class PlaywrightInfoHubScraper:
             Dict with document links and metadata
         """
         try:
-            await page.goto(search_url, wait_until="networkidle", timeout=30000)
+            await self.goto(page, search_url)
             
-            # Wait for content to load
+            # Wait for the results to render
             try:
-                await page.wait_for_selector(wait_selector, timeout=10000)
-            except:
+                await page.wait_for_selector(wait_selector, timeout=READY_TIMEOUT)
+            except Exception:
                 logger.warning(f"Selector {wait_selector} not found, continuing...")
             
-            # Additional wait for dynamic content
-            await asyncio.sleep(2)
-            
             # Get all links
             links = await page.evaluate("""
                 () => {
@@ -96,10 +239,13 @@ class PlaywrightInfoHubScraper:
             Dict with title, content, metadata
         """
         try:
-            await page.goto(doc_url, wait_until="networkidle", timeout=30000)
+            await self.goto(page, doc_url)
             
-            # Wait for document content
-            await asyncio.sleep(3)
+            # Wait for the document text to render
+            try:
+                await page.wait_for_function(DOCUMENT_READY_SCRIPT, timeout=READY_TIMEOUT)
+            except Exception:
+                logger.warning(f"Document content not rendered: {doc_url}")
             
             # Extract document data
             doc_data = await page.evaluate("""
@@ -144,32 +290,6 @@ class PlaywrightInfoHubScraper:
             logger.error(f"Error scraping document {doc_url}: {e}")
             return None
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-        """Split text into chunks."""
-        if len(text) <= chunk_size:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to break at sentence boundary
-            if end < len(text):
-                for i in range(end, max(start + overlap, start), -1):
-                    if text[i] in '.!?\n':
-                        end = i + 1
-                        break
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            start = end - overlap
-        
-        return chunks
-    
     async def process_and_store_document(
         self,
         doc_url: str,
@@ -191,77 +311,51 @@ class PlaywrightInfoHubScraper:
             # Check if exists
             existing = db.query(Document).filter_by(source_url=doc_url).first()
             if existing:
-                logger.info(f"Document already exists: {doc_url}")
+                if existing.file_hash == content_hash:
+                    logger.info(f"Document unchanged: {doc_url}")
+                else:
+                    # Content changed: re-embed only the chunks that differ
+                    document_writer.reindex(
+                        db,
+                        existing,
+                        content,
+                        content_hash,
+                        encode=embeddings_generator.encode if embeddings_generator.model else None,
+                    )
                 return existing
             
             # Detect language
             language = 'ka' if any('\u10A0' <= c <= '\u10FF' for c in content) else 'en'
             
-            # Create document
-            document = Document(
-                title=title,
-                document_type=doc_data.get('docType', 'unknown'),
-                language=language,
-                source_url=doc_url,
-                full_text=content,
-                file_hash=content_hash,
-                metadata_json={
-                    'source': 'infohub.rs.ge',
-                    'scraped_at': datetime.utcnow().isoformat(),
-                    'scraper': 'playwright',
-                    **doc_data.get('metadata', {})
-                },
-                status='active',
-            )
-            db.add(document)
-            db.flush()
-            
             # Chunk and create embeddings
-            chunks = self.chunk_text(content)
+            chunks = legal_chunker.chunk_text(content)
             logger.info(f"Created {len(chunks)} chunks for {title}")
             
+            embeddings = None
             if embeddings_generator.model:
-                embeddings = embeddings_generator.encode(chunks)
-                
-                vector_ids = []
-                vector_embeddings = []
-                vector_metadatas = []
-                vector_documents = []
-                
-                for i, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
-                    chunk = DocumentChunk(
-                        document_id=document.id,
-                        chunk_index=i,
-                        content=chunk_text,
-                        metadata_json={'position': i, 'total_chunks': len(chunks)},
-                    )
-                    db.add(chunk)
-                    db.flush()
-                    
-                    vector_ids.append(f"doc_{document.id}_chunk_{chunk.id}")
-                    vector_embeddings.append(embedding)
-                    vector_metadatas.append({
-                        'document_id': str(document.id),
-                        'chunk_id': str(chunk.id),
-                        'title': title,
-                        'source_url': doc_url,
-                        'document_type': doc_data.get('docType', 'unknown'),
-                        'language': language,
-                        'source': 'infohub.rs.ge',
-                        'chunk_index': i,
-                    })
-                    vector_documents.append(chunk_text)
-                
-                # Add to vector store
-                if vector_store.client:
-                    vector_store.add_documents(
-                        ids=vector_ids,
-                        embeddings=vector_embeddings,
-                        documents=vector_documents,
-                        metadatas=vector_metadatas,
-                    )
+                embeddings = embeddings_generator.encode([c["content"] for c in chunks])
             
-            db.commit()
+            # Store document, chunks and embeddings in one transaction
+            document = document_writer.write(
+                db,
+                Document(
+                    title=title,
+                    document_type=doc_data.get('docType', 'unknown'),
+                    language=language,
+                    source_url=doc_url,
+                    full_text=content,
+                    file_hash=content_hash,
+                    metadata_json={
+                        'source': 'infohub.rs.ge',
+                        'scraped_at': datetime.utcnow().isoformat(),
+                        'scraper': 'playwright',
+                        **doc_data.get('metadata', {})
+                    },
+                    status='active',
+                ),
+                chunks,
+                embeddings,
+            )
             self.documents_scraped += 1
             logger.info(f"✓ Stored: {title}")
             
@@ -276,7 +370,7 @@ class PlaywrightInfoHubScraper:
         self,
         search_query: str,
         max_documents: int = 10
-    ) -> List[Document]:
+    ) -> List[Dict]:
         """
         Scrape documents using search query.
         
@@ -285,30 +379,34 @@ class PlaywrightInfoHubScraper:
             max_documents: Maximum documents to scrape
         
         Returns:
-            List of Document objects
+            Stored documents ({'id', 'title', 'url'}, read while the session
+            is open)
         """
         if not self.browser:
             await self.init_browser()
         
+        # Search URL
+        search_url = f"https://infohub.rs.ge/ka/search?searchText={search_query}&skip=0&take=40"
+        
+        logger.info(f"Searching: {search_query}")
+        async with self.page() as page:
+            search_results = await self.scrape_search_page(page, search_url)
+        
+        doc_links = search_results['unique_docs'][:max_documents]
+        logger.info(f"Found {len(doc_links)} documents")
+        
+        async def scrape(doc_url: str) -> Optional[Dict]:
+            async with self.page() as page:
+                return await self.scrape_document(page, doc_url)
+        
+        # Documents render concurrently across the page pool
+        results = await asyncio.gather(*(scrape(doc_url) for doc_url in doc_links))
+        
         db = SessionLocal()
         documents = []
         
         try:
-            page = await self.browser.new_page()
-            
-            # Search URL
-            search_url = f"https://infohub.rs.ge/ka/search?searchText={search_query}&skip=0&take=40"
-            
-            logger.info(f"Searching: {search_query}")
-            search_results = await self.scrape_search_page(page, search_url)
-            
-            doc_links = search_results['unique_docs'][:max_documents]
-            logger.info(f"Found {len(doc_links)} documents")
-            
-            # Scrape each document
-            for doc_url in doc_links:
-                doc_data = await self.scrape_document(page, doc_url)
-                
+            for doc_url, doc_data in zip(doc_links, results):
                 if doc_data:
                     document = await self.process_and_store_document(
                         doc_url,
@@ -317,11 +415,8 @@ class PlaywrightInfoHubScraper:
                     )
                     
                     if document:
-                        documents.append(document)
-                
-                await asyncio.sleep(1)  # Rate limiting
-            
-            await page.close()
+                        # Read while the session is open: closing it detaches the document
+                        documents.append({'id': document.id, 'title': document.title, 'url': document.source_url})
         
         finally:
             db.close()
@@ -336,15 +431,22 @@ class PlaywrightInfoHubScraper:
             'vat_guide': 'დღგ მეთოდოლოგია',
         }
         
+        if not self.browser:
+            await self.init_browser()
+        
         results = {}
         
-        for key, query in key_searches.items():
-            logger.info(f"Searching for {key}: {query}")
-            docs = await self.scrape_with_search(query, max_documents=5)
+        # Searches share the page pool, so they run concurrently
+        found = await asyncio.gather(*(
+            self.scrape_with_search(query, max_documents=5) for query in key_searches.values()
+        ))
+        
+        for (key, query), docs in zip(key_searches.items(), found):
             results[key] = {
                 'query': query,
                 'documents_found': len(docs),
-                'documents': [{'title': d.title, 'url': d.source_url} for d in docs]
+                'documents': [{'title': doc['title'], 'url': doc['url']} for doc in docs]
             }
         
+        logger.info(f"Key documents scraped: {self.stats()}")
         return results
@@ -0,0 +1,261 @@
+"""
+Per-host rate limiting shared by all scrapers.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (seconds or HTTP date).
+
+    Args:
+        value: Header value
+
+    Returns:
+        Seconds to wait, or None if absent or unparsable
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostThrottle:
+    """
+    Token bucket and concurrency window of one host.
+
+    The request rate and the number of requests in flight adapt AIMD-style:
+    every successful response adds a little to both, every throttling
+    response (429/503) or failure halves them. A Retry-After header, or an
+    exponential backoff when there is none, pauses the host entirely.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        max_rate: float,
+        max_concurrency: int,
+        adaptive: bool = True,
+        max_backoff: float = 300.0,
+    ):
+        self.rate = rate
+        self.min_rate = rate / 8 if adaptive else rate
+        self.max_rate = max(rate, max_rate) if adaptive else rate
+        self.concurrency = 1.0 if adaptive else float(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.adaptive = adaptive
+        self.max_backoff = max_backoff
+
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0  # consecutive throttling responses
+
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        """Condition of the running event loop (scrapers may run in several loops)."""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+        return self._condition
+
+    def _refill(self, now: float):
+        """Add tokens for the time elapsed, up to one second of burst."""
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until the host may receive another request."""
+        condition = self.condition
+        async with condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self.blocked_until:
+                    timeout = self.blocked_until - now
+                elif self.in_flight >= max(1, int(self.concurrency)):
+                    timeout = None  # until a request finishes
+                elif self.tokens < 1:
+                    timeout = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, status: Optional[int] = None, retry_after: Optional[float] = None):
+        """
+        Record the outcome of a request and adapt the limits.
+
+        Args:
+            status: HTTP status, or None if the request failed
+            retry_after: Seconds from a Retry-After header
+        """
+        condition = self.condition
+        async with condition:
+            self.in_flight = max(0, self.in_flight - 1)
+
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                delay = retry_after
+                if delay is None:
+                    delay = min(self.max_backoff, (1 / self.rate) * 2 ** self.throttled)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + min(delay, self.max_backoff))
+                self._decrease()
+                logger.warning(
+                    f"Throttled (HTTP {status}): pausing {delay:.1f}s, "
+                    f"now {self.rate:.2f} req/s x {int(self.concurrency)}"
+                )
+            elif status is None or status >= 500:
+                self._decrease()
+            else:
+                self.throttled = 0
+                if self.adaptive:
+                    self.rate = min(self.max_rate, self.rate + self.min_rate)
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+            condition.notify_all()
+
+    def _decrease(self):
+        """Multiplicative decrease of rate and concurrency."""
+        if self.adaptive:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.concurrency = max(1.0, self.concurrency / 2)
+
+
+class RequestSlot:
+    """Permission for one request; record the response before leaving."""
+
+    def __init__(self, throttle: HostThrottle):
+        self.throttle = throttle
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def record(self, status: Optional[int], retry_after: Optional[str] = None):
+        """
+        Record the response of the request.
+
+        Args:
+            status: HTTP status code
+            retry_after: Retry-After header value
+        """
+        self.status = status
+        self.retry_after = parse_retry_after(retry_after)
+
+    @property
+    def throttled(self) -> bool:
+        """Whether the host asked us to slow down."""
+        return self.status in THROTTLE_STATUSES
+
+    async def __aenter__(self) -> "RequestSlot":
+        await self.throttle.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.throttle.release(self.status, self.retry_after)
+        return False
+
+
+class RateLimiter:
+    """
+    Rate limits keyed by host, shared by every scraper in the process.
+
+    Usage:
+        async with rate_limiter.slot(url) as slot:
+            async with session.get(url) as response:
+                slot.record(response.status, response.headers.get('Retry-After'))
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        adaptive: Optional[bool] = None,
+        max_backoff: Optional[float] = None,
+    ):
+        """
+        Initialize rate limiter.
+
+        Args:
+            delay: Initial delay between requests to a host in seconds
+            max_rate: Highest requests per second a host is ramped up to
+            max_concurrency: Most requests in flight per host
+            adaptive: Adapt rate and concurrency to responses (autothrottle)
+            max_backoff: Longest pause after a throttling response in seconds
+        """
+        delay = delay if delay is not None else settings.SCRAPER_DELAY
+        self.rate = 1 / delay if delay > 0 else 1000.0
+        self.max_rate = max_rate or settings.SCRAPER_MAX_REQUESTS_PER_SECOND
+        self.max_concurrency = max_concurrency or settings.SCRAPER_CONCURRENT_REQUESTS
+        self.adaptive = adaptive if adaptive is not None else settings.SCRAPER_AUTOTHROTTLE_ENABLED
+        self.max_backoff = max_backoff or settings.SCRAPER_MAX_BACKOFF
+        self.hosts: Dict[str, HostThrottle] = {}
+
+    def throttle(self, url: str) -> HostThrottle:
+        """Get the throttle of a URL's host."""
+        host = urlparse(url).netloc.lower()
+        if host not in self.hosts:
+            self.hosts[host] = HostThrottle(
+                self.rate,
+                self.max_rate,
+                self.max_concurrency,
+                adaptive=self.adaptive,
+                max_backoff=self.max_backoff,
+            )
+        return self.hosts[host]
+
+    def slot(self, url: str) -> RequestSlot:
+        """Async context manager admitting one request to a URL's host."""
+        return RequestSlot(self.throttle(url))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Current limits per host."""
+        return {
+            host: {
+                'rate': round(throttle.rate, 3),
+                'concurrency': int(throttle.concurrency),
+                'in_flight': throttle.in_flight,
+            }
+            for host, throttle in self.hosts.items()
+        }
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
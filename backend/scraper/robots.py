@@ -0,0 +1,186 @@
+"""
+Shared asynchronous robots.txt cache.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from core.config import settings
+from scraper.http_client import http_client, read_text
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cache lifetime of a robots.txt that could not be fetched
+FAILURE_TTL = 60.0
+
+# Size limit of a robots.txt (Google reads at most 500 KiB)
+ROBOTS_MAX_BYTES = 500 * 1024
+
+
+class HostRobots:
+    """Parsed robots.txt of one host with memoized decisions."""
+
+    def __init__(self, parser: Optional[RobotFileParser], ttl: float):
+        self.parser = parser
+        self.expires_at = time.monotonic() + ttl
+        self.decisions: Dict[Tuple[str, str], bool] = {}
+        # Rules match by prefix, so a decision only depends on this many
+        # leading characters of the normalized path
+        self.prefix_length = self._longest_rule(parser) if parser else 0
+
+    @staticmethod
+    def _longest_rule(parser: RobotFileParser) -> int:
+        """Length of the longest rule path in the file."""
+        entries = list(parser.entries)
+        if parser.default_entry:
+            entries.append(parser.default_entry)
+        return max(
+            (len(rule.path) for entry in entries for rule in entry.rulelines),
+            default=0,
+        )
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def can_fetch(self, user_agent: str, url: str) -> bool:
+        """
+        Check a URL against the rules, memoized by path prefix.
+
+        Args:
+            user_agent: Crawler user agent
+            url: Absolute URL
+
+        Returns:
+            True if the URL may be fetched
+        """
+        if self.parser is None:
+            return True
+
+        # Same normalization RobotFileParser applies before matching
+        parsed = urlparse(unquote(url))
+        path = quote(urlunparse(('', '', parsed.path, parsed.params, parsed.query, parsed.fragment))) or '/'
+        key = (user_agent, path[:self.prefix_length])
+
+        decision = self.decisions.get(key)
+        if decision is None:
+            decision = self.parser.can_fetch(user_agent, url)
+            self.decisions[key] = decision
+        return decision
+
+
+class RobotsCache:
+    """
+    robots.txt rules per host, shared by all scraper instances.
+
+    Files are fetched with aiohttp (never blocking the event loop), parsed
+    once and kept for a TTL; concurrent lookups of the same host wait for
+    a single fetch.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Initialize robots.txt cache.
+
+        Args:
+            ttl: Seconds a fetched robots.txt is trusted (default: SCRAPER_ROBOTS_TTL)
+        """
+        self.ttl = ttl if ttl is not None else settings.SCRAPER_ROBOTS_TTL
+        self.hosts: Dict[str, HostRobots] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def can_fetch(
+        self,
+        url: str,
+        user_agent: str,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> bool:
+        """
+        Check if a URL may be fetched according to its host's robots.txt.
+
+        Args:
+            url: URL to check
+            user_agent: Crawler user agent
+            session: aiohttp session to fetch robots.txt with (optional)
+
+        Returns:
+            True if the URL may be fetched
+        """
+        robots = await self.get(url, user_agent, session)
+        try:
+            return robots.can_fetch(user_agent, url)
+        except Exception as e:
+            logger.warning(f"Error checking robots.txt for {url}: {e}")
+            return True
+
+    async def get(
+        self,
+        url: str,
+        user_agent: str,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> HostRobots:
+        """Get the (possibly cached) rules of a URL's host."""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+        robots = self.hosts.get(origin)
+        if robots is not None and not robots.expired:
+            return robots
+
+        task = self._pending.get(origin)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch(origin, user_agent, session))
+            self._pending[origin] = task
+            task.add_done_callback(lambda _: self._pending.pop(origin, None))
+
+        robots = await asyncio.shield(task)
+        self.hosts[origin] = robots
+        return robots
+
+    async def _fetch(
+        self,
+        origin: str,
+        user_agent: str,
+        session: Optional[aiohttp.ClientSession],
+    ) -> HostRobots:
+        """Download and parse one robots.txt."""
+        robots_url = f"{origin}/robots.txt"
+        session = session or http_client.session()
+
+        try:
+            async with session.get(
+                robots_url,
+                headers={'User-Agent': user_agent},
+            ) as response:
+                parser = RobotFileParser(robots_url)
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif 400 <= response.status < 500:
+                    parser.allow_all = True
+                elif response.status >= 500:
+                    raise RuntimeError(f"HTTP {response.status}")
+                else:
+                    parser.parse((await read_text(response, ROBOTS_MAX_BYTES)).splitlines())
+                parser.modified()
+
+            logger.info(f"Loaded robots.txt from {robots_url}")
+            return HostRobots(parser, self.ttl)
+
+        except Exception as e:
+            logger.warning(f"Failed to load robots.txt from {robots_url}: {e}")
+            return HostRobots(None, FAILURE_TTL)
+
+    def clear(self):
+        """Forget all cached robots.txt files."""
+        self.hosts.clear()
+
+
+# Global robots.txt cache instance
+robots_cache = RobotsCache()
@@ -1,10 +1,16 @@
 """
 Celery tasks for background jobs.
 """
-from celery import Celery
+from typing import Dict, List, Tuple
+
+from celery import Celery, chord, group
 from celery.schedules import crontab
+from celery.signals import worker_process_init
+from sqlalchemy import and_, exists, or_
 
 from core.config import settings
+from core.database import SessionLocal
+from models.document import Document, DocumentChunk
 
 # Initialize Celery app
 celery_app = Celery(
@@ -45,6 +51,173 @@ def scrape_infohub():
     return {"status": "completed", "message": "Scraping task skeleton"}
 
 
+@celery_app.task(name="scrape_url_job")
+def scrape_url_job(job_id: str, url: str, max_depth: int, max_pages: int) -> Dict:
+    """
+    Crawl from a URL for a scraper job started through the API.
+
+    Status and progress counters are kept in the job's Redis hash, so any
+    API worker can report them.
+
+    Args:
+        job_id: Job ID (see scraper.jobs)
+        url: Starting URL
+        max_depth: Maximum link depth
+        max_pages: Maximum pages to scrape
+    """
+    from scraper.jobs import run_scrape_job
+
+    try:
+        result = run_scrape_job(job_id, url, max_depth, max_pages)
+    except Exception as e:
+        print(f"Scraper job {job_id} failed: {e}")
+        raise
+
+    return {
+        "status": "completed",
+        "documents_scraped": result["documents_scraped"],
+        "pages_visited": result["pages_visited"],
+    }
+
+
+# Embedding model of this worker process
+_embedder = None
+
+
+@worker_process_init.connect
+def load_embedding_model(**kwargs):
+    """Load the embedding model once per worker process, not per task."""
+    global _embedder
+    from rag.embeddings import embeddings_generator
+
+    _embedder = embeddings_generator
+
+
+def get_embedder():
+    """Embedding generator of this worker process."""
+    if _embedder is None:
+        load_embedding_model()
+    return _embedder
+
+
+def _pending_condition():
+    """Documents with text that are not chunked or not fully embedded."""
+    has_chunks = exists().where(DocumentChunk.document_id == Document.id)
+    has_missing_embedding = exists().where(
+        and_(DocumentChunk.document_id == Document.id, DocumentChunk.embedding.is_(None))
+    )
+    return and_(Document.full_text.isnot(None), or_(~has_chunks, has_missing_embedding))
+
+
+def shard_id_ranges(db, condition=None, shard_size: int = None) -> List[Tuple[str, str]]:
+    """
+    Split matching document ids into contiguous (first_id, last_id) ranges.
+
+    Args:
+        db: Database session
+        condition: Optional filter on Document
+        shard_size: Documents per range (default from settings)
+
+    Returns:
+        Inclusive id ranges, in id order
+    """
+    shard_size = shard_size or settings.INGEST_SHARD_SIZE
+    query = db.query(Document.id).order_by(Document.id)
+    if condition is not None:
+        query = query.filter(condition)
+
+    ranges, first_id, last_id, count = [], None, None, 0
+    for (doc_id,) in query.yield_per(5000):
+        if first_id is None:
+            first_id = doc_id
+        last_id = doc_id
+        count += 1
+        if count == shard_size:
+            ranges.append((str(first_id), str(last_id)))
+            first_id, count = None, 0
+
+    if first_id is not None:
+        ranges.append((str(first_id), str(last_id)))
+    return ranges
+
+
+def _claim_document(db, document_id, wait: bool = False):
+    """
+    Lock a document row until the next commit or rollback.
+
+    Chunking runs under this lock, so two tasks never diff the same
+    document's chunks at once and insert them twice (e.g. a shard of an
+    hourly run still going when the next run dispatches its range again).
+
+    Args:
+        db: Database session
+        document_id: Document to claim
+        wait: Wait for another task's lock instead of skipping the document
+
+    Returns:
+        The locked document, or None if it is gone or claimed elsewhere
+    """
+    return (
+        db.query(Document)
+        .filter(Document.id == document_id)
+        .with_for_update(skip_locked=not wait)
+        .first()
+    )
+
+
+def _embed_chunks(db, chunk_query, batch_size: int = 256) -> int:
+    """Encode chunks from a (id, content) query and store their vectors."""
+    from rag.vector_store_pgvector import vector_store
+
+    embedder = get_embedder()
+    if not embedder.model:
+        return 0
+
+    embedded = 0
+    batch = []
+    for row in chunk_query.order_by(DocumentChunk.id).yield_per(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            embedded += vector_store.update_embeddings(
+                [chunk_id for chunk_id, _ in batch],
+                embedder.encode([content for _, content in batch]),
+            )
+            batch = []
+
+    if batch:
+        embedded += vector_store.update_embeddings(
+            [chunk_id for chunk_id, _ in batch],
+            embedder.encode([content for _, content in batch]),
+        )
+    return embedded
+
+
+def _dispatch_shards(shard_task, ranges: List[Tuple[str, str]], task_name: str, *args) -> Dict:
+    """Run one subtask per id range and aggregate results in a chord callback."""
+    if not ranges:
+        return {"status": "completed", "task": task_name, "shards": 0, "message": "Nothing to do"}
+
+    result = chord(
+        group(shard_task.s(first_id, last_id, *args) for first_id, last_id in ranges)
+    )(aggregate_shard_results.s(task_name))
+
+    print(f"{task_name}: dispatched {len(ranges)} shards")
+    return {"status": "dispatched", "task": task_name, "shards": len(ranges), "summary_task_id": result.id}
+
+
+@celery_app.task(name="aggregate_shard_results")
+def aggregate_shard_results(results: List[Dict], task_name: str) -> Dict:
+    """Sum the counters returned by all shards of a job."""
+    summary = {"status": "completed", "task": task_name, "shards": len(results)}
+    for result in results:
+        for key, value in result.items():
+            if isinstance(value, int):
+                summary[key] = summary.get(key, 0) + value
+
+    print(f"{task_name} summary: {summary}")
+    return summary
+
+
 @celery_app.task(name="process_documents")
 def process_documents():
     """
@@ -55,13 +228,119 @@ def process_documents():
     - Chunking
     - Embedding generation
     - Vector DB indexing
+
+    Pending documents are split by id range into process_document_shard
+    subtasks that run in parallel across workers.
+    """
+    db = SessionLocal()
+    try:
+        ranges = shard_id_ranges(db, _pending_condition())
+    finally:
+        db.close()
+
+    return _dispatch_shards(process_document_shard, ranges, "process_documents")
+
+
+@celery_app.task(name="process_document_shard")
+def process_document_shard(first_id: str, last_id: str) -> Dict:
+    """
+    Chunk and embed pending documents with ids in [first_id, last_id].
+
+    Documents without chunks are chunked and embedded; chunks still missing
+    an embedding (e.g. stored while the model was unavailable) are embedded.
+    Each document is claimed (SELECT ... FOR UPDATE SKIP LOCKED) before it
+    is chunked, so overlapping runs skip documents another shard holds.
+    """
+    from processor.document_writer import document_writer
+    from processor.legal_chunker import legal_chunker
+
+    embedder = get_embedder()
+    encode = embedder.encode if embedder.model else None
+    in_range = Document.id.between(first_id, last_id)
+
+    db = SessionLocal()
+    stats = {"documents": 0, "chunks_created": 0, "chunks_embedded": 0, "errors": 0}
+    try:
+        unchunked = [doc_id for (doc_id,) in db.query(Document.id).filter(
+            in_range,
+            Document.full_text.isnot(None),
+            ~exists().where(DocumentChunk.document_id == Document.id),
+        )]
+
+        for document_id in unchunked:
+            # Held until update() commits; its chunk diff runs after the
+            # claim, so it sees chunks another task committed meanwhile
+            document = _claim_document(db, document_id)
+            if document is None:
+                continue
+            try:
+                changes = document_writer.update(
+                    db, document, legal_chunker.chunk_text(document.full_text), encode
+                )
+                stats["chunks_created"] += changes["inserted"]
+                if encode:
+                    stats["chunks_embedded"] += changes["inserted"]
+            except Exception as e:
+                print(f"Error processing document {document.id}: {e}")
+                stats["errors"] += 1
+            stats["documents"] += 1
+
+        stats["chunks_embedded"] += _embed_chunks(
+            db,
+            db.query(DocumentChunk.id, DocumentChunk.content)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .filter(in_range, DocumentChunk.embedding.is_(None)),
+        )
+        return stats
+    finally:
+        db.close()
+
+
+@celery_app.task(name="process_document_ids")
+def process_document_ids(document_ids: List[str]) -> Dict:
     """
-    print("Processing documents task called (skeleton implementation)")
-    return {"status": "completed", "message": "Processing task skeleton"}
+    Chunk and embed new or changed documents by id.
+
+    Chunks are diffed against the stored ones, so a changed document only
+    has its new chunks embedded. Each document is claimed first, waiting
+    for a process_document_shard that is chunking it.
+
+    Args:
+        document_ids: Documents written by the Scrapy DocumentPipeline
+    """
+    from processor.document_writer import document_writer
+    from processor.legal_chunker import legal_chunker
+
+    embedder = get_embedder()
+    encode = embedder.encode if embedder.model else None
+
+    db = SessionLocal()
+    stats = {"documents": 0, "chunks_created": 0, "chunks_deleted": 0, "errors": 0}
+    try:
+        for document_id in document_ids:
+            document = _claim_document(db, document_id, wait=True)
+            if document is None or document.full_text is None:
+                db.rollback()
+                continue
+            try:
+                changes = document_writer.update(
+                    db, document, legal_chunker.chunk_text(document.full_text), encode
+                )
+                stats["chunks_created"] += changes["inserted"]
+                stats["chunks_deleted"] += changes["deleted"]
+            except Exception as e:
+                print(f"Error processing document {document.id}: {e}")
+                stats["errors"] += 1
+            stats["documents"] += 1
+
+        print(f"process_document_ids: {stats}")
+        return stats
+    finally:
+        db.close()
 
 
 @celery_app.task(name="reindex_documents")
-def reindex_documents():
+def reindex_documents(rechunk: bool = False):
     """
     Task to reindex all documents in vector database.
     
@@ -69,9 +348,117 @@ def reindex_documents():
     - Changing embedding models
     - Updating chunking strategy
     - Recovering from data loss
+
+    All documents are split by id range into reindex_document_shard
+    subtasks that run in parallel across workers.
+
+    Args:
+        rechunk: Re-chunk documents from full_text and embed only changed
+            chunks, instead of re-embedding every chunk
+    """
+    db = SessionLocal()
+    try:
+        ranges = shard_id_ranges(db)
+    finally:
+        db.close()
+
+    return _dispatch_shards(reindex_document_shard, ranges, "reindex_documents", rechunk)
+
+
+@celery_app.task(name="reindex_document_shard")
+def reindex_document_shard(first_id: str, last_id: str, rechunk: bool = False) -> Dict:
+    """
+    Re-embed (or re-chunk) documents with ids in [first_id, last_id].
+
+    Without rechunk every chunk is re-embedded, e.g. after a model change.
+    With rechunk each document is claimed and its new chunks are diffed
+    against the stored ones, so only chunks whose content changed are
+    embedded.
+    """
+    from processor.document_writer import document_writer
+    from processor.legal_chunker import legal_chunker
+
+    in_range = Document.id.between(first_id, last_id)
+
+    db = SessionLocal()
+    stats = {"documents": 0, "chunks_created": 0, "chunks_deleted": 0, "chunks_embedded": 0, "errors": 0}
+    try:
+        if not rechunk:
+            stats["documents"] = db.query(Document.id).filter(in_range).count()
+            stats["chunks_embedded"] = _embed_chunks(
+                db,
+                db.query(DocumentChunk.id, DocumentChunk.content)
+                .join(Document, Document.id == DocumentChunk.document_id)
+                .filter(in_range),
+            )
+            return stats
+
+        embedder = get_embedder()
+        encode = embedder.encode if embedder.model else None
+        document_ids = [doc_id for (doc_id,) in db.query(Document.id).filter(
+            in_range, Document.full_text.isnot(None)
+        )]
+
+        for document_id in document_ids:
+            document = _claim_document(db, document_id, wait=True)
+            if document is None or document.full_text is None:
+                db.rollback()
+                continue
+            try:
+                changes = document_writer.update(
+                    db, document, legal_chunker.chunk_text(document.full_text), encode
+                )
+                stats["chunks_created"] += changes["inserted"]
+                stats["chunks_deleted"] += changes["deleted"]
+                if encode:
+                    stats["chunks_embedded"] += changes["inserted"]
+            except Exception as e:
+                print(f"Error re-chunking document {document.id}: {e}")
+                stats["errors"] += 1
+            stats["documents"] += 1
+
+        # Kept chunks keep their vectors; embed only those still missing one
+        stats["chunks_embedded"] += _embed_chunks(
+            db,
+            db.query(DocumentChunk.id, DocumentChunk.content)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .filter(in_range, DocumentChunk.embedding.is_(None)),
+        )
+        return stats
+    finally:
+        db.close()
+
+
+@celery_app.task(name="backfill_embedding_versions")
+def backfill_embedding_versions(model_version: str = None) -> Dict:
     """
-    print("Reindexing documents task called (skeleton implementation)")
-    return {"status": "completed", "message": "Reindexing task skeleton"}
+    Fill versioned embeddings in the background.
+
+    Embeds chunks missing from a building version (a model migration in
+    progress) or from the active version (chunks added since the switch).
+
+    Args:
+        model_version: Only this version (default: all building and active)
+    """
+    from rag.embedding_versions import embedding_versions
+    from rag.embeddings import get_embeddings_generator
+
+    versions = embedding_versions.pending_versions()
+    if model_version:
+        versions = [v for v in versions if v["model_version"] == model_version]
+
+    written = {}
+    for version in versions:
+        embedder = get_embeddings_generator(version["model_name"])
+        if not embedder.model:
+            print(f"Embedding model {version['model_name']} unavailable, skipping {version['model_version']}")
+            continue
+        written[version["model_version"]] = embedding_versions.backfill(
+            version["model_version"], embedder.encode
+        )
+
+    print(f"Embedding backfill: {written}")
+    return {"status": "completed", "written": written}
 
 
 # Celery Beat schedule
@@ -84,6 +471,10 @@ celery_app.conf.beat_schedule = {
         "task": "process_documents",
         "schedule": crontab(minute=0),  # Run every hour
     },
+    "hourly-embedding-backfill": {
+        "task": "backfill_embedding_versions",
+        "schedule": crontab(minute=30),  # Run every hour, after processing
+    },
 }
 
 celery_app.conf.timezone = "UTC"
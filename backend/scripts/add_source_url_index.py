@@ -0,0 +1,64 @@
+"""
+Create the unique index on documents.source_url in an existing database.
+
+New databases get the index from the model (init_db). Existing ones may
+hold several rows per URL, written before the index existed: all but the
+most recently updated row of each URL are deleted (with their chunks)
+before the index is built without locking writes.
+
+Usage:
+    python scripts/add_source_url_index.py --dry-run
+    python scripts/add_source_url_index.py
+"""
+import sys
+import os
+import argparse
+import logging
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from core.database import engine
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+DUPLICATES_QUERY = """
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY source_url ORDER BY updated_at DESC, created_at DESC
+        ) AS position
+        FROM documents
+    ) ranked
+    WHERE position > 1
+"""
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Create the unique index on documents.source_url")
+    parser.add_argument("--dry-run", action="store_true", help="Only count duplicate documents")
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        duplicates = connection.execute(text(f"SELECT COUNT(*) FROM ({DUPLICATES_QUERY}) duplicates")).scalar()
+        logger.info(f"{duplicates} duplicate documents")
+        if args.dry_run:
+            return
+        if duplicates:
+            connection.execute(text(f"DELETE FROM documents WHERE id IN ({DUPLICATES_QUERY})"))
+            logger.info(f"✓ Deleted {duplicates} duplicate documents")
+
+    # CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_source_url ON documents (source_url)"
+        ))
+    logger.info("✓ Created idx_documents_source_url")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark vector-only vs hybrid (vector + lexical, RRF) retrieval precision.
+
+Queries cite article/order numbers; a retrieved chunk counts as relevant when
+its content contains one of the query's expected markers.
+
+Usage:
+    python scripts/benchmark_hybrid_retrieval.py
+    python scripts/benchmark_hybrid_retrieval.py --queries queries.json --top-k 10
+
+Query file format:
+    [{"query": "მუხლი 168", "expected": ["მუხლი 168"]}, ...]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from core.config import settings
+from rag.embeddings import embeddings_generator
+from rag.vector_store_pgvector import vector_store
+from rag.fusion import reciprocal_rank_fusion
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+# Default article-number query set
+DEFAULT_QUERIES = [
+    {"query": "მუხლი 168", "expected": ["მუხლი 168"]},
+    {"query": "საგადასახადო კოდექსის მუხლი 82", "expected": ["მუხლი 82"]},
+    {"query": "მუხლი 157 დღგ-ით დაბეგვრის ობიექტი", "expected": ["მუხლი 157"]},
+    {"query": "მუხლი 309 ქონების გადასახადი", "expected": ["მუხლი 309"]},
+    {"query": "ბრძანება 996", "expected": ["996"]},
+    {"query": "Order 996 VAT invoice", "expected": ["996"]},
+    {"query": "Статья 168 Налогового кодекса", "expected": ["168"]},
+]
+
+
+def is_relevant(content: str, expected: list) -> bool:
+    """Check whether chunk content contains any expected marker."""
+    return any(marker in content for marker in expected)
+
+
+def precision_at_k(results: list, expected: list, k: int) -> float:
+    """Fraction of the top-k results that are relevant."""
+    top = results[:k]
+    if not top:
+        return 0.0
+    return sum(is_relevant(r['document'], expected) for r in top) / len(top)
+
+
+def run_benchmark(queries: list, top_k: int) -> dict:
+    """Run both retrieval modes over the query set."""
+    executor = ThreadPoolExecutor(max_workers=2)
+    totals = {
+        'vector': {'precision': 0.0, 'hits': 0, 'latency': 0.0},
+        'hybrid': {'precision': 0.0, 'hits': 0, 'latency': 0.0},
+    }
+
+    for item in queries:
+        query, expected = item['query'], item['expected']
+
+        # Vector only
+        start = time.perf_counter()
+        embedding = embeddings_generator.encode_query(query)
+        vector_results = vector_store.search(embedding, limit=top_k)
+        vector_latency = time.perf_counter() - start
+
+        # Hybrid: lexical search in parallel with embedding + vector search
+        start = time.perf_counter()
+        lexical_future = executor.submit(vector_store.lexical_search, query, top_k)
+        embedding = embeddings_generator.encode_query(query)
+        hybrid_vector = vector_store.search(embedding, limit=top_k)
+        hybrid_results = reciprocal_rank_fusion(
+            [hybrid_vector, lexical_future.result()],
+            k=settings.RAG_RRF_K,
+        )[:top_k]
+        hybrid_latency = time.perf_counter() - start
+
+        for mode, results, latency in (
+            ('vector', vector_results, vector_latency),
+            ('hybrid', hybrid_results, hybrid_latency),
+        ):
+            p = precision_at_k(results, expected, top_k)
+            totals[mode]['precision'] += p
+            totals[mode]['hits'] += int(bool(results) and is_relevant(results[0]['document'], expected))
+            totals[mode]['latency'] += latency
+
+        print(f"{query[:40]:<40}  vector P@{top_k}={precision_at_k(vector_results, expected, top_k):.2f}"
+              f"  hybrid P@{top_k}={precision_at_k(hybrid_results, expected, top_k):.2f}")
+
+    executor.shutdown()
+
+    n = len(queries) or 1
+    return {
+        mode: {
+            f'precision@{top_k}': data['precision'] / n,
+            'hit@1': data['hits'] / n,
+            'avg_latency_ms': 1000 * data['latency'] / n,
+        }
+        for mode, data in totals.items()
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark hybrid retrieval precision")
+    parser.add_argument("--queries", help="JSON file with query set (default: built-in article queries)")
+    parser.add_argument("--top-k", type=int, default=settings.RAG_TOP_K, help="Results per query")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = json.load(f)
+
+    summary = run_benchmark(queries, args.top_k)
+
+    print("\n" + "=" * 60)
+    for mode, metrics in summary.items():
+        print(f"{mode:<8} " + "  ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Re-chunk documents into sentence windows for small-to-big retrieval.
+
+Replaces each document's chunks with small sentence-window chunks that
+store their own and their parent section's offsets into Document.full_text.
+Set RAG_RETRIEVAL_MODE=small_to_big to return the parent sections at
+context time.
+
+Usage:
+    python scripts/build_sentence_window_index.py
+    python scripts/build_sentence_window_index.py --window-size 2 --batch-size 20
+"""
+import sys
+import os
+import argparse
+import logging
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from core.config import settings
+from core.database import SessionLocal
+from models.document import Document, DocumentChunk
+from processor.chunker import text_chunker
+from rag.embeddings import embeddings_generator
+from rag.vector_store_pgvector import vector_store
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def build_sentence_window_index(window_size: int, batch_size: int):
+    """Rebuild chunks of all documents as sentence windows."""
+    db = SessionLocal()
+
+    try:
+        document_ids = [
+            doc_id for (doc_id,) in
+            db.query(Document.id).filter(Document.full_text.isnot(None)).order_by(Document.id)
+        ]
+        total = len(document_ids)
+        logger.info(f"Found {total} documents with full text")
+
+        total_chunks = 0
+        for i in range(0, total, batch_size):
+            batch_ids = document_ids[i:i + batch_size]
+            documents = db.query(Document).filter(Document.id.in_(batch_ids)).all()
+
+            for document in documents:
+                windows = text_chunker.chunk_sentence_windows(
+                    document.full_text,
+                    window_size=window_size,
+                )
+                if not windows:
+                    continue
+
+                embeddings = embeddings_generator.encode([w["content"] for w in windows])
+
+                db.query(DocumentChunk).filter(
+                    DocumentChunk.document_id == document.id
+                ).delete(synchronize_session=False)
+
+                db.add_all([
+                    DocumentChunk(
+                        document_id=document.id,
+                        chunk_index=window["chunk_index"],
+                        content=window["content"],
+                        tokens_count=window["tokens_count"],
+                        start_position=window["start_position"],
+                        end_position=window["end_position"],
+                        metadata_json=window["metadata"],
+                        embedding=embedding,
+                    )
+                    for window, embedding in zip(windows, embeddings)
+                ])
+                total_chunks += len(windows)
+
+            db.commit()
+            db.expunge_all()
+            logger.info(f"Processed {min(i + batch_size, total)}/{total} documents ({total_chunks} windows)")
+
+        logger.info("Creating indexes...")
+        vector_store.create_index()
+        vector_store.create_text_search_index()
+
+        logger.info(f"✓ Complete! {total_chunks} sentence-window chunks indexed")
+
+    except Exception as e:
+        logger.error(f"Error building sentence-window index: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build sentence-window chunks for small-to-big retrieval")
+    parser.add_argument("--window-size", type=int, default=settings.RAG_SENTENCE_WINDOW, help="Sentences per window")
+    parser.add_argument("--batch-size", type=int, default=20, help="Documents per commit")
+    args = parser.parse_args()
+
+    logger.info("=" * 80)
+    logger.info("Building sentence-window index")
+    logger.info("=" * 80)
+
+    build_sentence_window_index(args.window_size, args.batch_size)
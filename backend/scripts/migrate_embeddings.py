@@ -0,0 +1,131 @@
+"""
+Blue/green migration of chunk embeddings to a new model.
+
+The new model's vectors are written to chunk_embeddings under their own
+version while the current version keeps serving queries. After the
+backfill, the version gets its own HNSW index, a recall comparison against
+the serving version is recorded, and the switch is one transaction that
+is refused if the new version is incomplete or retrieves worse.
+
+Usage:
+    python scripts/migrate_embeddings.py register e5-large intfloat/multilingual-e5-large
+    python scripts/migrate_embeddings.py backfill e5-large --batch-size 512
+    python scripts/migrate_embeddings.py index e5-large
+    python scripts/migrate_embeddings.py compare e5-large --queries queries.json --top-k 10
+    python scripts/migrate_embeddings.py activate e5-large
+    python scripts/migrate_embeddings.py status e5-large
+
+Query file format (same as benchmark_hybrid_retrieval.py):
+    [{"query": "მუხლი 168", "expected": ["მუხლი 168"]}, ...]
+"""
+import sys
+import os
+import json
+import argparse
+import logging
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from rag.embedding_versions import embedding_versions
+from rag.embeddings import get_embeddings_generator
+from scripts.benchmark_hybrid_retrieval import DEFAULT_QUERIES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def register(args):
+    """Register a new version for a model."""
+    embedder = get_embeddings_generator(args.model_name)
+    if embedder.model is None:
+        raise RuntimeError(f"Embedding model {args.model_name} could not be loaded")
+    embedding_versions.register(args.version, args.model_name, embedder.dimension)
+
+
+def backfill(args):
+    """Embed all chunks missing from a version."""
+    version = embedding_versions.get(args.version)
+    embedder = get_embeddings_generator(version['model_name'])
+    if embedder.model is None:
+        raise RuntimeError(f"Embedding model {version['model_name']} could not be loaded")
+
+    written = embedding_versions.backfill(
+        args.version,
+        lambda texts: embedder.encode(texts, batch_size=args.encode_batch_size),
+        batch_size=args.batch_size,
+    )
+    logger.info(f"✓ Wrote {written} vectors to {args.version}")
+
+
+def index(args):
+    """Create the version's HNSW index."""
+    embedding_versions.create_index(args.version)
+
+
+def compare(args):
+    """Record recall of the version against the serving version."""
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = json.load(f)
+
+    result = embedding_versions.compare(args.version, queries, args.top_k)
+    logger.info(f"Recall@{args.top_k}: serving {result['baseline']:.3f}, {args.version} {result['candidate']:.3f}")
+
+
+def activate(args):
+    """Switch queries to the version."""
+    embedding_versions.activate(args.version, force=args.force)
+    logger.info(f"✓ {args.version} is now serving queries")
+
+
+def status(args):
+    """Show a version and its coverage."""
+    version = embedding_versions.get(args.version)
+    version['missing_chunks'] = embedding_versions.missing_count(args.version)
+    for key, value in version.items():
+        logger.info(f"{key}: {value}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Migrate chunk embeddings to a new model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("register", help="Register a version for a model")
+    command.add_argument("version")
+    command.add_argument("model_name")
+    command.set_defaults(func=register)
+
+    command = commands.add_parser("backfill", help="Embed chunks missing from a version")
+    command.add_argument("version")
+    command.add_argument("--batch-size", type=int, default=512, help="Chunks read, encoded and written per batch")
+    command.add_argument("--encode-batch-size", type=int, default=32, help="Model batch size")
+    command.set_defaults(func=backfill)
+
+    command = commands.add_parser("index", help="Create the version's HNSW index")
+    command.add_argument("version")
+    command.set_defaults(func=index)
+
+    command = commands.add_parser("compare", help="Record recall against the serving version")
+    command.add_argument("version")
+    command.add_argument("--queries", help="JSON file with query set (default: built-in article queries)")
+    command.add_argument("--top-k", type=int, default=10, help="Results per query")
+    command.set_defaults(func=compare)
+
+    command = commands.add_parser("activate", help="Switch queries to the version")
+    command.add_argument("version")
+    command.add_argument("--force", action="store_true", help="Skip the coverage and recall checks")
+    command.set_defaults(func=activate)
+
+    command = commands.add_parser("status", help="Show a version and its coverage")
+    command.add_argument("version")
+    command.set_defaults(func=status)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
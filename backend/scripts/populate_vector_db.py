@@ -20,19 +20,19 @@ import logging
 import argparse
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Set
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from scraper.crawl_state import CrawlState
+from scraper.http_client import http_client
 from scraper.infohub_scraper import InfoHubScraper
 from rag.vector_store import vector_store
 from core.config import settings
 
 
-# State file location
-STATE_FILE = Path(__file__).parent.parent / "data" / "scraper_state.json"
-STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+# Crawl state written by earlier versions of this script
+LEGACY_STATE_FILE = Path(__file__).parent.parent / "data" / "scraper_state.json"
 
 # Logging setup
 logging.basicConfig(
@@ -46,77 +46,36 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class ScraperState:
-    """Manage scraper state for incremental updates."""
-    
-    def __init__(self, state_file: Path = STATE_FILE):
-        self.state_file = state_file
-        self.state = self.load_state()
-    
-    def load_state(self) -> Dict:
-        """Load state from file."""
-        if self.state_file.exists():
-            try:
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading state: {e}")
-        
-        # Default state
-        return {
-            'visited_urls': [],
-            'last_run': None,
-            'total_documents': 0,
-            'total_pages_scraped': 0,
-            'runs': []
-        }
+def migrate_legacy_state(state: CrawlState, state_file: Path = LEGACY_STATE_FILE):
+    """
+    Import the URLs of a JSON state file into the crawl state, once.
     
-    def save_state(self):
-        """Save state to file."""
-        try:
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(self.state, f, indent=2, ensure_ascii=False)
-            logger.info(f"State saved to {self.state_file}")
-        except Exception as e:
-            logger.error(f"Error saving state: {e}")
+    The file is renamed afterwards so it is not imported again.
+    """
+    if not state_file.exists():
+        return
     
-    def get_visited_urls(self) -> Set[str]:
-        """Get set of visited URLs."""
-        return set(self.state.get('visited_urls', []))
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading legacy state {state_file}: {e}")
+        return
     
-    def add_visited_url(self, url: str):
-        """Add URL to visited set."""
-        if 'visited_urls' not in self.state:
-            self.state['visited_urls'] = []
-        if url not in self.state['visited_urls']:
-            self.state['visited_urls'].append(url)
+    for url in legacy.get('visited_urls', []):
+        state.record(url)
+    state.flush()
     
-    def record_run(self, documents_scraped: int, pages_visited: int):
-        """Record scraping run statistics."""
-        run_info = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'documents_scraped': documents_scraped,
-            'pages_visited': pages_visited,
-        }
-        
-        if 'runs' not in self.state:
-            self.state['runs'] = []
-        
-        self.state['runs'].append(run_info)
-        self.state['last_run'] = run_info['timestamp']
-        self.state['total_documents'] += documents_scraped
-        self.state['total_pages_scraped'] += pages_visited
-        
-        # Keep only last 30 runs
-        if len(self.state['runs']) > 30:
-            self.state['runs'] = self.state['runs'][-30:]
+    state_file.rename(state_file.with_suffix('.json.migrated'))
+    logger.info(f"Imported {len(legacy.get('visited_urls', []))} URLs from {state_file}")
 
 
 async def run_incremental_scrape(
     start_url: str,
     max_pages: int = 50,
     max_depth: int = 2,
-    initial_run: bool = False
+    initial_run: bool = False,
+    refresh: bool = False
 ):
     """
     Run incremental scraping.
@@ -125,7 +84,9 @@ async def run_incremental_scrape(
         start_url: Starting URL (e.g., https://infohub.rs.ge/ka)
         max_pages: Maximum pages to scrape in this run
         max_depth: Maximum link depth to follow
-        initial_run: If True, ignore previous state
+        initial_run: If True, ignore previous state (implies refresh)
+        refresh: If True, fetch and process every page in full instead of
+            revalidating the HTTP cache
     """
     logger.info("=" * 80)
     logger.info(f"Starting incremental scrape at {datetime.utcnow().isoformat()}")
@@ -134,20 +95,14 @@ async def run_incremental_scrape(
     logger.info("=" * 80)
     
     # Load state
-    state_manager = ScraperState()
+    state = CrawlState()
+    migrate_legacy_state(state)
     
     if initial_run:
         logger.info("Initial run - starting fresh")
-        state_manager.state = {
-            'visited_urls': [],
-            'last_run': None,
-            'total_documents': 0,
-            'total_pages_scraped': 0,
-            'runs': []
-        }
+        state.clear()
     else:
-        visited_count = len(state_manager.state.get('visited_urls', []))
-        logger.info(f"Resuming from previous state ({visited_count} URLs visited)")
+        logger.info(f"Resuming from previous state ({state.count()} URLs visited)")
     
     # Check vector store
     try:
@@ -159,37 +114,29 @@ async def run_incremental_scrape(
     # Initialize scraper
     scraper = InfoHubScraper()
     
-    # Pre-populate visited URLs from state
-    if not initial_run:
-        scraper.visited_urls = state_manager.get_visited_urls()
-        logger.info(f"Loaded {len(scraper.visited_urls)} URLs from state")
-    
     # Run scraper
     try:
         result = await scraper.scrape(
             start_url=start_url,
             max_depth=max_depth,
-            max_pages=max_pages
+            max_pages=max_pages,
+            state=state,
+            refresh=initial_run or refresh
         )
         
-        # Update state
-        for url in scraper.visited_urls:
-            state_manager.add_visited_url(url)
-        
-        state_manager.record_run(
+        state.record_run(
             documents_scraped=result['documents_scraped'],
             pages_visited=result['pages_visited']
         )
-        
-        state_manager.save_state()
+        summary = state.summary()
         
         # Log results
         logger.info("=" * 80)
         logger.info("Scraping completed successfully!")
         logger.info(f"Documents scraped this run: {result['documents_scraped']}")
         logger.info(f"Pages visited this run: {result['pages_visited']}")
-        logger.info(f"Total documents scraped (all time): {state_manager.state['total_documents']}")
-        logger.info(f"Total pages scraped (all time): {state_manager.state['total_pages_scraped']}")
+        logger.info(f"Total documents scraped (all time): {summary['total_documents']}")
+        logger.info(f"Total pages scraped (all time): {summary['total_pages_scraped']}")
         
         # Check vector store again
         try:
@@ -204,8 +151,11 @@ async def run_incremental_scrape(
         
     except Exception as e:
         logger.error(f"Error during scraping: {e}", exc_info=True)
-        state_manager.save_state()  # Save state even on error
         raise
+    finally:
+        # Writes URLs recorded since the last batch, even on error
+        state.close()
+        await http_client.close()
 
 
 def main():
@@ -233,7 +183,12 @@ def main():
     parser.add_argument(
         "--initial-run",
         action="store_true",
-        help="Ignore previous state and start fresh"
+        help="Ignore previous state and start fresh (implies --refresh)"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Fetch and process every page in full, ignoring the HTTP cache"
     )
     parser.add_argument(
         "--show-state",
@@ -245,8 +200,10 @@ def main():
     
     # Show state if requested
     if args.show_state:
-        state_manager = ScraperState()
-        print(json.dumps(state_manager.state, indent=2, ensure_ascii=False))
+        state = CrawlState()
+        migrate_legacy_state(state)
+        print(json.dumps(state.summary(), indent=2, ensure_ascii=False))
+        state.close()
         return
     
     # Run scraping
@@ -255,7 +212,8 @@ def main():
             start_url=args.start_url,
             max_pages=args.max_pages,
             max_depth=args.max_depth,
-            initial_run=args.initial_run
+            initial_run=args.initial_run,
+            refresh=args.refresh
         ))
         
         print("\n✅ Scraping completed successfully!")
@@ -17,6 +17,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scraper.firecrawl_scraper import FirecrawlScraper
+from scraper.http_client import http_client
 from rag.vector_store import vector_store
 from core.config import settings
 
@@ -141,6 +142,8 @@ async def main():
         logger.error(f"Scraping failed: {e}", exc_info=True)
         print(f"\n❌ Scraping failed: {e}")
         sys.exit(1)
+    finally:
+        await http_client.close()
 
 
 if __name__ == "__main__":
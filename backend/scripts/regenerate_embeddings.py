@@ -1,8 +1,22 @@
 """
-Regenerate embeddings for all existing documents and store in pgvector.
+Regenerate embeddings for document chunks and store them in pgvector.
+
+Streams (id, content) pairs through a server-side cursor in id order,
+encodes each batch on a multi-process SentenceTransformer pool and writes
+the vectors back with one UPDATE per batch. The last written id is
+checkpointed after every batch, so an interrupted run resumes where it
+stopped. Memory use is bounded by the batch size, not the chunk count.
+
+Usage:
+    python scripts/regenerate_embeddings.py                  # chunks without embeddings
+    python scripts/regenerate_embeddings.py --all            # every chunk (e.g. new model)
+    python scripts/regenerate_embeddings.py --all --reset    # ignore an existing checkpoint
+    python scripts/regenerate_embeddings.py --processes 8 --batch-size 1024
 """
 import sys
 import os
+import argparse
+import time
 
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -17,72 +31,166 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 
-def regenerate_embeddings():
-    """Regenerate embeddings for all document chunks."""
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(__file__), '.regenerate_embeddings.checkpoint')
+
+
+def load_checkpoint(path: str):
+    """Return the last processed chunk id, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+
+def save_checkpoint(path: str, last_id: str):
+    """Atomically record the last processed chunk id."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(last_id)
+    os.replace(tmp_path, path)
+
+
+def chunk_query(db, only_missing: bool, after_id):
+    """Query (id, content) of chunks to process, in id order."""
+    query = db.query(DocumentChunk.id, DocumentChunk.content)
+    if only_missing:
+        query = query.filter(DocumentChunk.embedding.is_(None))
+    if after_id:
+        query = query.filter(DocumentChunk.id > after_id)
+    return query
+
+
+def iter_batches(db, only_missing: bool, after_id, batch_size: int):
+    """Yield lists of (id, content) rows from a server-side cursor."""
+    query = chunk_query(db, only_missing, after_id).order_by(DocumentChunk.id)
+
+    batch = []
+    for row in query.execution_options(stream_results=True, yield_per=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def start_pool(processes: int):
+    """Start a multi-process encoding pool, or None to encode in-process."""
+    if processes <= 1:
+        return None
+
+    import torch
+
+    if torch.cuda.is_available():
+        target_devices = None  # one process per GPU
+    else:
+        target_devices = ['cpu'] * processes
+    return embeddings_generator.model.start_multi_process_pool(target_devices=target_devices)
+
+
+def encode(texts, pool, batch_size: int):
+    """Encode texts on the pool (or in-process) as lists of floats."""
+    if pool is None:
+        return embeddings_generator.encode(texts, batch_size=batch_size)
+    embeddings = embeddings_generator.model.encode_multi_process(texts, pool, batch_size=batch_size)
+    return embeddings.tolist()
+
+
+def format_eta(seconds: float) -> str:
+    """Format seconds as H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def regenerate_embeddings(
+    only_missing: bool = True,
+    batch_size: int = 512,
+    encode_batch_size: int = 32,
+    processes: int = 1,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    reset: bool = False,
+):
+    """Regenerate embeddings for document chunks."""
+    if embeddings_generator.model is None:
+        raise RuntimeError("Embedding model is not loaded")
+
+    if reset and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    after_id = load_checkpoint(checkpoint_path)
+    if after_id:
+        logger.info(f"Resuming after chunk {after_id}")
+
     db = SessionLocal()
-    
+    pool = None
+
     try:
-        # Get all chunks without embeddings
-        chunks = db.query(DocumentChunk).filter(DocumentChunk.embedding == None).all()
-        total = len(chunks)
-        
-        logger.info(f"Found {total} chunks without embeddings")
-        
+        total = chunk_query(db, only_missing, after_id).count()
+        logger.info(f"Found {total} chunks to embed")
+
         if total == 0:
             logger.info("All chunks already have embeddings!")
-            return
-        
-        # Process in batches
-        batch_size = 50
-        for i in range(0, total, batch_size):
-            batch = chunks[i:i + batch_size]
-            
-            # Extract texts
-            texts = [chunk.content for chunk in batch]
-            
-            # Generate embeddings
-            logger.info(f"Processing batch {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}")
-            embeddings = embeddings_generator.encode(texts)
-            
-            # Prepare data for vector store
-            ids = [f"doc_{chunk.document_id}_chunk_{chunk.id}" for chunk in batch]
-            metadatas = [
-                {
-                    'document_id': str(chunk.document_id),
-                    'chunk_id': str(chunk.id),
-                    'chunk_index': chunk.chunk_index,
-                }
-                for chunk in batch
-            ]
-            
-            # Add to pgvector
-            vector_store.add_documents(
-                ids=ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas
-            )
-            
-            logger.info(f"Processed {min(i + batch_size, total)}/{total} chunks")
-        
+        else:
+            pool = start_pool(processes)
+
+            done = 0
+            started = time.time()
+            for batch in iter_batches(db, only_missing, after_id, batch_size):
+                ids = [chunk_id for chunk_id, _ in batch]
+                embeddings = encode([content for _, content in batch], pool, encode_batch_size)
+
+                vector_store.update_embeddings(ids, embeddings)
+                save_checkpoint(checkpoint_path, str(ids[-1]))
+
+                done += len(batch)
+                rate = done / max(time.time() - started, 1e-9)
+                logger.info(
+                    f"Processed {done}/{total} chunks ({100 * done / total:.1f}%), "
+                    f"{rate:.0f} chunks/s, ETA {format_eta((total - done) / rate)}"
+                )
+
+            os.remove(checkpoint_path)
+
         # Create index for fast search
         logger.info("Creating HNSW index...")
         vector_store.create_index()
-        
+
+        logger.info("Creating full-text and trigram indexes...")
+        vector_store.create_text_search_index()
+
         # Verify
         count = vector_store.get_count()
         logger.info(f"✓ Complete! Total vectors in pgvector: {count}")
-    
+
     except Exception as e:
         logger.error(f"Error regenerating embeddings: {e}")
         raise
     finally:
+        if pool is not None:
+            embeddings_generator.model.stop_multi_process_pool(pool)
         db.close()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate chunk embeddings in pgvector")
+    parser.add_argument("--all", action="store_true", help="Re-embed every chunk, not only those without embeddings")
+    parser.add_argument("--batch-size", type=int, default=512, help="Chunks read, encoded and written per batch")
+    parser.add_argument("--encode-batch-size", type=int, default=32, help="Model batch size per process")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Encoding processes")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    parser.add_argument("--reset", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
     logger.info("=" * 80)
     logger.info("Regenerating embeddings with pgvector")
     logger.info("=" * 80)
-    
-    regenerate_embeddings()
+
+    regenerate_embeddings(
+        only_missing=not args.all,
+        batch_size=args.batch_size,
+        encode_batch_size=args.encode_batch_size,
+        processes=args.processes,
+        checkpoint_path=args.checkpoint,
+        reset=args.reset,
+    )
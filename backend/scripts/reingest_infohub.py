@@ -0,0 +1,66 @@
+"""
+Crawl infohub.ge and ingest pages through the parallel ingestion pipeline.
+
+Parsing and chunking run in a process pool, embeddings are computed in
+large batches and documents are written in bulk, while the crawl keeps
+fetching pages. A per-stage throughput report is printed at the end.
+
+Usage:
+    python scripts/reingest_infohub.py
+    python scripts/reingest_infohub.py --start-url https://infohub.rs.ge/ka --max-depth 3 --workers 8
+    python scripts/reingest_infohub.py --refresh  # ignore the HTTP cache (after a DB reset)
+"""
+import asyncio
+import sys
+import os
+import argparse
+import logging
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from processor.ingestion import IngestionPipeline
+from scraper.http_client import http_client
+from scraper.infohub_scraper import InfoHubScraper
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def main(args):
+    """Run the crawl with pipelined ingestion."""
+    scraper = InfoHubScraper()
+    pipeline = IngestionPipeline(parse_workers=args.workers)
+
+    try:
+        result = await scraper.scrape(
+            args.start_url,
+            max_depth=args.max_depth,
+            max_pages=args.max_pages,
+            pipeline=pipeline,
+            refresh=args.refresh,
+        )
+    finally:
+        await http_client.close()
+
+    ingestion = result['ingestion']
+    logger.info("=" * 80)
+    logger.info(f"Pages visited: {result['pages_visited']}")
+    logger.info(f"Documents stored: {ingestion['documents_stored']} (skipped {ingestion['documents_skipped']})")
+    logger.info(f"Elapsed: {ingestion['elapsed_seconds']}s")
+    for name, stage in ingestion['stages'].items():
+        logger.info(
+            f"  {name:>6}: {stage['items']:>6} items  {stage['items_per_second']:>8}/s  "
+            f"busy {stage['busy_seconds']}s  errors {stage['errors']}"
+        )
+    logger.info("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-ingest infohub.ge through the ingestion pipeline")
+    parser.add_argument("--start-url", default="https://infohub.rs.ge/ka", help="Crawl start URL")
+    parser.add_argument("--max-depth", type=int, default=2, help="Maximum link depth")
+    parser.add_argument("--max-pages", type=int, default=1000, help="Maximum pages to visit")
+    parser.add_argument("--workers", type=int, default=None, help="Parse/chunk processes (default: CPU count)")
+    parser.add_argument("--refresh", action="store_true", help="Fetch every page in full, ignoring the HTTP cache")
+    asyncio.run(main(parser.parse_args()))
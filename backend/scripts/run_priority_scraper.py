@@ -10,6 +10,7 @@ import logging
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from scraper.enhanced_scraper import EnhancedInfoHubScraper
+from scraper.http_client import http_client
 from core.config import settings
 
 
@@ -37,12 +38,15 @@ async def main():
     scraper = EnhancedInfoHubScraper(api_key)
     
     # Run scraping with priorities
-    result = await scraper.scrape_priority_documents(
-        base_url="https://infohub.rs.ge/ka",
-        high_priority_limit=50,  # Laws, Orders - most important
-        medium_priority_limit=30,  # Guidelines, methodologies
-        low_priority_limit=10,  # Case law
-    )
+    try:
+        result = await scraper.scrape_priority_documents(
+            base_url="https://infohub.rs.ge/ka",
+            high_priority_limit=50,  # Laws, Orders - most important
+            medium_priority_limit=30,  # Guidelines, methodologies
+            low_priority_limit=10,  # Case law
+        )
+    finally:
+        await http_client.close()
     
     # Print results
     logger.info("=" * 80)
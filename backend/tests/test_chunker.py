@@ -0,0 +1,195 @@
+"""
+Unit tests for text chunking.
+"""
+import re
+
+from processor.chunker import TextChunker
+from processor.legal_chunker import LegalStructureChunker
+
+
+SAMPLE_TEXT = (
+    "მუხლი 1. ზოგადი დებულებები.\n"
+    "ეს კოდექსი განსაზღვრავს გადასახადების სისტემას. "
+    "გადასახადი სავალდებულოა! რა არის დღგ?\n\n"
+    "მუხლი 2. ტერმინები.\n"
+    "პირველი ტერმინი. მეორე ტერმინი. მესამე ტერმინი."
+)
+
+
+class WordCounter:
+    """Token counter that counts whitespace-separated words."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def count_batch(self, texts):
+        self.calls += 1
+        return [len(text.split()) for text in texts]
+
+
+class TestStreamingChunks:
+    """Test single-pass token-based chunking."""
+
+    def test_offsets_point_into_source_text(self):
+        chunker = TextChunker(chunk_size=8, chunk_overlap=3, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(SAMPLE_TEXT)
+
+        assert len(chunks) > 1
+        for i, chunk in enumerate(chunks):
+            assert chunk["chunk_index"] == i
+            assert SAMPLE_TEXT[chunk["start_position"]:chunk["end_position"]] == chunk["content"]
+
+    def test_chunks_respect_token_budget(self):
+        chunker = TextChunker(chunk_size=8, chunk_overlap=3, token_counter=WordCounter())
+
+        for chunk in chunker.iter_chunks(SAMPLE_TEXT):
+            assert chunk["tokens_count"] <= 8
+            assert chunk["tokens_count"] == len(chunk["content"].split())
+
+    def test_overlap_repeats_trailing_sentences(self):
+        chunker = TextChunker(chunk_size=8, chunk_overlap=3, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(SAMPLE_TEXT)
+
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert chunk["start_position"] > previous["start_position"]
+        assert any(c["start_position"] < p["end_position"] for p, c in zip(chunks, chunks[1:]))
+
+    def test_no_overlap(self):
+        chunker = TextChunker(chunk_size=8, chunk_overlap=0, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(SAMPLE_TEXT)
+
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert chunk["start_position"] > previous["end_position"]
+
+    def test_oversized_sentence_is_split(self):
+        text = " ".join(["სიტყვა"] * 50) + "."
+        chunker = TextChunker(chunk_size=10, chunk_overlap=0, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(text)
+
+        assert len(chunks) >= 5
+        assert chunks[0]["start_position"] == 0
+        assert chunks[-1]["end_position"] == len(text)
+
+    def test_large_text_counts_in_batches(self):
+        counter = WordCounter()
+        text = "მოკლე წინადადება. " * 5000
+        chunker = TextChunker(chunk_size=64, chunk_overlap=8, token_counter=counter)
+
+        chunks = chunker.iter_chunks(text)
+        first = next(chunks)
+        remaining = sum(1 for _ in chunks)
+
+        assert first["start_position"] == 0
+        assert remaining > 100
+        assert counter.calls < 5000 / 100
+
+    def test_empty_text(self):
+        assert TextChunker(token_counter=WordCounter()).chunk_text("  \n ") == []
+
+
+class TestSentenceWindows:
+    """Test sentence-window chunks for small-to-big retrieval."""
+
+    def test_offsets_point_into_source_text(self):
+        chunker = TextChunker(chunk_size=1024, chunk_overlap=0, token_counter=WordCounter())
+
+        windows = chunker.chunk_sentence_windows(SAMPLE_TEXT, window_size=2)
+
+        assert windows
+        for window in windows:
+            assert SAMPLE_TEXT[window["start_position"]:window["end_position"]] == window["content"]
+
+    def test_windows_stay_inside_their_parent(self):
+        chunker = TextChunker(chunk_size=20, chunk_overlap=0, token_counter=WordCounter())
+
+        windows = chunker.chunk_sentence_windows(SAMPLE_TEXT, window_size=2)
+
+        assert len({w["metadata"]["parent_index"] for w in windows}) > 1
+        for window in windows:
+            metadata = window["metadata"]
+            assert metadata["parent_start"] <= window["start_position"]
+            assert window["end_position"] <= metadata["parent_end"]
+
+    def test_empty_text(self):
+        assert TextChunker(token_counter=WordCounter()).chunk_sentence_windows("   ") == []
+
+
+LEGAL_TEXT = (
+    "საქართველოს საგადასახადო კოდექსი\n\n"
+    "მუხლი 1. კოდექსის მიზანი\n"
+    "ეს კოდექსი ადგენს საგადასახადო სისტემას.\n\n"
+    "მუხლი 168¹. დღგ-ით დაბეგვრა\n"
+    "1. დასაბეგრი ოპერაციებია:\n"
+    "ა) საქონლის მიწოდება;\n"
+    "ბ) მომსახურების გაწევა;\n"
+    "გ) საქონლის იმპორტი.\n"
+    "2. განაკვეთი შეადგენს 18 პროცენტს.\n"
+)
+
+
+class TestLegalStructureChunker:
+    """Test article-aware chunking of legal text."""
+
+    def test_article_kept_intact_when_it_fits(self):
+        chunker = LegalStructureChunker(chunk_size=100, chunk_overlap=10, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(LEGAL_TEXT)
+
+        assert [c["metadata"].get("article_number") for c in chunks] == [None, "1", "168¹"]
+        assert chunks[1]["content"].startswith("მუხლი 1.")
+        assert chunks[2]["content"].endswith("18 პროცენტს.")
+        assert chunks[2]["metadata"]["article_title"] == "დღგ-ით დაბეგვრა"
+
+    def test_long_article_split_at_parts_and_sub_items(self):
+        chunker = LegalStructureChunker(chunk_size=8, chunk_overlap=0, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(LEGAL_TEXT)
+        article = [c for c in chunks if c["metadata"].get("article_number") == "168¹"]
+
+        assert len(article) > 1
+        for chunk in article:
+            # Every piece starts at an article, part or sub-item boundary
+            assert re.match(r"(მუხლი|\d+\.|[ა-ჰ]\))", chunk["content"])
+        for chunk in chunks:
+            assert chunk["tokens_count"] <= 8
+            assert LEGAL_TEXT[chunk["start_position"]:chunk["end_position"]] == chunk["content"]
+
+    def test_chunk_indexes_are_sequential(self):
+        chunker = LegalStructureChunker(chunk_size=8, chunk_overlap=0, token_counter=WordCounter())
+
+        chunks = chunker.chunk_text(LEGAL_TEXT)
+
+        assert [c["chunk_index"] for c in chunks] == list(range(len(chunks)))
+
+    def test_cross_reference_at_line_start_is_not_a_header(self):
+        chunker = LegalStructureChunker(chunk_size=100, chunk_overlap=10, token_counter=WordCounter())
+        text = LEGAL_TEXT + (
+            "3. გათავისუფლება ხდება\n"
+            "მუხლი 168-ით გათვალისწინებული წესით.\n"
+        )
+
+        chunks = chunker.chunk_text(text)
+
+        assert [c["metadata"].get("article_number") for c in chunks] == [None, "1", "168¹"]
+        assert chunks[2]["content"].endswith("გათვალისწინებული წესით.")
+
+    def test_header_forms(self):
+        chunker = LegalStructureChunker(chunk_size=100, chunk_overlap=10, token_counter=WordCounter())
+        text = "## Статья 5\nтекст статьи.\n\n**Article 12.**\nArticle text.\n"
+
+        chunks = chunker.chunk_text(text)
+
+        assert [c["metadata"]["article_number"] for c in chunks] == ["5", "12"]
+        assert [c["metadata"]["article_title"] for c in chunks] == [None, None]
+
+    def test_text_without_articles_falls_back_to_sentences(self):
+        chunker = LegalStructureChunker(chunk_size=8, chunk_overlap=0, token_counter=WordCounter())
+        plain = TextChunker(chunk_size=8, chunk_overlap=0, token_counter=WordCounter())
+
+        text = "პირველი წინადადება აქ. მეორე წინადადება აქ. მესამე წინადადება აქ."
+
+        assert chunker.chunk_text(text) == plain.chunk_text(text)
@@ -0,0 +1,383 @@
+"""
+Unit tests for the staged ingestion pipeline.
+"""
+import asyncio
+
+import pytest
+
+from models.document import Document
+from processor import document_writer as document_writer_module
+from processor import ingestion as ingestion_module
+from processor.document_writer import DocumentWriter, chunk_hash
+from processor.ingestion import IngestionPipeline, parse_and_chunk
+from rag.embedding_versions import embedding_versions
+
+
+ARTICLE_TEXT = (
+    "მუხლი 1. კოდექსის მიზანი\n"
+    "ეს კოდექსი ადგენს საქართველოს საგადასახადო სისტემას და გადასახადების "
+    "გადახდასთან დაკავშირებულ ურთიერთობებს.\n"
+)
+
+PAGE_HTML = f"""
+<html>
+  <head><title>საგადასახადო კოდექსი - infohub</title><script>var x = 1;</script></head>
+  <body>
+    <nav>მთავარი | სიახლეები</nav>
+    <h1>საგადასახადო კოდექსი</h1>
+    <article>{ARTICLE_TEXT.replace(chr(10), '<br/>')}</article>
+    <footer>© infohub</footer>
+  </body>
+</html>
+"""
+
+
+class FakeEmbedder:
+    """Embedder that returns a constant vector per text."""
+
+    model = object()
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32):
+        self.calls += 1
+        return [[float(len(text))] for text in texts]
+
+
+class RecordingEmbedder(FakeEmbedder):
+    """Embedder that records the texts it encodes."""
+
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def encode(self, texts, batch_size=32):
+        self.texts.extend(texts)
+        return super().encode(texts, batch_size)
+
+
+class FakeSession:
+    """Session stand-in that records the calls made on it."""
+
+    def __init__(self, fail_on_execute=False, stored_chunks=()):
+        self.calls = []
+        self.fail_on_execute = fail_on_execute
+        self.stored_chunks = list(stored_chunks)
+
+    def query(self, *entities):
+        return FakeQuery(self)
+
+    def add(self, obj):
+        self.calls.append(('add', obj))
+
+    def flush(self):
+        self.calls.append(('flush',))
+
+    def execute(self, statement, rows=None):
+        if self.fail_on_execute:
+            raise RuntimeError("insert failed")
+        self.calls.append(('execute', rows))
+
+    def commit(self):
+        self.calls.append(('commit',))
+
+    def rollback(self):
+        self.calls.append(('rollback',))
+
+    def close(self):
+        self.calls.append(('close',))
+
+
+class FakeQuery:
+    """Query stand-in over the session's stored chunk rows."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def filter(self, *criteria):
+        return self
+
+    def __iter__(self):
+        return iter(self.session.stored_chunks)
+
+    def delete(self, synchronize_session=None):
+        self.session.calls.append(('delete',))
+
+
+def make_chunks(count):
+    return [
+        {
+            'content': f'chunk {i}',
+            'chunk_index': i,
+            'tokens_count': 2,
+            'start_position': i * 10,
+            'end_position': i * 10 + 7,
+            'metadata': {'article_number': str(i)},
+        }
+        for i in range(count)
+    ]
+
+
+class TestDocumentWriter:
+    """Test bulk document and chunk writes."""
+
+    def test_chunk_rows_carry_ids_embeddings_and_metadata(self):
+        writer = DocumentWriter()
+
+        rows = writer.chunk_rows('doc-1', make_chunks(3), [[0.1], [0.2], [0.3]])
+
+        assert len({row['id'] for row in rows}) == 3
+        assert [row['embedding'] for row in rows] == [[0.1], [0.2], [0.3]]
+        assert rows[2]['metadata_json'] == {
+            'position': 2,
+            'total_chunks': 3,
+            'content_hash': chunk_hash('chunk 2'),
+            'article_number': '2',
+        }
+        assert all(row['document_id'] == 'doc-1' for row in rows)
+
+    def test_active_version_vectors_are_written_before_commit(self, monkeypatch):
+        writer = DocumentWriter()
+        db = FakeSession()
+        monkeypatch.setattr(
+            embedding_versions, 'write_active',
+            lambda session, rows: session.calls.append(('write_active', rows)),
+        )
+
+        writer.write_many(db, [(Document(title='a', source_url='u1'), make_chunks(2), None)])
+
+        assert [call[0] for call in db.calls] == ['add', 'flush', 'execute', 'write_active', 'commit']
+        assert db.calls[3][1] == db.calls[2][1]
+
+    def test_one_insert_for_all_chunks_in_one_transaction(self):
+        writer = DocumentWriter()
+        db = FakeSession()
+        documents = [Document(title='a', source_url='u1'), Document(title='b', source_url='u2')]
+
+        writer.write_many(db, [(documents[0], make_chunks(2), None), (documents[1], make_chunks(3), None)])
+
+        assert [call[0] for call in db.calls] == ['add', 'add', 'flush', 'execute', 'commit']
+        rows = db.calls[3][1]
+        assert len(rows) == 5
+        assert {row['document_id'] for row in rows} == {documents[0].id, documents[1].id}
+
+    def test_rollback_on_failure(self):
+        writer = DocumentWriter()
+        db = FakeSession(fail_on_execute=True)
+
+        with pytest.raises(RuntimeError):
+            writer.write(db, Document(title='a', source_url='u1'), make_chunks(1))
+
+        assert db.calls[-1] == ('rollback',)
+
+
+class TestIncrementalUpdate:
+    """Test chunk-level diffing when a document changes."""
+
+    def test_only_changed_chunks_are_embedded(self, monkeypatch):
+        invalidated = []
+        monkeypatch.setattr(document_writer_module, 'cache_invalidate_documents', invalidated.extend)
+
+        old = make_chunks(3)
+        stored = [
+            ('id-0', old[0]['content'], {'content_hash': chunk_hash(old[0]['content'])}),
+            ('id-1', old[1]['content'], None),  # legacy row without a stored hash
+            ('id-2', old[2]['content'], {}),
+        ]
+        db = FakeSession(stored_chunks=stored)
+        document = Document(id='doc-1', title='a', source_url='u1')
+
+        new = [old[1], {**old[0], 'content': 'amended text'}, old[2]]
+        encoded = []
+
+        def encode(texts):
+            encoded.extend(texts)
+            return [[1.0] for _ in texts]
+
+        result = DocumentWriter().update(db, document, new, encode)
+
+        assert result == {'kept': 2, 'inserted': 1, 'deleted': 1}
+        assert encoded == ['amended text']
+        assert invalidated == ['doc-1']
+
+        updates, inserts = [call[1] for call in db.calls if call[0] == 'execute']
+        assert {(row['id'], row['chunk_index']) for row in updates} == {('id-1', 0), ('id-2', 2)}
+        assert [(row['content'], row['chunk_index'], row['embedding']) for row in inserts] == [
+            ('amended text', 1, [1.0])
+        ]
+        assert [call[0] for call in db.calls] == ['delete', 'execute', 'execute', 'commit']
+
+    def test_unchanged_chunks_need_no_writes_but_positions(self, monkeypatch):
+        monkeypatch.setattr(document_writer_module, 'cache_invalidate_documents', lambda ids: 0)
+
+        chunks = make_chunks(2)
+        db = FakeSession(stored_chunks=[(f'id-{i}', c['content'], None) for i, c in enumerate(chunks)])
+
+        result = DocumentWriter().update(db, Document(id='doc-1', title='a', source_url='u1'), chunks)
+
+        assert result == {'kept': 2, 'inserted': 0, 'deleted': 0}
+        assert [call[0] for call in db.calls] == ['execute', 'commit']
+
+
+    def test_uncommitted_update_leaves_commit_and_invalidation_to_caller(self, monkeypatch):
+        invalidated = []
+        monkeypatch.setattr(document_writer_module, 'cache_invalidate_documents', invalidated.extend)
+        db = FakeSession()
+
+        DocumentWriter().update(db, Document(id='doc-1', title='a', source_url='u1'), make_chunks(1), commit=False)
+
+        assert [call[0] for call in db.calls] == ['execute']
+        assert invalidated == []
+
+
+class TestParseAndChunk:
+    """Test the worker-side parse and chunk step."""
+
+    def test_html_main_content_and_title(self):
+        parsed = parse_and_chunk({'url': 'https://infohub.rs.ge/ka/doc/1', 'html': PAGE_HTML})
+
+        assert parsed['title'] == 'საგადასახადო კოდექსი'
+        assert parsed['language'] == 'ka'
+        assert 'var x' not in parsed['full_text']
+        assert 'მთავარი' not in parsed['full_text']
+        assert parsed['full_text'].startswith('მუხლი 1.')
+        assert parsed['chunks'][0]['metadata']['article_number'] == '1'
+
+    def test_plain_text_input(self):
+        parsed = parse_and_chunk({
+            'url': 'https://infohub.rs.ge/ka/doc/2',
+            'text': ARTICLE_TEXT,
+            'title': 'კოდექსი',
+            'document_type': 'law',
+        })
+
+        assert parsed['title'] == 'კოდექსი'
+        assert parsed['document_type'] == 'law'
+        assert parsed['full_text'] == ARTICLE_TEXT
+
+    def test_short_content_is_skipped(self):
+        assert parse_and_chunk({'url': 'https://infohub.rs.ge/ka', 'text': 'მოკლე'}) is None
+
+
+class TestIngestionPipeline:
+    """Test stage wiring, batching and reporting."""
+
+    @pytest.mark.asyncio
+    async def test_documents_flow_through_all_stages(self):
+        embedder = FakeEmbedder()
+        pipeline = IngestionPipeline(parse_workers=1, queue_size=2, write_batch_size=10, embedder=embedder)
+
+        written = []
+
+        def fake_write(documents):
+            written.extend(documents)
+            return [document['url'] for document in documents]
+
+        pipeline._write_documents = fake_write
+        pipeline._stored_content = lambda documents: {}
+
+        documents = [
+            {'url': f'https://infohub.rs.ge/ka/doc/{i}', 'html': PAGE_HTML}
+            for i in range(4)
+        ] + [{'url': 'https://infohub.rs.ge/ka/short', 'text': 'მოკლე'}]
+
+        report = await pipeline.run(documents)
+
+        assert report['documents_stored'] == 4
+        assert report['documents_skipped'] == 1
+        assert report['stages']['parse']['items'] == 5
+        assert report['stages']['store']['items'] == 4
+        assert embedder.calls >= 1
+        for document in written:
+            assert all('embedding' in chunk for chunk in document['chunks'])
+
+    @pytest.mark.asyncio
+    async def test_processed_urls_are_reported(self):
+        processed = []
+        pipeline = IngestionPipeline(parse_workers=1, embedder=FakeEmbedder(), on_processed=processed.append)
+
+        def fake_write(documents):
+            if documents[0]['url'].endswith('/fails'):
+                raise RuntimeError("database unavailable")
+            return [document['url'] for document in documents]
+
+        pipeline._write_documents = fake_write
+        pipeline._stored_content = lambda documents: {}
+
+        await pipeline.run([
+            {'url': 'https://infohub.rs.ge/ka/doc/1', 'html': PAGE_HTML},
+            {'url': 'https://infohub.rs.ge/ka/short', 'text': 'მოკლე'},
+        ])
+        await pipeline.run([{'url': 'https://infohub.rs.ge/ka/fails', 'html': PAGE_HTML}])
+
+        assert sorted(processed) == ['https://infohub.rs.ge/ka/doc/1', 'https://infohub.rs.ge/ka/short']
+
+    @pytest.mark.asyncio
+    async def test_only_chunks_not_stored_are_embedded(self):
+        embedder = RecordingEmbedder()
+        pipeline = IngestionPipeline(parse_workers=1, embedder=embedder)
+        pipeline._embedded = asyncio.Queue()
+        unchanged = {'url': 'https://infohub.rs.ge/ka/doc/1', 'file_hash': 'h1', 'chunks': make_chunks(2)}
+        changed = {'url': 'https://infohub.rs.ge/ka/doc/2', 'file_hash': 'h2', 'chunks': make_chunks(3)}
+        new = {'url': 'https://infohub.rs.ge/ka/doc/3', 'file_hash': 'h3', 'chunks': make_chunks(1)}
+        pipeline._stored_content = lambda documents: {
+            unchanged['url']: None,
+            changed['url']: {chunk_hash('chunk 0'), chunk_hash('chunk 1')},
+        }
+
+        await pipeline._embed_batch([unchanged, changed, new])
+
+        assert embedder.texts == ['chunk 2', 'chunk 0']
+        assert [('embedding' in chunk) for chunk in changed['chunks']] == [False, False, True]
+        assert pipeline._embedded.qsize() == 3
+
+    def write_batch(self, monkeypatch, fail_insert):
+        """Write a changed and a new document through _write_documents."""
+        stored = Document(id='doc-1', title='a', source_url='https://infohub.rs.ge/ka/doc/1', file_hash='old')
+        db = FakeSession(stored_chunks=[stored])
+        invalidated = []
+        monkeypatch.setattr(ingestion_module, 'SessionLocal', lambda: db)
+        monkeypatch.setattr(ingestion_module, 'cache_invalidate_documents', invalidated.extend)
+
+        def update(session, document, chunks, encode=None, commit=True):
+            session.calls.append(('update', commit))
+
+        def write_many(session, items, commit=True):
+            if fail_insert:
+                raise RuntimeError("insert failed")
+            session.calls.append(('write_many', commit))
+            return [document for document, _, _ in items]
+
+        monkeypatch.setattr(ingestion_module.document_writer, 'update', update)
+        monkeypatch.setattr(ingestion_module.document_writer, 'write_many', write_many)
+
+        pipeline = IngestionPipeline(parse_workers=1, embedder=FakeEmbedder())
+        documents = [
+            {'url': url, 'title': 't', 'document_type': 'law', 'language': 'ka', 'full_text': 'x',
+             'file_hash': 'new', 'metadata': {}, 'chunks': make_chunks(1)}
+            for url in ('https://infohub.rs.ge/ka/doc/1', 'https://infohub.rs.ge/ka/doc/2')
+        ]
+        try:
+            written = pipeline._write_documents(documents)
+        except RuntimeError:
+            written = None
+        return pipeline, db, invalidated, written
+
+    def test_batch_commits_once_before_invalidating(self, monkeypatch):
+        pipeline, db, invalidated, written = self.write_batch(monkeypatch, fail_insert=False)
+
+        assert [call for call in db.calls if call[0] != 'close'] == [
+            ('update', False), ('write_many', False), ('commit',)
+        ]
+        assert invalidated == ['doc-1']
+        assert pipeline.updated == 1
+        assert written[0] == 'doc-1' and len(written) == 2
+
+    def test_failed_batch_counts_no_updates(self, monkeypatch):
+        pipeline, db, invalidated, written = self.write_batch(monkeypatch, fail_insert=True)
+
+        assert written is None
+        assert ('commit',) not in db.calls and ('rollback',) in db.calls
+        assert invalidated == []
+        assert pipeline.updated == 0
@@ -0,0 +1,269 @@
+"""
+Unit tests for retrieval building blocks.
+"""
+import pytest
+
+from core.config import settings
+from rag import embeddings as embeddings_module
+from rag.embedding_versions import EmbeddingVersionStore, legacy_version
+from rag.fusion import reciprocal_rank_fusion
+from rag.reranker import reranker
+from rag.context_packer import ContextPacker, overlap_length
+from rag.relation_graph import DocumentRelationIndex
+
+
+class TestReciprocalRankFusion:
+    """Test RRF merging of vector and lexical results."""
+
+    def test_item_in_both_lists_ranks_first(self):
+        vector = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+        lexical = [{"id": "c"}, {"id": "d"}]
+
+        fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+        assert fused[0]["id"] == "c"
+        assert [item["id"] for item in fused] == ["c", "a", "b", "d"]
+
+    def test_first_occurrence_is_kept(self):
+        vector = [{"id": "a", "similarity": 0.9}]
+        lexical = [{"id": "a", "similarity": 0.1}]
+
+        fused = reciprocal_rank_fusion([vector, lexical])
+
+        assert len(fused) == 1
+        assert fused[0]["similarity"] == 0.9
+        assert fused[0]["rrf_score"] == 2 / 61
+
+    def test_empty_lists(self):
+        assert reciprocal_rank_fusion([[], []]) == []
+
+
+class FakeCrossEncoder:
+    """Cross-encoder stand-in that scores by content length."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls += 1
+        return [float(len(content)) for _, content in pairs]
+
+
+class TestCrossEncoderReranker:
+    """Test reranking, score caching and the latency budget fallback."""
+
+    chunks = [
+        {"id": "a", "content": "x"},
+        {"id": "b", "content": "xxx"},
+        {"id": "c", "content": "xx"},
+    ]
+
+    def test_rerank_orders_by_score(self, monkeypatch):
+        monkeypatch.setattr(reranker, "model", FakeCrossEncoder())
+        ranked = reranker.rerank("rerank order", self.chunks, top_k=2, budget_ms=10_000)
+
+        assert [chunk["id"] for chunk in ranked] == ["b", "c"]
+        assert ranked[0]["rerank_score"] == 3.0
+
+    def test_scores_are_cached_per_query_and_chunk(self, monkeypatch):
+        model = FakeCrossEncoder()
+        monkeypatch.setattr(reranker, "model", model)
+        reranker.rerank("rerank cache", self.chunks, budget_ms=10_000)
+        reranker.rerank("rerank cache", self.chunks, budget_ms=10_000)
+
+        assert model.calls == 1
+
+    def test_budget_exceeded_keeps_retrieval_order(self, monkeypatch):
+        monkeypatch.setattr(reranker, "model", FakeCrossEncoder())
+        ranked = reranker.rerank("rerank budget", self.chunks, top_k=3, budget_ms=-1)
+
+        assert [chunk["id"] for chunk in ranked] == ["a", "b", "c"]
+        assert "rerank_score" not in ranked[0]
+
+
+class WordCounter:
+    """Token counter stand-in: one token per whitespace-separated word."""
+
+    def count_batch(self, texts):
+        return [len(text.split()) for text in texts]
+
+
+def make_chunk(chunk_id, document_id, chunk_index, content):
+    return {
+        "id": chunk_id,
+        "content": content,
+        "metadata": {"document_id": document_id, "chunk_index": chunk_index},
+    }
+
+
+class TestContextPacker:
+    """Test merging, deduplication and token budgeting of context."""
+
+    overlap = "shared overlap sentence between neighbouring chunks."
+
+    def test_overlap_length(self):
+        assert overlap_length("abc" + self.overlap, self.overlap + "xyz") == len(self.overlap)
+        assert overlap_length("abc", "xyz") == 0
+
+    def test_adjacent_chunks_merge_without_repeated_overlap(self):
+        packer = ContextPacker(max_tokens=1000, token_counter=WordCounter())
+        chunks = [
+            make_chunk("c2", "doc", 1, self.overlap + " Second part."),
+            make_chunk("c1", "doc", 0, "First part. " + self.overlap),
+        ]
+
+        passages = packer.pack(chunks)
+
+        assert len(passages) == 1
+        assert passages[0]["content"] == "First part. " + self.overlap + " Second part."
+        assert passages[0]["chunk_ids"] == ["c1", "c2"]
+
+    def test_near_duplicates_are_dropped(self):
+        packer = ContextPacker(max_tokens=1000, token_counter=WordCounter())
+        text = " ".join(f"word{i}" for i in range(200))
+        chunks = [
+            make_chunk("a", "doc-a", 0, text),
+            make_chunk("b", "doc-b", 0, text + " trailing"),
+            make_chunk("c", "doc-c", 0, "completely different content about VAT refunds"),
+        ]
+
+        passages = packer.pack(chunks)
+
+        assert [p["chunk_ids"] for p in passages] == [["a"], ["c"]]
+
+    def test_passages_fill_token_budget_in_rank_order(self):
+        packer = ContextPacker(max_tokens=10, token_counter=WordCounter())
+        chunks = [
+            make_chunk("a", "doc-a", 0, "one two three four five six"),
+            make_chunk("b", "doc-b", 0, "seven eight nine ten eleven twelve"),
+            make_chunk("c", "doc-c", 0, "thirteen fourteen"),
+        ]
+
+        passages = packer.pack(chunks)
+
+        assert [p["chunk_ids"] for p in passages] == [["a"], ["c"]]
+        assert sum(p["tokens_count"] for p in passages) <= 10
+
+
+class TestDocumentRelationIndex:
+    """Test relation-graph expansion and repealed-document filtering."""
+
+    def make_index(self):
+        index = DocumentRelationIndex()
+        index._add_relation("order-996", "tax-code", "amends")
+        index._add_relation("tax-code", "guideline", "references")
+        index._add_relation("new-order", "old-order", "repeals")
+        index._add_relation("old-order", "tax-code", "amends")
+        return index
+
+    def test_expand_pulls_amending_and_referenced_documents(self):
+        index = self.make_index()
+
+        assert index.expand(["tax-code"], max_neighbors=5) == ["guideline", "order-996"]
+
+    def test_repealed_documents_are_skipped(self):
+        index = self.make_index()
+
+        assert index.is_repealed("old-order")
+        assert "old-order" not in index.expand(["tax-code"], max_neighbors=5)
+
+    def test_expand_respects_limit_and_skips_seeds(self):
+        index = self.make_index()
+
+        assert index.expand(["tax-code", "order-996"], max_neighbors=1) == ["guideline"]
+
+
+class TestEmbeddingVersionStore:
+    """Test the gate on switching the serving embedding version."""
+
+    def make_store(self, monkeypatch, recall, baseline_recall, missing=0):
+        store = EmbeddingVersionStore(cache_ttl=60)
+        version = {
+            'model_version': 'v2',
+            'model_name': 'new-model',
+            'dimension': 1024,
+            'status': 'building',
+            'recall': recall,
+            'baseline_recall': baseline_recall,
+        }
+        monkeypatch.setattr(store, 'get', lambda model_version: version)
+        monkeypatch.setattr(store, 'missing_count', lambda model_version: missing)
+        return store
+
+    def test_incomplete_version_is_not_activated(self, monkeypatch):
+        store = self.make_store(monkeypatch, recall=0.9, baseline_recall=0.8, missing=3)
+
+        with pytest.raises(ValueError, match="3 chunks"):
+            store.activate('v2')
+
+    def test_version_without_comparison_is_not_activated(self, monkeypatch):
+        store = self.make_store(monkeypatch, recall=None, baseline_recall=None)
+
+        with pytest.raises(ValueError, match="No recall comparison"):
+            store.activate('v2')
+
+    def test_version_with_lower_recall_is_not_activated(self, monkeypatch):
+        store = self.make_store(monkeypatch, recall=0.7, baseline_recall=0.8)
+
+        with pytest.raises(ValueError, match="below serving recall"):
+            store.activate('v2')
+
+    def test_active_version_is_cached(self, monkeypatch):
+        store = EmbeddingVersionStore(cache_ttl=60)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return legacy_version()
+
+        monkeypatch.setattr(store, '_load_active', load)
+
+        assert store.active()['model_version'] is None
+        store.active()
+        assert len(loads) == 1
+
+    def active_store(self, monkeypatch, model_name):
+        store = EmbeddingVersionStore(cache_ttl=60)
+        store.upserts = []
+        monkeypatch.setattr(store, '_load_active', lambda: {
+            'model_version': 'v2', 'model_name': model_name, 'dimension': 2,
+        })
+        monkeypatch.setattr(
+            store, '_upsert',
+            lambda db, model_version, chunk_ids, embeddings: store.upserts.append((model_version, chunk_ids, embeddings)),
+        )
+        return store
+
+    def test_new_chunks_reuse_vectors_of_the_same_model(self, monkeypatch):
+        store = self.active_store(monkeypatch, settings.EMBEDDING_MODEL)
+        rows = [
+            {'id': 'c1', 'content': 'a', 'embedding': [0.1, 0.2]},
+            {'id': 'c2', 'content': 'b', 'embedding': None},
+        ]
+
+        assert store.write_active(db=None, rows=rows) == 1
+        assert store.upserts == [('v2', ['c1'], [[0.1, 0.2]])]
+
+    def test_new_chunks_are_encoded_for_another_model(self, monkeypatch):
+        store = self.active_store(monkeypatch, 'new-model')
+
+        class Embedder:
+            model = object()
+
+            def encode(self, texts):
+                return [[float(len(text))] for text in texts]
+
+        monkeypatch.setattr(embeddings_module, 'get_embeddings_generator', lambda model_name: Embedder())
+
+        assert store.write_active(db=None, rows=[{'id': 'c1', 'content': 'abc', 'embedding': [0.1]}]) == 1
+        assert store.upserts == [('v2', ['c1'], [[3.0]])]
+
+    def test_nothing_is_written_for_the_legacy_version(self, monkeypatch):
+        store = self.active_store(monkeypatch, settings.EMBEDDING_MODEL)
+        monkeypatch.setattr(store, '_load_active', legacy_version)
+
+        assert store.write_active(db=None, rows=[{'id': 'c1', 'content': 'a', 'embedding': [0.1]}]) == 0
+        assert store.upserts == []
+
+    def test_index_name_is_sanitized(self):
+        assert EmbeddingVersionStore.index_name("E5-Large v2") == "chunk_embeddings_e5_large_v2_hnsw_idx"
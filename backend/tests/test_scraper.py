@@ -0,0 +1,1257 @@
+"""
+Unit tests for scraper crawling and HTTP handling.
+"""
+import asyncio
+import logging
+import re
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.config import settings
+from core.database import Base
+from models.document import Document, DocumentChunk
+from scraper.enhanced_scraper import CrawlScheduler, EnhancedInfoHubScraper, freshness_bonus
+from processor.ingestion import parse_and_chunk
+from scraper.crawl_state import CrawlState
+from scraper.firecrawl_client import FirecrawlClient, FirecrawlError
+from scraper.firecrawl_scraper import FirecrawlScraper
+from scraper.http_cache import HttpCache
+from scraper.http_client import ResponseTooLarge, http_client, read_body, read_text
+from scraper.infohub_api import InfoHubApiScraper, map_document, parse_listing
+from scraper.jobs import ScrapeJobStore, run_scrape_job
+from scraper.pipelines import DocumentPipeline, upsert_statement
+from scraper.infohub_scraper import InfoHubScraper
+from scraper.rate_limiter import HostThrottle, RateLimiter, parse_retry_after
+from scraper.robots import RobotsCache
+
+
+BASE = "https://infohub.rs.ge"
+
+
+def page(*links):
+    return "<html><body>" + "".join(f'<a href="{link}">x</a>' for link in links) + "</body></html>"
+
+
+SITE = {
+    f"{BASE}/ka": page("/ka/tax", "/ka/document/1", "https://example.com/tax"),
+    f"{BASE}/ka/tax": page("/ka/document/2", "/ka/tax/vat", "/ka"),
+    f"{BASE}/ka/tax/vat": page("/ka/document/3"),
+    f"{BASE}/ka/document/1": page("/ka/document/2#part-1"),
+    f"{BASE}/ka/document/2": page(),
+    f"{BASE}/ka/document/3": page(),
+}
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPER_RESPECT_ROBOTS_TXT", False)
+    scraper = InfoHubScraper()
+    scraper.delay = 0
+    scraper.http_cache = None
+    scraper.fetched = []
+    scraper.in_flight = 0
+    scraper.max_in_flight = 0
+
+    async def fetch(url, session):
+        scraper.fetched.append(url)
+        scraper.in_flight += 1
+        scraper.max_in_flight = max(scraper.max_in_flight, scraper.in_flight)
+        await asyncio.sleep(0.01)
+        scraper.in_flight -= 1
+        return {'body': SITE[url], 'not_modified': False} if url in SITE else None
+
+    async def process_document(url, html):
+        return None, False
+
+    monkeypatch.setattr(scraper, "fetch", fetch)
+    monkeypatch.setattr(scraper, "process_document", process_document)
+    return scraper
+
+
+@compiles(postgresql.UUID, "sqlite")
+def compile_uuid_for_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+ARTICLE = "<html><body><main><h1>მუხლი 1</h1><p>" + "გადასახადის გადამხდელი ვალდებულია. " * 10 + "</p></main></body></html>"
+
+
+@pytest.fixture
+def document_db(monkeypatch):
+    """In-memory documents database behind the scrapers' SessionLocal."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Document.__table__, DocumentChunk.__table__])
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr("scraper.infohub_scraper.SessionLocal", session_factory)
+    monkeypatch.setattr("scraper.firecrawl_scraper.SessionLocal", session_factory)
+    yield session_factory
+    engine.dispose()
+
+
+@pytest.fixture
+def storing_scraper(monkeypatch, document_db):
+    """Scraper processing pages for real, fetching from SITE and ARTICLE."""
+    monkeypatch.setattr(settings, "SCRAPER_RESPECT_ROBOTS_TXT", False)
+    scraper = InfoHubScraper()
+    scraper.http_cache = None
+    pages = {**SITE, f"{BASE}/ka/document/1": ARTICLE}
+
+    async def fetch(url, session):
+        return {'body': pages[url], 'not_modified': False, 'etag': None} if url in pages else None
+
+    monkeypatch.setattr(scraper, "fetch", fetch)
+    return scraper
+
+
+class TestFrontierCrawl:
+    """Test the breadth-first crawl frontier."""
+
+    @pytest.mark.asyncio
+    async def test_each_page_is_fetched_once(self, scraper):
+        result = await scraper.scrape(f"{BASE}/ka", max_depth=3, max_pages=100, concurrency=3)
+
+        assert sorted(scraper.fetched) == sorted(SITE)
+        assert result["pages_visited"] == len(SITE)
+
+    @pytest.mark.asyncio
+    async def test_page_budget_is_enforced(self, scraper):
+        result = await scraper.scrape(f"{BASE}/ka", max_depth=3, max_pages=3, concurrency=3)
+
+        assert len(scraper.fetched) == 3
+        assert result["pages_visited"] == 3
+
+    @pytest.mark.asyncio
+    async def test_depth_budget_is_enforced(self, scraper):
+        await scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=2)
+
+        assert f"{BASE}/ka/tax/vat" not in scraper.fetched
+        assert f"{BASE}/ka/document/1" in scraper.fetched
+
+    @pytest.mark.asyncio
+    async def test_document_links_are_fetched_before_navigation(self, scraper):
+        await scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=1)
+
+        assert scraper.fetched == [f"{BASE}/ka", f"{BASE}/ka/document/1", f"{BASE}/ka/tax"]
+
+    @pytest.mark.asyncio
+    async def test_workers_fetch_concurrently(self, scraper):
+        await scraper.scrape(f"{BASE}/ka", max_depth=3, max_pages=100, concurrency=3)
+
+        assert scraper.max_in_flight > 1
+
+
+class TestInlineStorage:
+    """Test crawls storing documents without an ingestion pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_stored_documents_are_reported(self, storing_scraper, document_db):
+        result = await storing_scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=2)
+
+        assert [doc['url'] for doc in result['documents']] == [f"{BASE}/ka/document/1"]
+        assert result['documents'][0]['title']
+        db = document_db()
+        assert db.query(Document).one().id == result['documents'][0]['id']
+        db.close()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_documents_are_not_counted(self, storing_scraper, document_db):
+        counted = []
+        progress = SimpleNamespace(incr=counted.append, flush=lambda: None)
+
+        first = await storing_scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=2, progress=progress)
+        second = await storing_scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=2, progress=progress)
+
+        assert first['documents_scraped'] == 1
+        assert second['documents_scraped'] == 0
+        assert [doc['url'] for doc in second['documents']] == [f"{BASE}/ka/document/1"]
+        assert counted.count('documents_scraped') == 1
+
+    @pytest.mark.asyncio
+    async def test_storing_does_not_block_the_event_loop(self, storing_scraper, monkeypatch):
+        finished = []
+
+        def store_document(url, html):
+            time.sleep(0.2)
+            finished.append('store')
+            return None, False
+
+        async def other_worker():
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+            finished.append('other')
+
+        monkeypatch.setattr(storing_scraper, "store_document", store_document)
+
+        await asyncio.gather(storing_scraper.process_document(f"{BASE}/ka/document/1", ARTICLE), other_worker())
+
+        assert finished == ['other', 'store']
+
+
+class TestRateLimiter:
+    """Test per-host token buckets and adaptive throttling."""
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after("120") == 120.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+    @pytest.mark.asyncio
+    async def test_requests_are_spaced_by_rate(self):
+        limiter = RateLimiter(delay=0.05, max_concurrency=5, adaptive=False)
+
+        started = time.monotonic()
+        for _ in range(4):
+            async with limiter.slot(f"{BASE}/ka") as slot:
+                slot.record(200)
+
+        assert time.monotonic() - started >= 0.14
+
+    @pytest.mark.asyncio
+    async def test_hosts_are_limited_independently(self):
+        limiter = RateLimiter(delay=10, adaptive=False)
+
+        async with limiter.slot(f"{BASE}/ka"):
+            pass
+        started = time.monotonic()
+        async with limiter.slot("https://api.firecrawl.dev/v2/scrape"):
+            pass
+
+        assert time.monotonic() - started < 0.1
+
+    @pytest.mark.asyncio
+    async def test_throttling_halves_limits_and_pauses_host(self):
+        throttle = HostThrottle(rate=4.0, max_rate=8.0, max_concurrency=4)
+        throttle.concurrency = 4.0
+
+        await throttle.acquire()
+        await throttle.release(429, retry_after=30)
+
+        assert throttle.rate == 2.0
+        assert throttle.concurrency == 2.0
+        assert throttle.blocked_until - time.monotonic() > 29
+
+    @pytest.mark.asyncio
+    async def test_success_ramps_up_to_the_maximum(self):
+        throttle = HostThrottle(rate=1.0, max_rate=1.5, max_concurrency=2)
+
+        for _ in range(20):
+            throttle.tokens = 1.0
+            await throttle.acquire()
+            await throttle.release(200)
+
+        assert throttle.rate == 1.5
+        assert throttle.concurrency == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrency_window_limits_requests_in_flight(self):
+        limiter = RateLimiter(delay=0.001, max_concurrency=2, adaptive=False)
+        in_flight = []
+        peak = []
+
+        async def request():
+            async with limiter.slot(f"{BASE}/ka") as slot:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.02)
+                in_flight.pop()
+                slot.record(200)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+
+        assert max(peak) == 2
+
+
+class FakeContent:
+    """aiohttp stream reader stand-in."""
+
+    def __init__(self, data):
+        self.data = data
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.data), size):
+            yield self.data[start:start + size]
+
+
+class FakeResponse:
+    """aiohttp response stand-in."""
+
+    url = BASE
+    charset = 'utf-8'
+
+    def __init__(self, status, body="", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.content = FakeContent(body.encode('utf-8'))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """aiohttp session stand-in returning queued responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+class TestHttpCache:
+    """Test conditional re-fetching through the on-disk cache."""
+
+    def test_validators_and_body_round_trip(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+
+        cache.store(f"{BASE}/ka/document/1", "<html>მუხლი 1</html>", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+        assert cache.conditional_headers(f"{BASE}/ka/document/1") == {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+        assert cache.load(f"{BASE}/ka/document/1") == "<html>მუხლი 1</html>"
+        assert cache.conditional_headers(f"{BASE}/ka/document/2") == {}
+
+    def test_responses_without_validators_are_not_cached(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+
+        cache.store(f"{BASE}/ka", "<html></html>")
+
+        assert cache.conditional_headers(f"{BASE}/ka") == {}
+
+    @pytest.mark.asyncio
+    async def test_not_modified_returns_cached_copy(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "SCRAPER_RESPECT_ROBOTS_TXT", False)
+        scraper = InfoHubScraper()
+        scraper.rate_limiter = RateLimiter(delay=0.001)
+        scraper.http_cache = HttpCache(str(tmp_path))
+        url = f"{BASE}/ka/document/1"
+
+        session = FakeSession(
+            FakeResponse(200, "<html>v1</html>", {'ETag': '"v1"'}),
+            FakeResponse(304),
+        )
+        first = await scraper.fetch(url, session)
+        scraper.remember(url, first)
+        second = await scraper.fetch(url, session)
+
+        assert first['body'] == "<html>v1</html>" and not first['not_modified']
+        assert second['body'] == "<html>v1</html>" and second['not_modified']
+        assert session.requests[1]['If-None-Match'] == '"v1"'
+
+    @pytest.mark.asyncio
+    async def test_not_modified_pages_skip_processing(self, scraper, monkeypatch):
+        processed = []
+
+        async def fetch(url, session):
+            return {'body': SITE[url], 'not_modified': url == f"{BASE}/ka"}
+
+        async def process_document(url, html):
+            processed.append(url)
+            return None, False
+
+        monkeypatch.setattr(scraper, "fetch", fetch)
+        monkeypatch.setattr(scraper, "process_document", process_document)
+
+        result = await scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=2)
+
+        assert f"{BASE}/ka" not in processed
+        assert f"{BASE}/ka/document/1" in processed
+        assert result["pages_not_modified"] == 1
+
+    @pytest.mark.asyncio
+    async def test_fetched_pages_are_not_cached_before_processing(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "SCRAPER_RESPECT_ROBOTS_TXT", False)
+        scraper = InfoHubScraper()
+        scraper.rate_limiter = RateLimiter(delay=0.001)
+        scraper.http_cache = HttpCache(str(tmp_path))
+        url = f"{BASE}/ka/document/1"
+
+        session = FakeSession(FakeResponse(200, "<html>v1</html>", {'ETag': '"v1"'}))
+        await scraper.fetch(url, session)
+
+        assert scraper.http_cache.conditional_headers(url) == {}
+
+    @pytest.mark.asyncio
+    async def test_pages_failing_to_process_stay_uncached(self, scraper, tmp_path, monkeypatch):
+        scraper.http_cache = HttpCache(str(tmp_path))
+
+        async def fetch(url, session):
+            return {'body': SITE[url], 'not_modified': False, 'etag': '"v1"', 'last_modified': None}
+
+        async def process_document(url, html):
+            if url == f"{BASE}/ka/document/1":
+                raise RuntimeError("database unavailable")
+            return None, False
+
+        monkeypatch.setattr(scraper, "fetch", fetch)
+        monkeypatch.setattr(scraper, "process_document", process_document)
+
+        await scraper.scrape(f"{BASE}/ka", max_depth=1, max_pages=100, concurrency=2)
+
+        assert scraper.http_cache.conditional_headers(f"{BASE}/ka/document/1") == {}
+        assert scraper.http_cache.conditional_headers(f"{BASE}/ka/tax") == {'If-None-Match': '"v1"'}
+
+    @pytest.mark.asyncio
+    async def test_refresh_ignores_cached_copies(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "SCRAPER_RESPECT_ROBOTS_TXT", False)
+        scraper = InfoHubScraper()
+        scraper.rate_limiter = RateLimiter(delay=0.001)
+        scraper.http_cache = HttpCache(str(tmp_path))
+        url = f"{BASE}/ka/document/1"
+        scraper.http_cache.store(url, "<html>v1</html>", etag='"v1"')
+        scraper.refresh = True
+
+        session = FakeSession(FakeResponse(200, "<html>v2</html>", {'ETag': '"v2"'}))
+        result = await scraper.fetch(url, session)
+        scraper.remember(url, result)
+
+        assert 'If-None-Match' not in session.requests[0]
+        assert scraper.http_cache.conditional_headers(url) == {'If-None-Match': '"v2"'}
+
+
+class TestCrawlState:
+    """Test the persistent state of incremental crawls."""
+
+    def test_records_are_written_in_batches(self, tmp_path):
+        state = CrawlState(str(tmp_path / "state.sqlite"), batch_size=3)
+
+        state.record(f"{BASE}/ka/document/1")
+        state.record(f"{BASE}/ka/document/2")
+
+        assert state.connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0] == 0
+        assert f"{BASE}/ka/document/1" in state
+
+        state.record(f"{BASE}/ka/document/3")
+
+        assert state.connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0] == 3
+        assert state.seen([f"{BASE}/ka/document/3", f"{BASE}/ka/document/4"]) == {f"{BASE}/ka/document/3"}
+
+    def test_state_survives_reopening(self, tmp_path):
+        path = str(tmp_path / "state.sqlite")
+        state = CrawlState(path)
+        state.record(f"{BASE}/ka/document/1", "hash-1", '"v1"')
+        state.record_run(documents_scraped=1, pages_visited=2)
+        state.record(f"{BASE}/ka/document/1", "hash-2")
+        state.close()
+
+        reopened = CrawlState(path)
+
+        assert reopened.get(f"{BASE}/ka/document/1")['content_hash'] == "hash-2"
+        assert reopened.get(f"{BASE}/ka/document/1")['etag'] == '"v1"'
+        summary = reopened.summary()
+        assert summary['visited_urls'] == 1
+        assert summary['total_pages_scraped'] == 2
+        assert len(summary['runs']) == 1
+
+    @pytest.mark.asyncio
+    async def test_known_documents_are_not_fetched_again(self, scraper, tmp_path):
+        state = CrawlState(str(tmp_path / "state.sqlite"))
+        state.record(f"{BASE}/ka/document/1")
+
+        result = await scraper.scrape(f"{BASE}/ka", max_depth=3, max_pages=100, concurrency=2, state=state)
+
+        assert f"{BASE}/ka/document/1" not in scraper.fetched
+        assert f"{BASE}/ka/document/2" in scraper.fetched
+        assert result["pages_visited"] == len(SITE) - 1
+        assert state.count() == len(SITE)
+
+    @pytest.mark.asyncio
+    async def test_pages_failing_to_process_are_fetched_again(self, scraper, tmp_path, monkeypatch):
+        state = CrawlState(str(tmp_path / "state.sqlite"))
+
+        async def process_document(url, html):
+            if url == f"{BASE}/ka/document/1":
+                raise RuntimeError("database unavailable")
+            return None, False
+
+        monkeypatch.setattr(scraper, "process_document", process_document)
+
+        await scraper.scrape(f"{BASE}/ka", max_depth=3, max_pages=100, concurrency=2, state=state)
+
+        assert f"{BASE}/ka/document/1" not in state
+        assert f"{BASE}/ka/document/2" in state
+
+    @pytest.mark.asyncio
+    async def test_stale_documents_are_revalidated(self, scraper, tmp_path):
+        state = CrawlState(str(tmp_path / "state.sqlite"))
+        state.record(f"{BASE}/ka/document/1", fetched_at=datetime.utcnow() - timedelta(days=30))
+        state.record(f"{BASE}/ka/document/2")
+
+        await scraper.scrape(f"{BASE}/ka", max_depth=3, max_pages=100, concurrency=2, state=state)
+
+        assert f"{BASE}/ka/document/1" in scraper.fetched
+        assert f"{BASE}/ka/document/2" not in scraper.fetched
+        assert state.seen([f"{BASE}/ka/document/1"], since=datetime.utcnow() - timedelta(days=1))
+
+    @pytest.mark.asyncio
+    async def test_revalidation_uses_the_stored_etag(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "SCRAPER_RESPECT_ROBOTS_TXT", False)
+        scraper = InfoHubScraper()
+        scraper.rate_limiter = RateLimiter(delay=0.001)
+        scraper.http_cache = None
+        scraper.state = CrawlState(str(tmp_path / "state.sqlite"))
+        url = f"{BASE}/ka/document/1"
+        scraper.state.record(url, "hash-1", '"v1"', fetched_at=datetime.utcnow() - timedelta(days=30))
+
+        session = FakeSession(FakeResponse(304))
+        documents, links = await scraper.scrape_page(url, session)
+
+        assert session.requests[0]['If-None-Match'] == '"v1"'
+        assert documents == [] and links == []
+        assert scraper.pages_not_modified == 1
+        known = scraper.state.get(url)
+        assert known['content_hash'] == "hash-1" and known['etag'] == '"v1"'
+        assert known['fetched_at'] > (datetime.utcnow() - timedelta(days=1)).isoformat()
+
+
+class TestHttpClient:
+    """Test bounded streaming body reads."""
+
+    @pytest.mark.asyncio
+    async def test_body_is_read_in_chunks(self, monkeypatch):
+        monkeypatch.setattr("scraper.http_client.READ_CHUNK_SIZE", 4)
+
+        assert await read_text(FakeResponse(200, "<html>მუხლი</html>")) == "<html>მუხლი</html>"
+
+    @pytest.mark.asyncio
+    async def test_oversized_body_is_rejected(self):
+        with pytest.raises(ResponseTooLarge):
+            await read_body(FakeResponse(200, "x" * 100), max_bytes=10)
+
+    @pytest.mark.asyncio
+    async def test_declared_length_is_checked_before_reading(self):
+        response = FakeResponse(200, "", {'Content-Length': "1000"})
+
+        with pytest.raises(ResponseTooLarge):
+            await read_body(response, max_bytes=10)
+
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /ka/admin
+Disallow: /ka/document/12
+"""
+
+
+class TestRobotsCache:
+    """Test the shared robots.txt cache."""
+
+    @pytest.mark.asyncio
+    async def test_rules_are_applied(self):
+        cache = RobotsCache(ttl=60)
+        session = FakeSession(FakeResponse(200, ROBOTS_TXT))
+
+        assert await cache.can_fetch(f"{BASE}/ka/document/1", "bot", session)
+        assert not await cache.can_fetch(f"{BASE}/ka/document/123", "bot", session)
+        assert not await cache.can_fetch(f"{BASE}/ka/admin/users", "bot", session)
+
+    @pytest.mark.asyncio
+    async def test_robots_txt_is_fetched_once_per_host(self):
+        cache = RobotsCache(ttl=60)
+        session = FakeSession(FakeResponse(200, ROBOTS_TXT))
+
+        results = await asyncio.gather(*(
+            cache.can_fetch(f"{BASE}/ka/document/{i}", "bot", session) for i in range(5)
+        ))
+
+        assert len(session.requests) == 1
+        assert results == [True, True, True, True, True]
+
+    @pytest.mark.asyncio
+    async def test_decisions_are_memoized_by_path_prefix(self):
+        cache = RobotsCache(ttl=60)
+        session = FakeSession(FakeResponse(200, ROBOTS_TXT))
+
+        for i in range(50):
+            await cache.can_fetch(f"{BASE}/ka/news/2024/article-{i}", "bot", session)
+
+        robots = cache.hosts[BASE]
+        assert robots.prefix_length == len("/ka/document/12")
+        assert len(robots.decisions) == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_robots_txt_allows_everything(self):
+        cache = RobotsCache(ttl=60)
+
+        assert await cache.can_fetch(f"{BASE}/ka/admin", "bot", FakeSession(FakeResponse(404)))
+
+    @pytest.mark.asyncio
+    async def test_forbidden_robots_txt_disallows_everything(self):
+        cache = RobotsCache(ttl=60)
+
+        assert not await cache.can_fetch(f"{BASE}/ka", "bot", FakeSession(FakeResponse(403)))
+
+
+class MockFirecrawl:
+    """Local Firecrawl API server rendering a fake site."""
+
+    def __init__(self, site=SITE, errors=(), polls=1, page_size=2):
+        self.site = site
+        self.errors = list(errors)  # statuses returned before succeeding
+        self.polls = polls  # "scraping" answers before a job completes
+        self.page_size = page_size  # job results per status page
+        self.jobs = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.app = web.Application()
+        self.app.router.add_post("/v2/scrape", self.scrape)
+        self.app.router.add_post("/v2/batch/scrape", self.submit)
+        self.app.router.add_get("/v2/batch/scrape/{job_id}", self.status)
+        self.app.router.add_post("/v2/crawl", self.submit)
+        self.app.router.add_get("/v2/crawl/{job_id}", self.status)
+
+    def page(self, url):
+        links = [f"{BASE}{href}" for href in re.findall(r'href="(/[^"]*)"', self.site.get(url, ""))]
+        return {
+            'markdown': f"# {url}\n" + "text " * 50,
+            'links': links,
+            'metadata': {'sourceURL': url, 'statusCode': 200},
+        }
+
+    async def scrape(self, request):
+        self.requests.append(request.path)
+        if self.errors:
+            return web.json_response({'success': False}, status=self.errors.pop(0))
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+
+        payload = await request.json()
+        return web.json_response({'success': True, 'data': self.page(payload['url'])})
+
+    async def submit(self, request):
+        self.requests.append(request.path)
+        payload = await request.json()
+        job_id = f"job-{len(self.jobs)}"
+        self.jobs[job_id] = {'urls': payload.get('urls') or [payload['url']], 'polls': self.polls}
+        return web.json_response({'success': True, 'id': job_id})
+
+    async def status(self, request):
+        self.requests.append(request.path)
+        job = self.jobs[request.match_info['job_id']]
+        if job['polls'] > 0:
+            job['polls'] -= 1
+            return web.json_response({'status': 'scraping', 'total': len(job['urls']), 'completed': 0})
+
+        skip = int(request.query.get('skip', 0))
+        urls = job['urls'][skip:skip + self.page_size]
+        more = skip + self.page_size < len(job['urls'])
+        return web.json_response({
+            'status': 'completed',
+            'total': len(job['urls']),
+            'completed': len(job['urls']),
+            'data': [self.page(url) for url in urls],
+            'next': str(request.url.with_query(skip=skip + self.page_size)) if more else None,
+        })
+
+    async def __aenter__(self):
+        self.server = TestServer(self.app)
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("/v2"))
+        return self
+
+    async def __aexit__(self, *exc):
+        await http_client.close()
+        await self.server.close()
+        return False
+
+
+class TestFirecrawlClient:
+    """Test the Firecrawl client against a local mock API."""
+
+    @pytest.mark.asyncio
+    async def test_scrape(self):
+        async with MockFirecrawl() as api:
+            client = FirecrawlClient("key", base_url=api.base_url)
+
+            result = await client.scrape(f"{BASE}/ka")
+
+        assert result['data']['metadata']['sourceURL'] == f"{BASE}/ka"
+        assert f"{BASE}/ka/document/1" in result['data']['links']
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        async with MockFirecrawl() as api:
+            client = FirecrawlClient("key", base_url=api.base_url, concurrency=2)
+
+            await asyncio.gather(*(client.scrape(url) for url in SITE))
+
+        assert api.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried_with_backoff(self, monkeypatch):
+        monkeypatch.setattr("scraper.firecrawl_client.RETRY_BACKOFF", 0.01)
+
+        async with MockFirecrawl(errors=[429, 502]) as api:
+            client = FirecrawlClient("key", base_url=api.base_url, max_retries=3)
+
+            result = await client.scrape(f"{BASE}/ka")
+
+        assert result['success']
+        assert len(api.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        async with MockFirecrawl(errors=[401]) as api:
+            client = FirecrawlClient("key", base_url=api.base_url, max_retries=3)
+
+            with pytest.raises(FirecrawlError):
+                await client.scrape(f"{BASE}/ka")
+
+        assert len(api.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_job_is_polled_and_paginated(self):
+        async with MockFirecrawl(polls=2, page_size=2) as api:
+            client = FirecrawlClient("key", base_url=api.base_url, poll_interval=0.01)
+
+            pages = await client.batch_scrape(list(SITE))
+
+        assert [p['metadata']['sourceURL'] for p in pages] == list(SITE)
+        assert api.requests.count("/v2/batch/scrape/job-0") == 2 + 3
+
+    @pytest.mark.asyncio
+    async def test_section_pages_are_scraped_as_batches(self, monkeypatch):
+        processed = []
+
+        async def process_document(url, markdown, metadata, db):
+            processed.append((url, metadata['page']))
+
+        site = {
+            **SITE,
+            f"{BASE}/ka?species=Bill&page=1&pageSize=40": page("/ka/document/1", "/ka/tax"),
+            f"{BASE}/ka?species=Bill&page=2&pageSize=40": page("/ka/document/2", "/ka/document/1"),
+        }
+
+        async with MockFirecrawl(site, polls=0, page_size=100) as api:
+            scraper = FirecrawlScraper("key", base_url=api.base_url)
+            scraper.client.poll_interval = 0.01
+            monkeypatch.setattr(scraper, "process_document", process_document)
+
+            await scraper.scrape_paginated_section(f"{BASE}/ka", "Bill", max_pages=2)
+
+        assert scraper.pages_scraped == 2
+        assert processed == [(f"{BASE}/ka/document/1", 1), (f"{BASE}/ka/document/2", 2)]
+        assert api.requests.count("/v2/batch/scrape") == 2
+        assert "/v2/scrape" not in api.requests
+
+    @pytest.mark.asyncio
+    async def test_all_sections_report_stored_documents(self, document_db):
+        site = {
+            f"{BASE}/ka?species={species}&page=1&pageSize=40": page(f"/ka/document/{n}")
+            for n, species in enumerate(["NewDocument", "LegislativeNews", "Bill"], 1)
+        }
+
+        async with MockFirecrawl(site, polls=0, page_size=100) as api:
+            scraper = FirecrawlScraper("key", base_url=api.base_url)
+            scraper.client.poll_interval = 0.01
+
+            result = await scraper.scrape_all_sections(f"{BASE}/ka", max_pages_per_section=1)
+
+        assert sorted(doc['url'] for doc in result['documents']) == [f"{BASE}/ka/document/{n}" for n in (1, 2, 3)]
+        assert all(doc['id'] and doc['title'] for doc in result['documents'])
+
+
+API_DOCUMENT = {
+    'id': "0fe44fbf-2372-448e-a46e-c310b1611129",
+    'name': "საქართველოს საგადასახადო კოდექსი",
+    'documentType': {'id': 3, 'name': "საქართველოს კანონი"},
+    'number': "3591-IIს",
+    'publishDate': "2010-09-17T00:00:00Z",
+    'effectiveDate': "2011-01-01",
+    'issuer': "საქართველოს პარლამენტი",
+    'species': "NewDocument",
+    'content': "<div><h2>მუხლი 1. კოდექსის მიზანი</h2><p>" + "საგადასახადო ვალდებულება " * 10 + "</p>"
+               "<script>track()</script></div>",
+}
+
+
+class MockInfoHubApi:
+    """Local stand-in for the InfoHub JSON API."""
+
+    def __init__(self, documents):
+        self.documents = {document['id']: document for document in documents}
+        self.requests = []
+        self.app = web.Application()
+        self.app.router.add_get("/api/documents", self.listing)
+        self.app.router.add_get("/api/documents/{doc_id}", self.detail)
+
+    async def listing(self, request):
+        self.requests.append(request.path_qs)
+        skip, take = int(request.query['skip']), int(request.query['take'])
+        items = [
+            {key: value for key, value in document.items() if key != 'content'}
+            for document in self.documents.values()
+        ][skip:skip + take]
+        return web.json_response({'items': items, 'totalCount': len(self.documents)})
+
+    async def detail(self, request):
+        self.requests.append(request.path_qs)
+        return web.json_response(self.documents[request.match_info['doc_id']])
+
+    async def __aenter__(self):
+        self.server = TestServer(self.app)
+        await self.server.start_server()
+        self.api_url = str(self.server.make_url("/api"))
+        return self
+
+    async def __aexit__(self, *exc):
+        await http_client.close()
+        await self.server.close()
+        return False
+
+
+class TestInfoHubApi:
+    """Test mapping of InfoHub API responses to documents."""
+
+    def test_document_is_mapped(self):
+        document = map_document(API_DOCUMENT)
+
+        assert document['url'] == f"{BASE}/ka/workspace/document/{API_DOCUMENT['id']}"
+        assert document['title'] == "საქართველოს საგადასახადო კოდექსი"
+        assert document['document_type'] == 'law'
+        assert document['document_number'] == "3591-IIს"
+        assert document['date_published'] == date(2010, 9, 17)
+        assert document['date_effective'] == date(2011, 1, 1)
+        assert document['authority'] == "საქართველოს პარლამენტი"
+        assert document['metadata']['species'] == "NewDocument"
+        assert document['text'].startswith("მუხლი 1. კოდექსის მიზანი\n")
+        assert 'track()' not in document['text']
+
+    def test_mapped_document_feeds_the_ingestion_pipeline(self):
+        parsed = parse_and_chunk(map_document(API_DOCUMENT))
+
+        assert parsed['document_type'] == 'law'
+        assert parsed['fields']['date_published'] == date(2010, 9, 17)
+        assert parsed['chunks'][0]['metadata']['article_number'] == '1'
+
+    def test_documents_without_text_are_not_mapped(self):
+        assert map_document({**API_DOCUMENT, 'content': None}) is None
+        assert map_document({**API_DOCUMENT, 'content': "<p>მოკლე</p>"}) is None
+        assert map_document({key: value for key, value in API_DOCUMENT.items() if key != 'id'}) is None
+
+    def test_unknown_type_and_bad_dates_fall_back(self):
+        document = map_document({**API_DOCUMENT, 'documentType': "სხვა", 'publishDate': "n/a"})
+
+        assert document['document_type'] == 'guideline'
+        assert document['date_published'] is None
+
+    def test_listing_shapes(self):
+        assert parse_listing([{'id': 1}]) == ([{'id': 1}], None)
+        assert parse_listing({'items': [{'id': 1}], 'totalCount': 7}) == ([{'id': 1}], 7)
+        assert parse_listing({'data': [], 'total': 0}) == ([], 0)
+        assert parse_listing(None) == ([], None)
+
+    @pytest.mark.asyncio
+    async def test_listing_is_paged_and_details_are_fetched(self, monkeypatch):
+        monkeypatch.setattr("scraper.infohub_api.PAGE_SIZE", 2)
+        documents = [{**API_DOCUMENT, 'id': f"doc-{i}"} for i in range(3)]
+        documents.append({**API_DOCUMENT, 'id': "doc-empty", 'content': ""})
+
+        async with MockInfoHubApi(documents) as api:
+            scraper = InfoHubApiScraper(api_url=api.api_url)
+            monkeypatch.setattr("scraper.infohub_api.rate_limiter", RateLimiter(delay=0.001))
+
+            mapped = [document async for document in scraper.iter_documents(max_documents=100)]
+
+        assert [d['metadata']['api_id'] for d in mapped] == ["doc-0", "doc-1", "doc-2"]
+        assert scraper.unmapped_urls == [f"{BASE}/ka/workspace/document/doc-empty"]
+        assert sum(path.startswith("/api/documents?") for path in api.requests) == 2
+
+
+class FakeFirecrawl:
+    """FirecrawlScraper stand-in serving search results, listings and documents."""
+
+    def __init__(self, links_per_page=3, pages=2, delay=0.0):
+        self.links_per_page = links_per_page
+        self.pages = pages
+        self.delay = delay
+        self.fetched = []
+        self.processed = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def scrape_url(self, url, formats=None):
+        self.fetched.append(url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        if '/document/' in url:
+            return {'data': {'markdown': "text", 'links': []}}
+        if 'search=' in url:
+            query = url.split('search=')[1]
+            return {'data': {'links': [f"{BASE}/ka/document/{query}-{i}" for i in range(3)]}}
+
+        page = int(url.rsplit('page=', 1)[1])
+        doc_type = url.split('documentType=')[1].split('&')[0]
+        if page > self.pages:
+            return {'data': {'links': []}}
+        return {'data': {'links': [
+            f"{BASE}/ka/document/{doc_type}-{page}-{i}" for i in range(self.links_per_page)
+        ]}}
+
+    async def process_document(self, url, markdown, metadata, db):
+        self.processed.append(metadata)
+        return SimpleNamespace(title=url)
+
+
+@pytest.fixture
+def enhanced():
+    scraper = EnhancedInfoHubScraper("key")
+    scraper.firecrawl = FakeFirecrawl()
+    return scraper
+
+
+class TestPriorityCrawl:
+    """Test the priority-queue crawl of EnhancedInfoHubScraper."""
+
+    def test_scheduler_orders_by_score_and_deduplicates(self):
+        scheduler = CrawlScheduler()
+
+        assert scheduler.push('document', f"{BASE}/ka/document/1", 50)
+        assert scheduler.push('document', f"{BASE}/ka/document/2", 90)
+        assert not scheduler.push('document', f"{BASE}/ka/document/1", 100)
+
+        assert scheduler.queue.get_nowait()[2]['url'] == f"{BASE}/ka/document/2"
+
+    def test_freshness_bonus_decreases_with_listing_rank(self):
+        assert freshness_bonus(0) > freshness_bonus(40) > freshness_bonus(199) > 0
+        assert freshness_bonus(500) == 0
+
+    @pytest.mark.asyncio
+    async def test_high_priority_documents_come_first(self, enhanced):
+        result = await enhanced.scrape_priority_documents(
+            high_priority_limit=2, medium_priority_limit=2, low_priority_limit=2, concurrency=1,
+        )
+
+        priorities = [m['priority'] for m in enhanced.firecrawl.processed]
+        assert priorities == sorted(priorities, reverse=True)
+        assert result['statistics']['total'] == 8 * 2
+        assert {doc['key'] for doc in result['key_documents']} == {
+            'tax_code', 'order_996', 'vat_methodology', 'income_tax_law',
+        }
+
+    @pytest.mark.asyncio
+    async def test_limits_are_enforced_per_type(self, enhanced):
+        result = await enhanced.scrape_priority_documents(
+            high_priority_limit=5, medium_priority_limit=1, low_priority_limit=0, concurrency=2,
+        )
+
+        assert result['statistics']['by_type']['law'] == 5
+        assert result['statistics']['by_type']['methodological_guideline'] == 1
+        assert result['statistics']['by_priority']['low'] == 0
+
+    @pytest.mark.asyncio
+    async def test_workers_fetch_concurrently(self, enhanced):
+        enhanced.firecrawl.delay = 0.01
+
+        await enhanced.scrape_priority_documents(
+            high_priority_limit=3, medium_priority_limit=3, low_priority_limit=3, concurrency=4,
+        )
+
+        assert enhanced.firecrawl.max_in_flight > 1
+
+    @pytest.mark.asyncio
+    async def test_each_worker_has_its_own_session(self, enhanced, monkeypatch):
+        opened = []
+
+        def session_factory():
+            opened.append(SimpleNamespace(closed=False))
+            opened[-1].close = lambda session=opened[-1]: setattr(session, 'closed', True)
+            return opened[-1]
+
+        monkeypatch.setattr("scraper.enhanced_scraper.SessionLocal", session_factory)
+        used = []
+        process_document = enhanced.firecrawl.process_document
+
+        async def recording_process_document(url, markdown, metadata, db):
+            used.append(db)
+            return await process_document(url, markdown, metadata, db)
+
+        enhanced.firecrawl.process_document = recording_process_document
+
+        await enhanced.scrape_priority_documents(
+            high_priority_limit=3, medium_priority_limit=3, low_priority_limit=3, concurrency=4,
+        )
+
+        assert len(opened) == 4
+        assert {id(db) for db in used} <= {id(db) for db in opened}
+        assert all(session.closed for session in opened)
+
+    @pytest.mark.asyncio
+    async def test_time_budget_keeps_the_most_valuable_documents(self, enhanced):
+        enhanced.firecrawl.delay = 0.01
+
+        result = await enhanced.scrape_priority_documents(
+            high_priority_limit=10, medium_priority_limit=10, low_priority_limit=10,
+            time_budget=0.1, concurrency=1,
+        )
+
+        assert result['statistics']['tasks_skipped'] > 0
+        assert result['statistics']['by_priority']['low'] == 0
+        assert all(m['priority'] >= 80 for m in enhanced.firecrawl.processed)
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by the job store."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.sorted_sets = {}
+        self.published = []
+        self.round_trips = 0
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        self.hashes.setdefault(key, {}).update({k: str(v) for k, v in values.items()})
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, key):
+        return 1 if self.hashes.pop(key, None) is not None else 0
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zrevrange(self, key, start, end):
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda item: -item[1])
+        return [member for member, _ in members][start:end + 1]
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.sorted_sets.get(key, {}).pop(member, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them in one execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class TestScrapeJobStore:
+    """Test scraper job state in Redis hashes."""
+
+    def test_job_lifecycle(self):
+        store = ScrapeJobStore(FakeRedis(), ttl=60)
+
+        job_id = store.create({'url': f"{BASE}/ka", 'max_pages': 10})
+        assert store.get(job_id)['status'] == 'queued'
+        assert store.get(job_id)['params'] == {'url': f"{BASE}/ka", 'max_pages': 10}
+
+        store.update(job_id, 'running')
+        store.update(job_id, 'completed', result={'documents_scraped': 3})
+
+        job = store.get(job_id)
+        assert job['status'] == 'completed'
+        assert job['result'] == {'documents_scraped': 3}
+        assert 'started_at' in job and 'finished_at' in job
+        assert [message for _, message in store.redis.published] == ['running', 'completed']
+
+    def test_progress_is_flushed_in_one_round_trip(self):
+        redis = FakeRedis()
+        store = ScrapeJobStore(redis, ttl=60)
+        job_id = store.create({})
+        progress = store.progress(job_id, flush_interval=3600)
+        round_trips = redis.round_trips
+
+        for _ in range(25):
+            progress.incr('pages_visited')
+        progress.incr('documents_scraped', 4)
+        assert store.get(job_id)['pages_visited'] == 0
+
+        progress.flush()
+
+        job = store.get(job_id)
+        assert (job['pages_visited'], job['documents_scraped']) == (25, 4)
+        assert redis.round_trips == round_trips + 1
+        assert redis.published[-1] == (store.channel(job_id), 'progress')
+
+    def test_progress_flushes_on_interval(self):
+        store = ScrapeJobStore(FakeRedis(), ttl=60)
+        job_id = store.create({})
+        progress = store.progress(job_id, flush_interval=0)
+
+        progress.incr('pages_visited')
+
+        assert store.get(job_id)['pages_visited'] == 1
+
+    def test_expired_jobs_are_dropped_from_the_list(self):
+        store = ScrapeJobStore(FakeRedis(), ttl=60)
+        first = store.create({})
+        second = store.create({})
+        store.redis.hashes.pop(store.key(first))
+
+        assert [job['task_id'] for job in store.list()] == [second]
+        assert store.redis.sorted_sets[store.INDEX_KEY].keys() == {second}
+
+    def test_delete(self):
+        store = ScrapeJobStore(FakeRedis(), ttl=60)
+        job_id = store.create({})
+
+        assert store.delete(job_id)
+        assert store.get(job_id) is None
+        assert not store.delete(job_id)
+
+
+    def test_job_completes_after_storing_documents(self, storing_scraper):
+        store = ScrapeJobStore(FakeRedis(), ttl=60)
+        job_id = store.create({'url': f"{BASE}/ka"})
+
+        result = run_scrape_job(job_id, f"{BASE}/ka", 1, 100, store=store, scraper=storing_scraper)
+
+        job = store.get(job_id)
+        assert job['status'] == 'completed'
+        assert job['documents_scraped'] == 1
+        assert job['result']['documents'][0]['url'] == f"{BASE}/ka/document/1"
+        assert result['documents'][0]['id'] is not None
+
+
+def item(n, content="text"):
+    return {"url": f"{BASE}/ka/document/{n}", "title": f"Document {n}", "content": content}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = DocumentPipeline(batch_size=2, flush_interval=60)
+    pipeline.batches = []
+    pipeline.dispatched = []
+
+    def write_batch(rows):
+        pipeline.batches.append([row['source_url'] for row in rows])
+        return [(row['id'], True) for row in rows]
+
+    monkeypatch.setattr(pipeline, "write_batch", write_batch)
+    monkeypatch.setattr(pipeline, "dispatch", pipeline.dispatched.append)
+    return pipeline
+
+
+class TestDocumentPipeline:
+    """Test buffered writes of the Scrapy document pipeline."""
+
+    def test_items_are_written_in_batches(self, pipeline):
+        spider = SimpleNamespace(logger=logging.getLogger("spider"))
+        pipeline.open_spider(spider)
+
+        for n in range(5):
+            pipeline.process_item(item(n), spider)
+        pipeline.process_item({"type": "discovery", "url": f"{BASE}/ka"}, spider)
+        pipeline.close_spider(spider)
+
+        assert [len(batch) for batch in pipeline.batches] == [2, 2, 1]
+        assert sum(len(ids) for ids in pipeline.dispatched) == 5
+
+    def test_repeated_urls_are_written_once_per_batch(self, pipeline):
+        spider = SimpleNamespace(logger=logging.getLogger("spider"))
+        pipeline.open_spider(spider)
+
+        pipeline.process_item(item(1, "v1"), spider)
+        pipeline.process_item(item(1, "v2"), spider)
+        pipeline.close_spider(spider)
+
+        assert pipeline.batches == [[f"{BASE}/ka/document/1"]]
+
+    def test_buffer_is_flushed_after_interval(self, pipeline):
+        spider = SimpleNamespace(logger=logging.getLogger("spider"))
+        pipeline.flush_interval = 0
+        pipeline.open_spider(spider)
+
+        pipeline.process_item(item(1), spider)
+        pipeline.executor.shutdown(wait=True)
+
+        assert pipeline.batches == [[f"{BASE}/ka/document/1"]]
+
+    def test_failed_batches_are_retried_without_the_failing_rows(self, pipeline, monkeypatch):
+        spider = SimpleNamespace(logger=logging.getLogger("spider"))
+        pipeline.batch_size = 4
+        attempts = []
+
+        def write_batch(rows):
+            urls = [row['source_url'] for row in rows]
+            attempts.append(urls)
+            if f"{BASE}/ka/document/2" in urls:
+                raise RuntimeError("value too long")
+            pipeline.batches.append(urls)
+            return [(row['id'], True) for row in rows]
+
+        monkeypatch.setattr(pipeline, "write_batch", write_batch)
+        pipeline.open_spider(spider)
+
+        for n in range(4):
+            pipeline.process_item(item(n), spider)
+        pipeline.close_spider(spider)
+
+        assert sorted(url for batch in pipeline.batches for url in batch) == [
+            f"{BASE}/ka/document/{n}" for n in (0, 1, 3)
+        ]
+        assert [f"{BASE}/ka/document/2"] in attempts
+        assert sum(len(ids) for ids in pipeline.dispatched) == 3
+
+    def test_items_without_url_are_skipped(self, pipeline):
+        spider = SimpleNamespace(logger=logging.getLogger("spider"))
+        pipeline.open_spider(spider)
+
+        pipeline.process_item({"title": "No URL", "content": "text"}, spider)
+        pipeline.process_item(item(1), spider)
+        pipeline.close_spider(spider)
+
+        assert pipeline.batches == [[f"{BASE}/ka/document/1"]]
+
+    def test_upsert_updates_only_changed_documents(self):
+        sql = str(upsert_statement([{"source_url": f"{BASE}/ka/document/1", "file_hash": "h"}]).compile(
+            dialect=postgresql.dialect()
+        ))
+
+        assert "ON CONFLICT (source_url) DO UPDATE" in sql
+        assert "WHERE documents.file_hash IS DISTINCT FROM excluded.file_hash" in sql
+        assert "RETURNING documents.id" in sql